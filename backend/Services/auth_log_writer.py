@@ -0,0 +1,192 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class AuthLogWriter:
+    """
+    Writes UserAuthLog rows off the request path.
+
+    log() puts an event on a bounded in-memory queue; a background thread
+    drains it and inserts rows in multi-row batches, either when batch_size
+    events are waiting or flush_interval seconds have passed. When the queue
+    is full the caller waits up to enqueue_timeout and then writes its event
+    itself, so a burst slows logins down instead of losing audit rows. The
+    queue is flushed when the process exits.
+
+    The same thread periodically deletes rows older than the retention window
+    in small chunks, so the table doesn't grow without bound.
+    """
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self.written = 0
+        self.failed = 0
+        self.inline_writes = 0
+        self.pruned = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.close() # Drain a writer started for a previously configured app
+        self.app = app
+        self.enabled = app.config.get('AUTH_LOG_ASYNC', True)
+        self.batch_size = app.config.get('AUTH_LOG_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('AUTH_LOG_FLUSH_INTERVAL_SECONDS', 1.0)
+        self.enqueue_timeout = app.config.get('AUTH_LOG_ENQUEUE_TIMEOUT_SECONDS', 0.05)
+        self.retention_days = app.config.get('AUTH_LOG_RETENTION_DAYS', 90)
+        self.prune_interval = app.config.get('AUTH_LOG_PRUNE_INTERVAL_SECONDS', 3600)
+        self._queue = queue.Queue(maxsize=app.config.get('AUTH_LOG_QUEUE_SIZE', 10000))
+        app.extensions['auth_log_writer'] = self
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def log(self, user_id, action, ip_address=None, user_agent=None):
+        row = {
+            'user_id': user_id,
+            'action': action,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': datetime.now(timezone.utc)
+        }
+        if not self.enabled:
+            self._write([row])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # Back-pressure: the caller pays for its own write rather than dropping the event
+            self.inline_writes += 1
+            self._write([row])
+
+    def _ensure_started(self):
+        # Started lazily (and restarted after fork) so pre-forking servers get one writer per worker
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name='auth-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self, events):
+        next_prune = time.monotonic() + self.prune_interval
+        while not self._stop.is_set() or not events.empty():
+            batch = self._next_batch(events)
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    events.task_done()
+            if self.retention_days and time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + self.prune_interval
+                try:
+                    self.prune()
+                except Exception as e:
+                    logger.warning("Auth log pruning failed: %s", e)
+
+    def _next_batch(self, events):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(events.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows):
+        from sqlalchemy import insert
+        from extensions import db
+        from models import UserAuthLog
+
+        # Separate connection from the request session so request transactions are unaffected
+        for attempt in range(2):
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(insert(UserAuthLog), rows)
+                self.written += len(rows)
+                return
+            except Exception as e:
+                if attempt == 1:
+                    self.failed += len(rows)
+                    logger.error("Failed to write %s auth log rows: %s", len(rows), e)
+
+    def flush(self, timeout=5.0):
+        """Blocks until every queued event has been written (or timeout elapses)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=5.0):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def prune(self, retention_days=None, chunk_size=5000, pause=0.05):
+        """
+        Deletes rows older than the retention window in chunks of chunk_size,
+        pausing between chunks to keep lock times short. Returns rows deleted.
+        """
+        from sqlalchemy import delete, select
+        from extensions import db
+        from models import UserAuthLog
+
+        retention_days = retention_days or self.retention_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        deleted = 0
+        with self.app.app_context():
+            while True:
+                with db.engine.begin() as connection:
+                    ids = connection.execute(
+                        select(UserAuthLog.log_id)
+                        .where(UserAuthLog.created_at < cutoff)
+                        .order_by(UserAuthLog.log_id)
+                        .limit(chunk_size)
+                    ).scalars().all()
+                    if not ids:
+                        break
+                    connection.execute(delete(UserAuthLog).where(UserAuthLog.log_id.in_(ids)))
+                deleted += len(ids)
+                time.sleep(pause)
+        self.pruned += deleted
+        return deleted
+
+    def collect_metrics(self):
+        stats = self.stats()
+        return [
+            ('auth_log_queue_depth', 'gauge', 'Auth log events waiting to be written.', [({}, stats['queued'])]),
+            ('auth_log_rows_total', 'counter', 'Auth log rows by outcome.',
+             [({'outcome': outcome}, stats[outcome]) for outcome in ('written', 'failed', 'inline_writes', 'pruned')])
+        ]
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'written': self.written,
+            'failed': self.failed,
+            'inline_writes': self.inline_writes,
+            'pruned': self.pruned
+        }
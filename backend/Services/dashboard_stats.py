@@ -0,0 +1,204 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from utils import format_practice_time
+from models import UserDashboardStats, InterviewSession, InterviewAnswer, AnswerFeedbackItem
+
+MAX_TRACKED_FEEDBACK = 100 # Distinct strength/improvement texts kept per user
+CHART_BUCKET_DAYS = 30
+RECENT_ACTIVITY_COUNT = 5
+
+
+def _locked_stats(user_id):
+    # Row lock so concurrent answers for the same user don't lose increments
+    return UserDashboardStats.query.filter_by(user_id=user_id).with_for_update().first()
+
+
+def _activity(session):
+    return {
+        'id': session.session_id,
+        'type': session.interview_type,
+        'completed': session.status == 'completed',
+        'date': (session.created_at or datetime.now(timezone.utc)).isoformat()
+    }
+
+
+def _bump_counts(counts, texts):
+    counts = dict(counts or {})
+    for text in texts:
+        counts[text] = counts.get(text, 0) + 1
+    if len(counts) > MAX_TRACKED_FEEDBACK:
+        counts = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True)[:MAX_TRACKED_FEEDBACK])
+    return counts
+
+
+def record_session_started(session):
+    """Adds a newly created (flushed) session to the user's recent activity."""
+    stats = _locked_stats(session.user_id)
+    if stats is None:
+        rebuild_stats(session.user_id)
+        return
+    activities = [a for a in stats.recent_activities or [] if a.get('id') != session.session_id]
+    stats.recent_activities = ([_activity(session)] + activities)[:RECENT_ACTIVITY_COUNT]
+
+
+def record_answer(session, answer, completed_now):
+    """
+    Folds one analyzed (flushed) answer into the user's aggregates.
+    completed_now marks that this answer completed its session.
+    """
+    stats = _locked_stats(answer.user_id)
+    if stats is None:
+        # First activity since aggregates were introduced; history already includes this answer
+        rebuild_stats(answer.user_id)
+        return
+
+    stats.answers_count += 1
+    stats.total_practice_seconds += answer.duration_seconds or 0
+    if answer.score is not None:
+        stats.scored_answers += 1
+        stats.score_total += answer.score
+
+        day = (answer.created_at or datetime.now(timezone.utc)).date().isoformat()
+        buckets = [dict(b) for b in stats.chart_buckets or []]
+        if buckets and buckets[-1]['date'] == day:
+            buckets[-1]['score_total'] += answer.score
+            buckets[-1]['scored'] += 1
+        else:
+            buckets.append({'date': day, 'score_total': answer.score, 'scored': 1})
+        stats.chart_buckets = buckets[-CHART_BUCKET_DAYS:]
+
+    stats.strength_counts = _bump_counts(
+        stats.strength_counts, [item.text for item in answer.feedback_items if item.kind == 'strength'])
+    stats.improvement_counts = _bump_counts(
+        stats.improvement_counts, [item.text for item in answer.feedback_items if item.kind == 'improvement'])
+
+    if completed_now:
+        stats.interviews_completed += 1
+        stats.recent_activities = [dict(a, completed=True) if a.get('id') == session.session_id else a
+                                   for a in stats.recent_activities or []]
+
+
+def _aggregates(execute, user_id):
+    """
+    A user's aggregates computed from interview history, as stats column values.
+    `execute` runs a statement: a Connection's execute, or db.session.execute
+    so that read-only views can run it on a replica.
+    """
+    values = {
+        'interviews_completed': execute(
+            select(func.count(InterviewSession.session_id))
+            .where(InterviewSession.user_id == user_id, InterviewSession.status == 'completed')).scalar() or 0
+    }
+    answers_count, scored_answers, score_total, practice_seconds = execute(
+        select(func.count(InterviewAnswer.answer_id),
+               func.count(InterviewAnswer.score),
+               func.coalesce(func.sum(InterviewAnswer.score), 0),
+               func.coalesce(func.sum(InterviewAnswer.duration_seconds), 0))
+        .where(InterviewAnswer.user_id == user_id)).one()
+    values.update(answers_count=answers_count, scored_answers=scored_answers, score_total=int(score_total),
+                  total_practice_seconds=int(practice_seconds))
+
+    for kind, column in (('strength', 'strength_counts'), ('improvement', 'improvement_counts')):
+        occurrences = func.count(AnswerFeedbackItem.item_id)
+        rows = execute(select(AnswerFeedbackItem.text, occurrences)
+                       .where(AnswerFeedbackItem.user_id == user_id, AnswerFeedbackItem.kind == kind)
+                       .group_by(AnswerFeedbackItem.text)
+                       .order_by(occurrences.desc())
+                       .limit(MAX_TRACKED_FEEDBACK)).all()
+        values[column] = {text: count for text, count in rows}
+
+    day = func.date(InterviewAnswer.created_at)
+    rows = execute(select(day, func.sum(InterviewAnswer.score), func.count(InterviewAnswer.score))
+                   .where(InterviewAnswer.user_id == user_id, InterviewAnswer.score.isnot(None))
+                   .group_by(day)
+                   .order_by(day.desc())
+                   .limit(CHART_BUCKET_DAYS)).all()
+    values['chart_buckets'] = [{'date': str(d), 'score_total': int(total), 'scored': scored}
+                               for d, total, scored in reversed(rows)]
+
+    sessions = execute(select(InterviewSession.session_id, InterviewSession.interview_type,
+                              InterviewSession.status, InterviewSession.created_at)
+                       .where(InterviewSession.user_id == user_id)
+                       .order_by(InterviewSession.created_at.desc())
+                       .limit(RECENT_ACTIVITY_COUNT)).all()
+    values['recent_activities'] = [_activity(session) for session in sessions]
+    return values
+
+
+def _insert_stats_row(conn, user_id):
+    # Two first activities of the same user can get here together; whichever inserts second does nothing
+    table = UserDashboardStats.__table__
+    dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(conn.dialect.name)
+    if dialect_insert:
+        conn.execute(dialect_insert(table).values(user_id=user_id).on_conflict_do_nothing(index_elements=['user_id']))
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(table).values(user_id=user_id))
+    except IntegrityError:
+        pass
+
+
+def store_stats(conn, user_id):
+    """
+    Creates or overwrites a user's stats row from interview history on `conn`,
+    within its transaction. The row is created first (a no-op if it exists) and
+    locked before history is read, so a concurrent rebuild waits for this one
+    to commit and then sees everything it saw.
+    """
+    _insert_stats_row(conn, user_id)
+    conn.execute(select(UserDashboardStats.user_id).where(UserDashboardStats.user_id == user_id).with_for_update())
+    conn.execute(update(UserDashboardStats).where(UserDashboardStats.user_id == user_id)
+                 .values(**_aggregates(conn.execute, user_id)))
+
+
+def rebuild_stats(user_id):
+    """
+    Recomputes a user's aggregates from interview history in the current
+    transaction and returns the stats row. Used for users whose history
+    predates the stats table (see migration 0005); the caller commits.
+    """
+    store_stats(db.session.connection(), user_id)
+    return db.session.get(UserDashboardStats, user_id, populate_existing=True)
+
+
+def compute_stats(user_id):
+    """Aggregates from interview history as an unsaved stats object, for read-only views."""
+    return UserDashboardStats(user_id=user_id, **_aggregates(db.session.execute, user_id))
+
+
+def _top(counts, limit=5):
+    return [text for text, _ in sorted((counts or {}).items(), key=lambda item: item[1], reverse=True)[:limit]]
+
+
+def to_dashboard_stats(stats, user, practice_skills=()):
+    """
+    Shapes a stats row into the dashboard 'stats' payload. practice_skills
+    (common skills in the user's industry missing from their profile) are
+    added to the recommended practice.
+    """
+    activities = list(stats.recent_activities or [])
+    activities.append({'id': None, 'type': 'account_creation', 'completed': True, 'date': user.created_at.isoformat() if user.created_at else None})
+    return {
+        'interviewsCompleted': stats.interviews_completed,
+        'averageScore': stats.average_score,
+        'upcomingInterviews': 0,
+        'practiceTime': format_practice_time(stats.total_practice_seconds),
+        'activities': activities,
+        'commonStrengths': _top(stats.strength_counts),
+        'commonImprovements': _top(stats.improvement_counts),
+        'recommendedPractice': [
+            {'id': 1, 'title': 'Behavioral Interview', 'description': 'Practice common behavioral questions.', 'type': 'behavioral'},
+            {'id': 2, 'title': 'Technical Skills', 'description': 'Practice technical questions for your role.', 'type': 'technical'}
+        ] + [
+            {'id': 3 + i, 'title': skill, 'description': f'Common in your industry: practice questions on {skill}.',
+             'type': 'technical', 'skill': skill}
+            for i, skill in enumerate(practice_skills)
+        ],
+        'chartData': [{'date': b['date'], 'score': round(b['score_total'] / b['scored'])} for b in stats.chart_buckets or [] if b['scored']]
+    }
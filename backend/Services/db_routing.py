@@ -0,0 +1,236 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select
+
+from utils import LRUCache
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'db_primary_until'
+
+# Seconds the replica is behind the primary; 0 on a primary (or a plain second database used for testing)
+POSTGRES_LAG_QUERY = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class RoutingSession(Session):
+    """
+    db.session class that sends SELECTs to a read replica while a @read_only
+    view runs, and everything else (flushes, Core INSERT/UPDATE/DELETE, raw
+    connections) to the primary. Once the session has written, later reads in
+    the same request go to the primary as well, so they see that write.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and not self.info.get('wrote'):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['wrote'] = True
+            elif isinstance(clause, Select):
+                router = current_app.extensions.get('db_router')
+                replica = router.choose() if router is not None else None
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    # Remember whose rows changed so their next reads come from the primary
+    user_ids = session.info.setdefault('written_user_ids', set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        user_id = getattr(obj, 'user_id', None)
+        if user_id is not None:
+            user_ids.add(user_id)
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    if not session.info.get('wrote') or not has_app_context():
+        return
+    router = current_app.extensions.get('db_router')
+    if router is not None and router.enabled:
+        router.record_write(session.info.pop('written_user_ids', ()))
+    session.info.pop('wrote', None)
+
+
+def _request_user_id():
+    # Views identify the user by URL (/profile/<user_id>), query string or body; there is no auth session
+    value = (request.view_args or {}).get('user_id') or request.args.get('user_id')
+    if value is None and request.is_json:
+        data = request.get_json(silent=True)
+        value = data.get('user_id') if isinstance(data, dict) else None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReplicaRouter:
+    """
+    Picks a read replica (the SQLALCHEMY_BINDS named replica_N) for @read_only
+    views, round-robin among the healthy ones, or None for the primary.
+
+    A background thread (started on first use) measures each replica's lag
+    every REPLICA_HEALTH_INTERVAL_SECONDS; replicas that fail the check or
+    lag more than REPLICA_MAX_LAG_SECONDS are skipped until they recover, and
+    with none left reads go to the primary.
+
+    Read-your-writes: for REPLICA_STICKY_SECONDS after a commit, the users
+    whose rows it changed are served from the primary. The same window is
+    sent to the client as a cookie, so it holds across worker processes.
+    """
+    def __init__(self, app=None, db=None):
+        self.replicas = []
+        self.max_lag = 5.0
+        self.interval = 2.0
+        self.sticky_seconds = 10.0
+        self.lag_query = None
+        self.status = {} # replica name -> {'healthy': bool, 'lag_seconds': float or None, 'error': str or None}
+        self.routed = {'replica': 0, 'primary': 0}
+        self._sticky_users = LRUCache(max_entries=100000)
+        self._db = None
+        self._engines = None
+        self._cycle = itertools.count()
+        self._monitor_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self._db = db
+        self.replicas = sorted(name for name in app.config.get('SQLALCHEMY_BINDS') or {} if name.startswith('replica_'))
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', 5.0)
+        self.interval = app.config.get('REPLICA_HEALTH_INTERVAL_SECONDS', 2.0)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10.0)
+        self.lag_query = app.config.get('REPLICA_LAG_QUERY') or None
+        self._sticky_users = LRUCache(max_entries=100000, ttl=self.sticky_seconds)
+        app.extensions['db_router'] = self
+        if self.replicas:
+            app.after_request(self._set_sticky_cookie)
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    def _ensure_monitor(self):
+        # Per process: started lazily so forked workers each get their own thread
+        if self._monitor_pid == os.getpid():
+            return
+        with self._lock:
+            if self._monitor_pid == os.getpid():
+                return
+            self._engines = {name: self._db.engines[name] for name in self.replicas}
+            for name, engine in self._engines.items():
+                event.listen(engine, 'handle_error', lambda context, name=name: self._on_error(name, context))
+            # Replicas count as unhealthy until the thread's first check, so reads use the primary meanwhile
+            threading.Thread(target=self._monitor, name='replica-health', daemon=True).start()
+            self._monitor_pid = os.getpid()
+
+    def _monitor(self):
+        while True:
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Replica health check failed")
+            time.sleep(self.interval)
+
+    def _lag_query(self, engine):
+        if self.lag_query:
+            return self.lag_query
+        return POSTGRES_LAG_QUERY if engine.dialect.name == 'postgresql' else 'SELECT 0'
+
+    def check(self):
+        """Measures every replica's lag and updates which ones reads may use."""
+        for name, engine in self._engines.items():
+            try:
+                with engine.connect() as conn:
+                    lag = float(conn.execute(text(self._lag_query(engine))).scalar() or 0)
+                healthy, error = lag <= self.max_lag, None
+            except Exception as e:
+                lag, healthy, error = None, False, str(e)
+            previous = self.status.get(name, {}).get('healthy')
+            if previous is not None and previous != healthy:
+                logger.warning("Replica %s", 'recovered' if healthy else 'taken out of rotation',
+                               extra={'replica': name, 'lag_seconds': lag, 'error': error})
+            self.status[name] = {'healthy': healthy, 'lag_seconds': lag, 'error': error}
+
+    def _on_error(self, name, context):
+        # A dropped connection takes the replica out of rotation now rather than at the next check
+        if context.is_disconnect:
+            self.status[name] = {'healthy': False, 'lag_seconds': None, 'error': str(context.original_exception)}
+
+    def sticky_to_primary(self):
+        """Whether the current request should read its own recent writes from the primary."""
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        user_id = _request_user_id()
+        return user_id is not None and self._sticky_users.get(user_id) is not None
+
+    def record_write(self, user_ids):
+        for user_id in user_ids:
+            self._sticky_users.set(user_id, True)
+        if has_request_context():
+            g.db_wrote = True
+
+    def _set_sticky_cookie(self, response):
+        if g.get('db_wrote'):
+            response.set_cookie(STICKY_COOKIE, str(int(time.time() + self.sticky_seconds)),
+                                max_age=int(self.sticky_seconds), httponly=True, samesite='Lax')
+        return response
+
+    def choose(self):
+        """Returns a healthy replica engine, or None to use the primary."""
+        self._ensure_monitor()
+        healthy = [name for name in self.replicas if self.status.get(name, {}).get('healthy')]
+        if not healthy:
+            self.routed['primary'] += 1
+            return None
+        self.routed['replica'] += 1
+        return self._engines[healthy[next(self._cycle) % len(healthy)]]
+
+    def stats(self):
+        return {'replicas': {name: dict(self.status.get(name, {})) for name in self.replicas},
+                'routed_reads': dict(self.routed), 'sticky_users': len(self._sticky_users)}
+
+    def collect_metrics(self):
+        return [
+            ('db_replica_healthy', 'gauge', 'Whether reads may use the replica (1) or it is out of rotation (0).',
+             [({'replica': name}, int(bool(self.status.get(name, {}).get('healthy')))) for name in self.replicas]),
+            ('db_replica_lag_seconds', 'gauge', 'Replication lag at the last health check.',
+             [({'replica': name}, self.status[name]['lag_seconds']) for name in self.replicas
+              if self.status.get(name, {}).get('lag_seconds') is not None])
+        ]
+
+
+def read_only(f):
+    """
+    Serves the view's SELECTs from a read replica, unless the caller wrote
+    recently (see ReplicaRouter). Writes the view makes still go to the
+    primary, and reads after them too.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        router = current_app.extensions.get('db_router')
+        if router is None or not router.enabled or router.sticky_to_primary():
+            return f(*args, **kwargs)
+        session = current_app.extensions['sqlalchemy'].session
+        session.info['read_only'] = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            session.info.pop('read_only', None)
+    return decorated
@@ -0,0 +1,15 @@
+# Kept free of the LLM client imports so that history and stats code can use it
+# without loading the groq SDK at startup.
+
+# Returned when the model's analysis can't be parsed; never cached
+ANALYSIS_FALLBACK_FEEDBACK = {
+    "strengths": [],
+    "improvements": ["Failed to analyze response due to formatting error."],
+    "score": 0,
+    "summary": "Could not generate feedback due to an internal error."
+}
+
+
+def is_fallback_feedback(feedback):
+    """Whether feedback is the placeholder for an unparseable analysis; its score of 0 is not a real score."""
+    return feedback == ANALYSIS_FALLBACK_FEEDBACK
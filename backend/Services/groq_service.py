@@ -1,26 +1,78 @@
+import asyncio
+import copy
+import hashlib
 import json
-import groq
+import logging
 import time
-import traceback
+
+from Services.feedback import ANALYSIS_FALLBACK_FEEDBACK, is_fallback_feedback
+from Services.json_repair import parse_llm_json
+from Services.json_stream import IncrementalJSONParser
+from Services.llm_pool import LLMClientPool
+from Services.metrics import LLM_CALL_DURATION, LLM_RETRIES, LLM_PARSE_FAILURES, LLM_PARSE_REPAIRS
+from Services.question_cache import make_cache_key
+from Services.token_budget import (UsageRecorder, estimate_tokens, question_count, question_max_tokens,
+                                   analysis_max_tokens, batch_analysis_max_tokens)
+
+# Supported models - prioritize larger models first if retrying
+MODELS_TO_TRY = ["llama3-70b-8192", "llama3-8b-8192", "gemma-7b-it"]
+QUESTION_SYSTEM_ROLE = "You are an expert interview question generator. Create insightful questions based on the job details provided. Ensure your output is strictly a valid JSON object following the specified structure, with no extra text or explanations."
+ANALYSIS_SYSTEM_ROLE = "You are an expert interview coach. Analyze the candidate's answer based on the question, context, and interviewer expectations. Provide constructive feedback formatted strictly as the requested JSON object, with no additional text."
+QUESTION_REQUIRED_FIELDS = ["id", "question", "importance", "tips", "interviewer_expectations", "complexity"]
+FEEDBACK_FIELDS = ["strengths", "improvements", "score", "summary"]
+
+logger = logging.getLogger(__name__)
 
 class GroqService:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None, pool=None, hedge_delay=None, feedback_cache=None,
+                 single_flight=None, usage=None):
         if not api_key:
             raise ValueError("Groq API key is required")
 
         self.api_key = api_key
-        # Ensure the client is initialized correctly
-        self.client = groq.Groq(api_key=self.api_key) # Use groq.Groq for newer versions
-
-    def MCP(self, role, prompt, token, model="llama3-70b-8192"):
+        self.cache = cache # Optional QuestionCache for generated question sets
+        self.feedback_cache = feedback_cache # Optional SemanticFeedbackCache for answer feedback
+        self.single_flight = single_flight # Optional SingleFlight shared by identical in-flight generations
+        self.usage = usage or UsageRecorder() # Tokens and latency per operation and model
+        # Seconds to wait on a model before hedging with the next fallback (None = sequential retries)
+        self.hedge_delay = hedge_delay
+        # All upstream calls go through the shared async client pool
+        self.pool = pool or LLMClientPool(api_key=self.api_key)
+        self.client = self.pool.client
+
+    def collect_metrics(self):
+        """Scrape-time metric families for token usage, pool load and cache effectiveness."""
+        usage = self.usage.stats()
+        families = [
+            ('llm_tokens_total', 'counter', 'LLM tokens by operation, model and kind (streamed calls are estimated).',
+             [({'operation': row['operation'], 'model': row['model'], 'kind': kind}, row[f'{kind}_tokens'])
+              for row in usage for kind in ('prompt', 'completion')]),
+            ('llm_calls_in_flight', 'gauge', 'LLM calls currently holding a model concurrency slot.',
+             [({'model': model}, count) for model, count in self.pool.stats()['in_flight'].items()])
+        ]
+        caches = [('question_cache', self.cache), ('feedback_cache', self.feedback_cache)]
+        families.append(('llm_cache_lookups_total', 'counter', 'Question set and feedback cache lookups by result.',
+                         [({'cache': name, 'result': result}, cache.stats()[result])
+                          for name, cache in caches if cache for result in ('hits', 'misses')]))
+        if self.single_flight:
+            stats = self.single_flight.stats()
+            families.append(('llm_coalesced_requests_total', 'counter', 'Generations served by another in-flight call.',
+                             [({'scope': 'process'}, stats['coalesced']),
+                              ({'scope': 'host'}, stats['coalesced_cross_process'])]))
+        return families
+
+    def MCP(self, role, prompt, token, model="llama3-70b-8192", operation="other"):
         """
         Makes a call to the Groq Chat Completion API.
 
+        Blocking wrapper around MCP_async; the call itself runs on the LLM pool's event loop.
+
         Args:
             role (str): The system message content (defines the AI's role).
             prompt (str): The user's prompt.
             token (int): The maximum number of tokens for the response.
             model (str): The model to use for the completion.
+            operation (str): Name the call's token usage and latency are recorded under.
 
         Returns:
             str: The content of the response message.
@@ -28,116 +80,510 @@ class GroqService:
         Raises:
             Exception: If the API call fails.
         """
+        return self.pool.run(self.MCP_async(role, prompt, token, model, operation))
+
+    async def MCP_async(self, role, prompt, token, model="llama3-70b-8192", operation="other"):
+        """
+        Async variant of MCP, awaited on the LLM pool's event loop.
+        """
         try:
-            print(f"--- Calling Groq MCP ---")
-            print(f"Model: {model}")
-            print(f"Role: {role}")
-            # print(f"Prompt: {prompt[:200]}...") # Optionally print truncated prompt
-            print(f"Max Tokens: {token}")
-            print(f"------------------------")
-
-            response = self.client.chat.completions.create(
+            logger.debug("Calling Groq MCP", extra={'model': model, 'operation': operation, 'max_tokens': token})
+
+            estimated_prompt_tokens = estimate_tokens(role) + estimate_tokens(prompt)
+            start = time.perf_counter()
+            try:
+                response = await self.pool.chat(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": role},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=token,
+                    temperature=0.5, # Keep temperature for controlled generation
+                    response_format={"type": "json_object"} # Ensure JSON output
+                )
+            except Exception:
+                latency = time.perf_counter() - start
+                LLM_CALL_DURATION.observe(latency, model=model, operation=operation, outcome='error')
+                self.usage.record(operation, model, latency,
+                                  estimated_prompt_tokens=estimated_prompt_tokens, failed=True)
+                raise
+
+            latency = time.perf_counter() - start
+            LLM_CALL_DURATION.observe(latency, model=model, operation=operation, outcome='ok')
+            usage = getattr(response, 'usage', None)
+            self.usage.record(
+                operation, model, latency,
+                prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                completion_tokens=getattr(usage, 'completion_tokens', None),
+                estimated_prompt_tokens=estimated_prompt_tokens
+            )
+
+            content = response.choices[0].message.content
+            logger.debug("Groq MCP response", extra={
+                'model': model, 'operation': operation, 'latency_seconds': round(latency, 3),
+                'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+                'completion_tokens': getattr(usage, 'completion_tokens', None)
+            })
+            return content
+
+        except Exception:
+            logger.exception("Error in MCP call", extra={'model': model, 'operation': operation})
+            raise # Re-raise the exception to be handled by the caller
+
+    def MCP_stream(self, role, prompt, token, model="llama3-70b-8192", operation="other"):
+        """
+        Streaming variant of MCP that yields the response content as it is generated.
+
+        JSON mode is not requested here; the prompts already ask for JSON only and
+        IncrementalJSONParser skips any text before the document starts.
+        Streamed responses carry no usage, so recorded token counts are estimates.
+
+        Yields:
+            str: Content deltas in the order they are received.
+        """
+        estimated_prompt_tokens = estimate_tokens(role) + estimate_tokens(prompt)
+        received = []
+        failed = False
+        start = time.perf_counter()
+        try:
+            logger.debug("Calling Groq MCP (stream)", extra={'model': model, 'operation': operation, 'max_tokens': token})
+
+            for delta in self.pool.iterate(self.pool.stream_chat(
                 model=model,
                 messages=[
                     {"role": "system", "content": role},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=token,
-                temperature=0.5, # Keep temperature for controlled generation
-                response_format={"type": "json_object"} # Ensure JSON output
+                temperature=0.5
+            )):
+                received.append(delta)
+                yield delta
+
+        except Exception:
+            failed = True
+            logger.exception("Error in MCP stream call", extra={'model': model, 'operation': operation})
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            LLM_CALL_DURATION.observe(latency, model=model, operation=operation, outcome='error' if failed else 'ok')
+            self.usage.record(
+                operation, model, latency,
+                prompt_tokens=estimated_prompt_tokens,
+                completion_tokens=estimate_tokens("".join(received)),
+                estimated_prompt_tokens=estimated_prompt_tokens,
+                estimated=True, failed=failed
             )
 
-            content = response.choices[0].message.content
-            print(f"--- Groq MCP Response ---")
-            # print(f"Content: {content[:200]}...") # Optionally print truncated content
-            print(f"-------------------------")
-            return content
-
-        except Exception as e:
-            print(f"Error in MCP call: {str(e)}")
-            traceback.print_exc() # Print full traceback for debugging
-            raise # Re-raise the exception to be handled by the caller
+    def validate_question(self, q, index):
+        """
+        Fills defaults for a single generated question.
+        Returns None if the item is not a question object.
+        """
+        if not isinstance(q, dict):
+            logger.warning("Question item %s is not a dictionary, skipping.", index)
+            return None
+        # Ensure ID is present and unique (or assign one)
+        q['id'] = q.get('id', index + 1)
+        for field in QUESTION_REQUIRED_FIELDS:
+            if field not in q or not q[field]:
+                 # Provide more specific defaults or handle as error
+                q[field] = q.get(field, f"Default value for {field}")
+        # Ensure complexity is set
+        q['complexity'] = q.get('complexity', 'medium')
+        return q
 
     def generate_interview_questions(self, job_data, user_profile=None, max_retries=2):
-        print(f"Starting question generation for {job_data.get('jobTitle')}, {job_data.get('interviewType')} interview")
-
-        # Supported models - prioritize larger models first if retrying
-        models_to_try = ["llama3-70b-8192", "llama3-8b-8192", "gemma-7b-it"]
-        system_role = "You are an expert interview question generator. Create insightful questions based on the job details provided. Ensure your output is strictly a valid JSON object following the specified structure, with no extra text or explanations."
+        logger.info("Starting question generation", extra={'job_title': job_data.get('jobTitle'),
+                                                            'interview_type': job_data.get('interviewType')})
+
+        # Serve from the question cache when enough sets exist for these inputs.
+        # Cache tiers may use the app's DB session, so they are only touched on the calling thread.
+        cache_key = make_cache_key(job_data, MODELS_TO_TRY[0]) if self.cache else None
+        if cache_key:
+            cached_questions = self.cache.get(cache_key)
+            if cached_questions:
+                logger.info("Serving cached question set", extra={'job_title': job_data.get('jobTitle')})
+                return copy.deepcopy(cached_questions)
+
+        def generate():
+            validated_questions = self.pool.run(
+                self.generate_interview_questions_async(job_data, user_profile, max_retries))
+            if cache_key:
+                self.cache.put(cache_key, copy.deepcopy(validated_questions))
+            return validated_questions
+
+        # Identical requests arriving while this one is in flight wait for its result
+        if self.single_flight:
+            return self.single_flight.do(self.flight_key(job_data, user_profile, max_retries), generate)
+        return generate()
+
+    def flight_key(self, job_data, user_profile=None, max_retries=2):
+        """Key for coalescing generations: the whitespace/case-normalized prompt plus the models it may use."""
+        normalized = {k: " ".join(v.split()) if isinstance(v, str) else v for k, v in job_data.items()}
+        prompt = " ".join(self.build_prompt(normalized, user_profile).lower().split())
+        payload = "\x1f".join([prompt] + MODELS_TO_TRY[:max_retries + 1])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def generate_interview_questions_async(self, job_data, user_profile=None, max_retries=2):
+        """
+        Generates and validates interview questions on the LLM pool's event loop,
+        retrying with fallback models and non-blocking backoff, or hedging across
+        them when a hedge delay is configured.
+        """
+        models_to_try = MODELS_TO_TRY[:max_retries + 1]
+        if self.hedge_delay is not None:
+            return await self._generate_hedged(job_data, user_profile, models_to_try)
 
+        last_error = None
         for retry_count in range(max_retries + 1):
             selected_model = models_to_try[min(retry_count, len(models_to_try)-1)]
-            print(f"Attempt {retry_count + 1}/{max_retries + 1}: Using model: {selected_model}")
+            logger.info("Question generation attempt %s/%s", retry_count + 1, max_retries + 1,
+                        extra={'model': selected_model})
+            if retry_count:
+                LLM_RETRIES.inc(model=selected_model, reason='retry')
 
             try:
-                # Use the build_prompt method to create the prompt
-                prompt = self.build_prompt(job_data, user_profile) # Pass user_profile if needed by build_prompt
-
-                # Call MCP with the defined role, prompt, token limit, and selected model
-                content = self.MCP(
-                    role=system_role,
-                    prompt=prompt,
-                    token=2000, # Adjust token limit as needed
-                    model=selected_model
-                )
+                return await self._generate_with_model(job_data, user_profile, selected_model)
+            except json.JSONDecodeError as json_e:
+                last_error = json_e
+                logger.warning("Attempt %s: Failed to parse JSON response: %s", retry_count + 1, json_e)
+            except Exception as e:
+                last_error = e
+                logger.exception("Attempt %s: Error in GroqService question generation", retry_count + 1)
+
+            # Wait before retrying only if it's not the last attempt
+            if retry_count < max_retries:
+                logger.info("Backing off before retry %s", retry_count + 2)
+                await self.pool.backoff(retry_count)
+            else:
+                logger.error("Failed to generate questions after %s attempts.", max_retries + 1)
+                # Return a default error structure or raise a more specific error
+                raise ValueError(f"Failed to generate questions after {max_retries + 1} attempts. Last error: {str(last_error)}")
 
-                # Strip potential leading/trailing whitespace before parsing
-                content = content.strip()
+    async def _generate_hedged(self, job_data, user_profile, models_to_try):
+        """
+        Hedged generation: starts the primary model and launches the next fallback
+        concurrently whenever the in-flight attempts exceed the hedge delay or one
+        of them fails validation. The first valid question set wins and the
+        remaining attempts are cancelled.
+        """
+        pending = set()
+        next_model = 0
+        last_error = None
+
+        def launch():
+            nonlocal next_model
+            model = models_to_try[next_model]
+            next_model += 1
+            logger.info("Hedged attempt %s/%s", next_model, len(models_to_try), extra={'model': model})
+            if next_model > 1:
+                LLM_RETRIES.inc(model=model, reason='hedge')
+            pending.add(asyncio.create_task(self._generate_with_model(job_data, user_profile, model)))
+
+        launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay if next_model < len(models_to_try) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info("No response within %ss, hedging with next model.", self.hedge_delay)
+                    launch()
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning("Hedged attempt failed: %s", last_error)
+
+                if next_model < len(models_to_try):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise ValueError(f"Failed to generate questions after {len(models_to_try)} hedged attempts. Last error: {str(last_error)}")
+
+    async def _generate_with_model(self, job_data, user_profile, model):
+        """
+        Runs a single generation attempt against one model and returns the
+        validated questions. Raises if the response is not valid.
+        """
+        # Use the build_prompt method to create the prompt
+        prompt = self.build_prompt(job_data, user_profile) # Pass user_profile if needed by build_prompt
 
-                # Parse and validate the JSON response
-                json_response = json.loads(content)
-                questions = json_response.get('questions', [])
+        # Call MCP with the defined role, prompt, token limit, and selected model
+        content = await self.MCP_async(
+            role=QUESTION_SYSTEM_ROLE,
+            prompt=prompt,
+            token=question_max_tokens(question_count(job_data)),
+            model=model,
+            operation="generate_questions"
+        )
 
-                if not questions or not isinstance(questions, list) or len(questions) == 0:
-                    raise ValueError("API returned invalid or empty questions array")
+        parsed = self._parse_response(content, model, "generate_questions")
+        validated_questions = self._salvage_questions(parsed)
 
-                # Basic validation and default filling (can be enhanced)
-                required_fields = ["id", "question", "importance", "tips", "interviewer_expectations", "complexity"]
-                validated_questions = []
-                for i, q in enumerate(questions):
-                    if not isinstance(q, dict):
-                        print(f"Warning: Question item {i} is not a dictionary, skipping.")
-                        continue
-                    # Ensure ID is present and unique (or assign one)
-                    q['id'] = q.get('id', i + 1)
-                    for field in required_fields:
-                        if field not in q or not q[field]:
-                             # Provide more specific defaults or handle as error
-                            q[field] = q.get(field, f"Default value for {field}")
-                    # Ensure complexity is set
-                    q['complexity'] = q.get('complexity', 'medium')
-                    validated_questions.append(q)
+        # A cut-off response keeps its complete questions; ask only for the rest
+        missing = question_count(job_data) - len(validated_questions)
+        if parsed.open_depth and missing > 0:
+            logger.info("Response was truncated, requesting the %s missing questions.", missing, extra={'model': model})
+            validated_questions += await self._generate_remainder(job_data, model, validated_questions, missing)
 
-                if not validated_questions:
-                     raise ValueError("No valid questions found after validation.")
+        if not validated_questions:
+             raise ValueError("No valid questions found after validation.")
 
-                print(f"Successfully generated {len(validated_questions)} questions.")
-                return validated_questions # Return the validated list
+        logger.info("Successfully generated %s questions.", len(validated_questions), extra={'model': model})
+        return validated_questions # Return the validated list
 
-            except json.JSONDecodeError as json_e:
-                print(f"Attempt {retry_count + 1}: Failed to parse JSON response: {str(json_e)}")
-                print(f"Raw content received: {content}") # Log raw content on JSON error
-                # traceback.print_exc() # Optional: print traceback for JSON errors
-            except Exception as e:
-                print(f"Attempt {retry_count + 1}: Error in GroqService question generation: {str(e)}")
-                traceback.print_exc() # Print traceback for other errors
 
-            # Wait before retrying only if it's not the last attempt
-            if retry_count < max_retries:
-                wait_time = 2 * (retry_count + 1) # Exponential backoff (simple version)
-                print(f"Waiting {wait_time} seconds before retrying...")
-                time.sleep(wait_time)
-            else:
-                print(f"Failed to generate questions after {max_retries + 1} attempts.")
-                # Return a default error structure or raise a more specific error
-                raise ValueError(f"Failed to generate questions after {max_retries + 1} attempts. Last error: {str(e)}")
+    def _parse_response(self, content, model, operation):
+        """
+        Parses model output with repair (see json_repair). Raises
+        json.JSONDecodeError if it can't be repaired.
+        """
+        try:
+            parsed = parse_llm_json(content)
+        except json.JSONDecodeError:
+            LLM_PARSE_FAILURES.inc(model=model, operation=operation)
+            logger.warning("Unparseable content received", extra={'model': model, 'operation': operation,
+                                                                  'content': content})
+            raise
+        if parsed.repaired:
+            LLM_PARSE_REPAIRS.inc(model=model, operation=operation,
+                                  outcome='truncated' if parsed.open_depth else 'repaired')
+        return parsed
+
+    def _salvage_questions(self, parsed, offset=0):
+        """
+        Validated questions from a parsed generation response. A question
+        object that was cut off mid-way is dropped rather than padded with defaults.
+        """
+        value = parsed.value
+        questions = value.get('questions', []) if isinstance(value, dict) else value
+        if not isinstance(questions, list):
+            raise ValueError("API returned invalid or empty questions array")
+        # Depth of a question object: inside {"questions": [...]}, or a bare array
+        if parsed.open_depth >= (3 if isinstance(value, dict) else 2):
+            questions = questions[:-1]
+
+        validated_questions = []
+        for q in questions:
+            q = self.validate_question(q, offset + len(validated_questions))
+            if q is not None:
+                validated_questions.append(q)
+        return validated_questions
+
+    async def _generate_remainder(self, job_data, model, questions, missing):
+        """
+        Generates only the `missing` questions a truncated response didn't
+        deliver, numbered after the ones already salvaged.
+        """
+        content = await self.MCP_async(
+            role=QUESTION_SYSTEM_ROLE,
+            prompt=self.build_remainder_prompt(job_data, questions, missing),
+            token=question_max_tokens(missing),
+            model=model,
+            operation="generate_questions_remainder"
+        )
+        parsed = self._parse_response(content, model, "generate_questions_remainder")
+        remainder = self._salvage_questions(parsed, offset=len(questions))[:missing]
+        for i, q in enumerate(remainder, start=len(questions) + 1):
+            q['id'] = i
+        return remainder
 
 
     def analyze_interview_response(self, question, answer, job_context):
         """
         Analyze an interview answer and provide feedback using MCP.
+
+        When a semantic feedback cache is configured, feedback stored for a
+        near-identical answer to the same question is returned instead.
+        """
+        if self.feedback_cache:
+            cached_feedback, similarity = self.feedback_cache.lookup(question, answer, job_context)
+            if cached_feedback:
+                logger.info("Serving cached feedback", extra={'similarity': round(similarity, 3)})
+                return cached_feedback
+
+        feedback = self.pool.run(self.analyze_interview_response_async(question, answer, job_context))
+
+        if self.feedback_cache and not is_fallback_feedback(feedback):
+            self.feedback_cache.put(question, answer, job_context, feedback)
+        return feedback
+
+    async def analyze_interview_response_async(self, question, answer, job_context):
+        """
+        Async variant of analyze_interview_response, awaited on the LLM pool's event loop.
+        """
+        system_role = ANALYSIS_SYSTEM_ROLE
+        prompt = self.build_analysis_prompt(question, answer, job_context)
+        content = None
+        try:
+            # Call MCP for analysis
+            content = await self.MCP_async(
+                role=system_role,
+                prompt=prompt,
+                token=analysis_max_tokens(),
+                model="llama3-70b-8192", # Or choose another appropriate model
+                operation="analyze_response"
+            )
+
+            # Parse the JSON response, repairing minor defects
+            parsed = self._parse_response(content, "llama3-70b-8192", "analyze_response")
+            feedback = parsed.value
+            if parsed.open_depth and not (isinstance(feedback, dict) and all(k in feedback for k in FEEDBACK_FIELDS)):
+                # Cut off before every field arrived; nothing usable to salvage
+                LLM_PARSE_FAILURES.inc(model="llama3-70b-8192", operation='analyze_response')
+                raise json.JSONDecodeError("Truncated analysis response", content, len(content))
+
+            # Basic validation (optional but recommended)
+            if not all(k in feedback for k in FEEDBACK_FIELDS):
+                 raise ValueError("Analysis response missing required keys.")
+            if not isinstance(feedback["score"], int):
+                 raise ValueError("Analysis score is not an integer.")
+
+            logger.info("Successfully analyzed response.")
+            return feedback
+
+        except json.JSONDecodeError as json_e:
+            logger.warning("Error decoding analysis JSON: %s", json_e, extra={'content': content})
+            # Provide a default error feedback structure
+            return copy.deepcopy(ANALYSIS_FALLBACK_FEEDBACK)
+        except Exception:
+            logger.exception("Error generating feedback")
+            # Provide a default error feedback structure or re-raise
+            raise # Re-raise the exception for the caller to handle
+
+
+    def analyze_interview_batch(self, items, job_context, mode="packed", concurrency=4):
+        """
+        Analyze all answers of an interview in one pass.
+
+        Args:
+            items (list): Dicts with 'question' (question object) and 'answer' (str).
+            job_context (dict): Shared job context (jobTitle, interviewType, ...).
+            mode (str): 'packed' sends every answer in a single structured prompt;
+                'concurrent' analyzes each answer separately, at most `concurrency` at a time.
+            concurrency (int): Concurrent calls for 'concurrent' mode and for packed-mode gaps.
+
+        Returns:
+            dict: {'results': [{'index', 'feedback'}, ...], 'aggregate': {...}}
+        """
+        return self.pool.run(self.analyze_interview_batch_async(items, job_context, mode, concurrency))
+
+    async def analyze_interview_batch_async(self, items, job_context, mode="packed", concurrency=4):
+        feedbacks = [None] * len(items)
+        overall_summary = None
+
+        if mode == "packed":
+            try:
+                content = await self.MCP_async(
+                    role=ANALYSIS_SYSTEM_ROLE,
+                    prompt=self.build_batch_analysis_prompt(items, job_context),
+                    token=batch_analysis_max_tokens(len(items)),
+                    model="llama3-70b-8192",
+                    operation="analyze_batch"
+                )
+                parsed = self._parse_response(content, "llama3-70b-8192", "analyze_batch")
+                packed = parsed.value
+                results = packed.get('results', [])
+                if parsed.open_depth >= 3:
+                    results = results[:-1] # The last entry was cut off
+                for entry in results:
+                    index = entry.get('index') if isinstance(entry, dict) else None
+                    if not isinstance(index, int) or not 0 <= index < len(items):
+                        continue
+                    if all(k in entry for k in FEEDBACK_FIELDS) and isinstance(entry['score'], int):
+                        feedbacks[index] = {k: entry[k] for k in FEEDBACK_FIELDS}
+                overall_summary = packed.get('overall_summary')
+            except Exception as e:
+                logger.warning("Packed batch analysis failed, analyzing answers individually: %s", e)
+
+        # Concurrent mode, or answers the packed response left out or got wrong
+        missing = [i for i, feedback in enumerate(feedbacks) if feedback is None]
+        if missing:
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+
+            async def analyze_one(index):
+                async with semaphore:
+                    feedbacks[index] = await self.analyze_interview_response_async(
+                        items[index]['question'], items[index]['answer'], job_context)
+
+            await asyncio.gather(*(analyze_one(i) for i in missing))
+
+        # Placeholders for answers whose analysis failed have no real score
+        scores = [feedback['score'] for feedback in feedbacks
+                  if isinstance(feedback.get('score'), int) and not is_fallback_feedback(feedback)]
+        logger.info("Successfully analyzed batch of %s responses (%s).", len(items), mode)
+        return {
+            'results': [{'index': i, 'feedback': feedback} for i, feedback in enumerate(feedbacks)],
+            'aggregate': {
+                'score': round(sum(scores) / len(scores)) if scores else 0,
+                'answered': len(items),
+                'summary': overall_summary
+            }
+        }
+
+    def stream_interview_questions(self, job_data, user_profile=None):
+        """
+        Generates interview questions, yielding each validated question as soon as
+        its JSON object is complete in the model output.
+
+        Yields:
+            dict: Validated question objects.
+        """
+        model = MODELS_TO_TRY[0]
+        cache_key = make_cache_key(job_data, model) if self.cache else None
+        if cache_key:
+            cached_questions = self.cache.get(cache_key)
+            if cached_questions:
+                logger.info("Serving cached question set", extra={'job_title': job_data.get('jobTitle')})
+                for q in copy.deepcopy(cached_questions):
+                    yield q
+                return
+
+        parser = IncrementalJSONParser(emit_depth=2)
+        validated_questions = []
+        prompt = self.build_prompt(job_data, user_profile)
+        token = question_max_tokens(question_count(job_data))
+        for delta in self.MCP_stream(QUESTION_SYSTEM_ROLE, prompt, token, model, operation="stream_questions"):
+            for path, value in parser.feed(delta):
+                if path[0] != 'questions':
+                    continue
+                q = self.validate_question(value, len(validated_questions))
+                if q is not None:
+                    validated_questions.append(q)
+                    yield q
+
+        if not validated_questions:
+            raise ValueError("No valid questions found in streamed response.")
+        if cache_key:
+            self.cache.put(cache_key, copy.deepcopy(validated_questions))
+
+    def stream_interview_analysis(self, question, answer, job_context):
+        """
+        Analyzes an interview answer, yielding each feedback field as soon as its
+        value is complete in the model output.
+
+        Yields:
+            tuple: (field_name, value) for strengths, improvements, score and summary.
+        """
+        parser = IncrementalJSONParser(emit_depth=1)
+        prompt = self.build_analysis_prompt(question, answer, job_context)
+        for delta in self.MCP_stream(ANALYSIS_SYSTEM_ROLE, prompt, analysis_max_tokens(), "llama3-70b-8192",
+                                     operation="stream_analysis"):
+            for path, value in parser.feed(delta):
+                if path[0] in FEEDBACK_FIELDS:
+                    yield path[0], value
+
+    def build_analysis_prompt(self, question, answer, job_context):
+        """
+        Builds the prompt for analyzing a single interview answer.
         """
-        system_role = "You are an expert interview coach. Analyze the candidate's answer based on the question, context, and interviewer expectations. Provide constructive feedback formatted strictly as the requested JSON object, with no additional text."
         prompt = f"""
 Analyze this interview response for the following question:
 
@@ -163,104 +609,71 @@ Format your response strictly as a JSON object with NO extra text before or afte
 }}
 Ensure the JSON is valid. Strings must be enclosed in double quotes.
 """
-        try:
-            # Call MCP for analysis
-            content = self.MCP(
-                role=system_role,
-                prompt=prompt,
-                token=1000, # Adjust token limit as needed for feedback
-                model="llama3-70b-8192" # Or choose another appropriate model
-            )
-
-            # Parse the JSON response
-            feedback = json.loads(content.strip())
-
-            # Basic validation (optional but recommended)
-            if not all(k in feedback for k in ["strengths", "improvements", "score", "summary"]):
-                 raise ValueError("Analysis response missing required keys.")
-            if not isinstance(feedback["score"], int):
-                 raise ValueError("Analysis score is not an integer.")
+        return prompt
 
-            print("Successfully analyzed response.")
-            return feedback
+    def build_batch_analysis_prompt(self, items, job_context):
+        """
+        Builds a single prompt that analyzes every answer of an interview.
+        The job context and output schema are stated once for all answers.
+        """
+        answers = "\n".join(
+            f"""
+[{i}] Question: {item['question'].get('question', 'N/A')}
+What the interviewer is looking for: {item['question'].get('interviewer_expectations', 'N/A')}
+Candidate's answer:
+{item['answer']}
+""" for i, item in enumerate(items))
 
-        except json.JSONDecodeError as json_e:
-            print(f"Error decoding analysis JSON: {str(json_e)}")
-            print(f"Raw content received: {content}")
-            # Provide a default error feedback structure
-            return {
-                "strengths": [],
-                "improvements": ["Failed to analyze response due to formatting error."],
-                "score": 0,
-                "summary": "Could not generate feedback due to an internal error."
-            }
-        except Exception as e:
-            print(f"Error generating feedback: {str(e)}")
-            traceback.print_exc()
-            # Provide a default error feedback structure or re-raise
-            raise # Re-raise the exception for the caller to handle
+        prompt = f"""
+Analyze the following {len(items)} interview responses.
+Context: This is for a {job_context.get('jobTitle', 'professional')} position, {job_context.get('interviewType', 'general')} interview.
+{answers}
+For EACH response provide constructive feedback including:
+1. Exactly 3 specific strengths of the answer (or fewer if not applicable, but aim for 3).
+2. Exactly 3 specific areas for improvement (or fewer if not applicable, but aim for 3).
+3. A score from 0-100, reflecting the quality of the answer in the given context.
+4. A concise summary paragraph (2-4 sentences) with an overall assessment and key advice.
+Also provide an overall_summary (2-4 sentences) of the whole interview.
 
+Format your response strictly as a JSON object with NO extra text before or after the JSON,
+with one entry in "results" per response, using the bracketed number as "index":
+{{
+  "results": [
+    {{"index": 0, "strengths": ["..."], "improvements": ["..."], "score": <integer_score>, "summary": "..."}}
+  ],
+  "overall_summary": "Overall assessment of the interview."
+}}
+Ensure the JSON is valid. Strings must be enclosed in double quotes.
+"""
+        return prompt
 
     def build_prompt(self, job_data, user_profile=None):
         """
         Builds the prompt for generating interview questions.
+        The question schema is described once rather than repeated per question.
         (user_profile is currently unused but kept for potential future use)
         """
-        # Constructing the prompt with clear instructions for JSON structure
+        count = question_count(job_data)
         prompt = f"""
-Generate exactly 5 interview questions tailored for a candidate applying for the role of '{job_data.get('jobTitle', 'a professional')}'
+Generate exactly {count} interview questions tailored for a candidate applying for the role of '{job_data.get('jobTitle', 'a professional')}'
 in the '{job_data.get('companyIndustry', 'relevant')}' industry.
 The interview type is '{job_data.get('interviewType', 'general')}'.
 
-Return ONLY a valid JSON object (no introductory text, no explanations, just the JSON) with the following exact structure:
-{{
-  "questions": [
-    {{
-      "id": 1,
-      "question": "The text of the first interview question.",
-      "importance": "Explain why this question is relevant for the role/interview type.",
-      "tips": "Provide actionable tips for the candidate on how to approach answering this question.",
-      "interviewer_expectations": "Describe what qualities or information the interviewer is looking for in the answer.",
-      "complexity": "Estimate the complexity (e.g., 'low', 'medium', 'high')."
-    }},
-    {{
-      "id": 2,
-      "question": "The text of the second interview question.",
-      "importance": "...",
-      "tips": "...",
-      "interviewer_expectations": "...",
-      "complexity": "..."
-    }},
-    {{
-      "id": 3,
-      "question": "The text of the third interview question.",
-      "importance": "...",
-      "tips": "...",
-      "interviewer_expectations": "...",
-      "complexity": "..."
-    }},
-    {{
-      "id": 4,
-      "question": "The text of the fourth interview question.",
-      "importance": "...",
-      "tips": "...",
-      "interviewer_expectations": "...",
-      "complexity": "..."
-    }},
-    {{
-      "id": 5,
-      "question": "The text of the fifth interview question.",
-      "importance": "...",
-      "tips": "...",
-      "interviewer_expectations": "...",
-      "complexity": "..."
-    }}
-  ]
-}}
+Return ONLY a JSON object {{"questions": [...]}} with exactly {count} items, each of the form:
+{{"id": <1-based number>, "question": "<question text>", "importance": "<why it is relevant for the role/interview type>", "tips": "<actionable tips for answering>", "interviewer_expectations": "<qualities or information the interviewer looks for>", "complexity": "low|medium|high"}}
+Use double quotes for keys and strings, no trailing commas and no text outside the JSON.
+"""
+        return prompt
 
-Ensure the JSON is strictly valid:
-- Keys and string values must be enclosed in double quotes.
-- No trailing commas are allowed.
-- The output must start with `{{` and end with `}}`.
+    def build_remainder_prompt(self, job_data, questions, missing):
+        """
+        Builds the prompt for the questions a truncated response left out,
+        listing the ones already generated so they aren't repeated.
+        """
+        existing = "\n".join(f"- {q.get('question')}" for q in questions)
+        prompt = self.build_prompt(dict(job_data, questionCount=missing))
+        if existing:
+            prompt += f"""These questions were already asked; do not repeat or rephrase them:
+{existing}
 """
-        return prompt
\ No newline at end of file
+        return prompt
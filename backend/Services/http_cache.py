@@ -0,0 +1,128 @@
+import logging
+import time
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, request
+
+from utils import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when a cached view's JSON shape changes, so clients drop copies validated by the old ETags
+ETAG_VERSION = 1
+
+
+def _as_utc(value):
+    # SQLite hands back naive datetimes; they were written as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class ResponseCache:
+    """
+    Conditional GET support for per-user JSON views that clients poll
+    (profile, dashboard), plus a small in-process cache of their bodies.
+
+    A view decorated with @response_cache.conditional(kind, last_modified)
+    first runs last_modified(user_id), a cheap query for the newest
+    updated_at behind the response. Its ETag and Last-Modified are derived
+    from that timestamp, so a client whose copy is current gets a 304
+    without the view running at all. Otherwise a cached body with the same
+    ETag is reused, and only when that misses does the view load and
+    serialize the rows.
+
+    Cached bodies are keyed by (kind, user_id) and only served while their
+    ETag still matches, so a write seen by another worker process can't
+    serve stale data; update_user_profile also drops the user's entries
+    here to free them early. Entries expire after RESPONSE_CACHE_TTL_SECONDS.
+    """
+    def __init__(self, app=None):
+        self.enabled = True
+        self.cache = LRUCache(max_entries=2048)
+        self.counts = {'not_modified': 0, 'cached': 0, 'rendered': 0}
+        self.kinds = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.cache = LRUCache(max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 2048),
+                              ttl=app.config.get('RESPONSE_CACHE_TTL_SECONDS', 300))
+        app.extensions['response_cache'] = self
+
+    def invalidate(self, user_id):
+        """Drops every cached response for user_id."""
+        for kind in self.kinds:
+            self.cache.delete((kind, user_id))
+
+    def conditional(self, kind, last_modified, cache_control, refresh_seconds=None):
+        """
+        Adds ETag/Last-Modified validation and body caching to a GET view
+        taking a user_id argument.
+
+        Args:
+            kind: Name of the response, part of the cache key and ETag.
+            last_modified: Callable(user_id) returning the newest updated_at
+                behind the response, or None if the user doesn't exist (the
+                view then runs and returns its 404).
+            cache_control: Config key holding the Cache-Control header value.
+            refresh_seconds: Config key for responses that also depend on data
+                without a timestamp (e.g. industry-wide skill counts); their
+                ETag additionally changes every that many seconds.
+        """
+        self.kinds.add(kind)
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(user_id, *args, **kwargs):
+                if not self.enabled:
+                    return f(user_id, *args, **kwargs)
+                modified = last_modified(user_id)
+                if modified is None:
+                    return f(user_id, *args, **kwargs)
+                modified = _as_utc(modified)
+                etag = f'{kind}-{ETAG_VERSION}-{int(modified.timestamp() * 1000000):x}'
+                refresh = current_app.config.get(refresh_seconds) if refresh_seconds else None
+                if refresh:
+                    etag += f'-{int(time.time() // refresh):x}'
+
+                if self._client_is_current(etag, modified, refresh):
+                    self.counts['not_modified'] += 1
+                    response = current_app.response_class(status=304)
+                else:
+                    key = (kind, user_id)
+                    cached = self.cache.get(key)
+                    if cached is not None and cached[0] == etag:
+                        self.counts['cached'] += 1
+                        response = current_app.response_class(cached[1], mimetype='application/json')
+                    else:
+                        response = current_app.make_response(f(user_id, *args, **kwargs))
+                        if response.status_code != 200:
+                            return response
+                        self.counts['rendered'] += 1
+                        self.cache.set(key, (etag, response.get_data()))
+                response.set_etag(etag, weak=True) # Weak: compression changes the bytes, not the content
+                response.last_modified = modified
+                response.headers['Cache-Control'] = current_app.config[cache_control]
+                return response
+            return decorated
+        return decorator
+
+    def _client_is_current(self, etag, modified, refresh):
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(etag)
+        # Last-Modified has whole-second resolution and can't express refresh windows
+        since = request.if_modified_since
+        return not refresh and since is not None and int(modified.timestamp()) <= int(since.timestamp())
+
+    def stats(self):
+        return dict(self.cache.stats(), **self.counts)
+
+    def collect_metrics(self):
+        return [
+            ('http_conditional_responses_total', 'counter',
+             'Polled GETs answered with 304 (not_modified), a cached body (cached) or by running the view (rendered).',
+             [({'outcome': outcome}, count) for outcome, count in self.counts.items()]),
+            ('http_response_cache_entries', 'gauge', 'Response bodies held in the in-process cache.',
+             [({}, len(self.cache))])
+        ]
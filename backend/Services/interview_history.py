@@ -0,0 +1,161 @@
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from extensions import db
+from Services import dashboard_stats
+from Services.feedback import is_fallback_feedback
+from models import InterviewSession, InterviewQuestion, InterviewAnswer, AnswerFeedbackItem
+
+FEEDBACK_TEXT_MAX_LENGTH = 500
+
+
+def create_session(user_id, job_data, questions):
+    """Persists a new interview session and its generated questions."""
+    session = InterviewSession(
+        user_id=user_id,
+        job_title=job_data.get('jobTitle'),
+        company_industry=job_data.get('companyIndustry'),
+        interview_type=job_data.get('interviewType')
+    )
+    for position, question in enumerate(questions):
+        session.questions.append(InterviewQuestion(
+            position=position,
+            question_text=question.get('question', ''),
+            payload=json.dumps(question)
+        ))
+    db.session.add(session)
+    db.session.flush()
+    dashboard_stats.record_session_started(session)
+    db.session.commit()
+    return session
+
+
+def get_user_session(session_id, user_id):
+    """Returns the session if it exists and belongs to user_id, otherwise None."""
+    try:
+        session_id = int(session_id)
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return InterviewSession.query.filter_by(session_id=session_id, user_id=user_id).first()
+
+
+def record_answer(session, question_index, answer_text, feedback, duration_seconds=None):
+    """
+    Stores an analyzed answer with its score and feedback items.
+    Marks the session completed once every question has an answer.
+
+    Placeholder feedback for a failed analysis still counts the answer, but
+    without a score or feedback items, so it doesn't skew averages.
+
+    Returns:
+        tuple: (InterviewAnswer, is_complete)
+    """
+    failed = is_fallback_feedback(feedback)
+    answer = InterviewAnswer(
+        session_id=session.session_id,
+        user_id=session.user_id,
+        question_position=int(question_index),
+        answer_text=answer_text,
+        score=feedback.get('score') if isinstance(feedback.get('score'), int) and not failed else None,
+        summary=feedback.get('summary'),
+        duration_seconds=duration_seconds
+    )
+    for kind, key in (('strength', 'strengths'), ('improvement', 'improvements')):
+        for text in [] if failed else feedback.get(key) or []:
+            if isinstance(text, str) and text.strip():
+                answer.feedback_items.append(AnswerFeedbackItem(
+                    user_id=session.user_id,
+                    kind=kind,
+                    text=text.strip()[:FEEDBACK_TEXT_MAX_LENGTH]
+                ))
+    db.session.add(answer)
+    db.session.flush()
+
+    is_complete = session.status == 'completed'
+    completed_now = False
+    if not is_complete:
+        question_count = InterviewQuestion.query.filter_by(session_id=session.session_id).count()
+        answered_count = (db.session.query(func.count(func.distinct(InterviewAnswer.question_position)))
+                          .filter(InterviewAnswer.session_id == session.session_id)
+                          .scalar())
+        if question_count and answered_count >= question_count:
+            session.status = 'completed'
+            session.completed_at = datetime.now(timezone.utc)
+            is_complete = completed_now = True
+
+    dashboard_stats.record_answer(session, answer, completed_now)
+    db.session.commit()
+    return answer, is_complete
+
+
+def get_performance_summary(user_id):
+    """Aggregates a user's totals in the database rather than loading every answer."""
+    total_interviews = (db.session.query(func.count(InterviewSession.session_id))
+                        .filter(InterviewSession.user_id == user_id, InterviewSession.status == 'completed')
+                        .scalar())
+    avg_score, total_seconds = (db.session.query(func.avg(InterviewAnswer.score),
+                                                 func.coalesce(func.sum(InterviewAnswer.duration_seconds), 0))
+                                .filter(InterviewAnswer.user_id == user_id)
+                                .one())
+    return {
+        'total_interviews': total_interviews or 0,
+        'avg_score': round(float(avg_score)) if avg_score is not None else 0,
+        'total_practice_time': int(total_seconds or 0)
+    }
+
+
+def get_session_history(user_id, limit=20, before_session_id=None):
+    """
+    Per-session scores for a user, newest first, using keyset pagination on
+    session_id. Each row also carries a moving average of the last five
+    session scores, computed with a window function.
+    """
+    per_session = (db.session.query(
+                        InterviewSession.session_id.label('session_id'),
+                        InterviewSession.job_title.label('job_title'),
+                        InterviewSession.interview_type.label('interview_type'),
+                        InterviewSession.status.label('status'),
+                        InterviewSession.created_at.label('created_at'),
+                        func.avg(InterviewAnswer.score).label('avg_score'),
+                        func.count(InterviewAnswer.answer_id).label('answers'),
+                        func.coalesce(func.sum(InterviewAnswer.duration_seconds), 0).label('practice_seconds'))
+                   .outerjoin(InterviewAnswer, InterviewAnswer.session_id == InterviewSession.session_id)
+                   .filter(InterviewSession.user_id == user_id)
+                   .group_by(InterviewSession.session_id)
+                   .subquery())
+
+    moving_avg = func.avg(per_session.c.avg_score).over(
+        order_by=per_session.c.session_id, rows=(-4, 0)).label('moving_avg_score')
+    windowed = db.session.query(per_session, moving_avg).subquery()
+
+    query = db.session.query(windowed)
+    if before_session_id is not None:
+        query = query.filter(windowed.c.session_id < before_session_id)
+    rows = query.order_by(windowed.c.session_id.desc()).limit(limit).all()
+
+    return [{
+        'session_id': row.session_id,
+        'job_title': row.job_title,
+        'interview_type': row.interview_type,
+        'status': row.status,
+        'date': row.created_at.isoformat() if row.created_at else None,
+        'score': round(float(row.avg_score)) if row.avg_score is not None else None,
+        'moving_avg_score': round(float(row.moving_avg_score)) if row.moving_avg_score is not None else None,
+        'answers': row.answers,
+        'practice_seconds': int(row.practice_seconds or 0)
+    } for row in rows]
+
+
+def get_common_feedback(user_id, kind, limit=5):
+    """Most frequent strengths or improvements for a user, counted with GROUP BY."""
+    occurrences = func.count(AnswerFeedbackItem.item_id)
+    rows = (db.session.query(AnswerFeedbackItem.text, occurrences)
+            .filter(AnswerFeedbackItem.user_id == user_id, AnswerFeedbackItem.kind == kind)
+            .group_by(AnswerFeedbackItem.text)
+            .order_by(occurrences.desc(), AnswerFeedbackItem.text)
+            .limit(limit)
+            .all())
+    return [text for text, _ in rows]
@@ -0,0 +1,233 @@
+import logging
+import secrets
+import socket
+import os
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import func
+
+from extensions import db
+from models import LLMJob
+
+logger = logging.getLogger(__name__)
+
+# kind -> function(payload) returning the JSON result; registered by the modules that own the work
+_handlers = {}
+
+
+def register_handler(kind, fn):
+    _handlers[kind] = fn
+
+
+def enqueue(kind, payload, user_id=None, priority=0, max_attempts=3):
+    """Persists a queued job and returns it. Commits the session."""
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    job = LLMJob(job_key=secrets.token_urlsafe(24)[:32], kind=kind, payload=payload, user_id=user_id,
+                 priority=priority, max_attempts=max_attempts)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get_job(job_key):
+    return db.session.query(LLMJob).filter(LLMJob.job_key == job_key).first()
+
+
+def claim_jobs(worker_id, limit=1):
+    """
+    Claims up to `limit` runnable jobs for this worker, highest priority first.
+
+    Candidates are read with FOR UPDATE SKIP LOCKED (Postgres), so concurrent
+    workers pick different rows instead of queueing on each other's locks;
+    the conditional UPDATE makes the claim safe on databases without it too.
+    """
+    now = datetime.now(timezone.utc)
+    candidates = (db.session.query(LLMJob.job_id)
+                  .filter(LLMJob.status == 'queued', LLMJob.run_after <= now)
+                  .order_by(LLMJob.priority.desc(), LLMJob.job_id)
+                  .limit(limit)
+                  .with_for_update(skip_locked=True)
+                  .all())
+    claimed = []
+    for (job_id,) in candidates:
+        updated = (db.session.query(LLMJob)
+                   .filter(LLMJob.job_id == job_id, LLMJob.status == 'queued')
+                   .update({'status': 'running', 'locked_by': worker_id, 'locked_at': now,
+                            'attempts': LLMJob.attempts + 1}, synchronize_session=False))
+        if updated:
+            claimed.append(job_id)
+    db.session.commit()
+    if not claimed:
+        return []
+    return db.session.query(LLMJob).filter(LLMJob.job_id.in_(claimed)).order_by(LLMJob.priority.desc(), LLMJob.job_id).all()
+
+
+def run_job(job, retry_backoff=5.0):
+    """Runs a claimed job's handler and records the result, or schedules a retry / marks it failed."""
+    handler = _handlers.get(job.kind)
+    started = time.monotonic()
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'")
+        result = handler(job.payload)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(LLMJob, job.job_id)
+        job.error = str(e)
+        job.locked_by = None
+        if job.attempts < job.max_attempts and handler is not None:
+            job.status = 'queued'
+            job.run_after = datetime.now(timezone.utc) + timedelta(seconds=retry_backoff * 2 ** (job.attempts - 1))
+            logger.warning("Job failed, retrying", extra={'job_id': job.job_id, 'kind': job.kind,
+                                                         'attempts': job.attempts, 'error': str(e)})
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.now(timezone.utc)
+            logger.error("Job failed", extra={'job_id': job.job_id, 'kind': job.kind,
+                                              'attempts': job.attempts, 'error': str(e)})
+        db.session.commit()
+        return False
+
+    job.status = 'succeeded'
+    job.result = result
+    job.error = None
+    job.locked_by = None
+    job.finished_at = datetime.now(timezone.utc)
+    db.session.commit()
+    logger.info("Job succeeded", extra={'job_id': job.job_id, 'kind': job.kind,
+                                        'duration_seconds': round(time.monotonic() - started, 3)})
+    return True
+
+
+def heartbeat(worker_id):
+    """Refreshes locked_at on the jobs this worker process is running, so they aren't taken for stale."""
+    touched = (db.session.query(LLMJob)
+               .filter(LLMJob.status == 'running', LLMJob.locked_by.like(f'{worker_id}:%'))
+               .update({'locked_at': datetime.now(timezone.utc)}, synchronize_session=False))
+    db.session.commit()
+    return touched
+
+
+def requeue_stale(timeout_seconds):
+    """
+    Puts jobs back in the queue whose worker stopped (crashed or was killed)
+    mid-run, i.e. hasn't heartbeaten for timeout_seconds. Jobs that already
+    used their last attempt are marked failed instead, so a job that keeps
+    killing its worker isn't retried forever.
+
+    Returns:
+        tuple: (requeued, failed)
+    """
+    now = datetime.now(timezone.utc)
+    stale = (LLMJob.status == 'running', LLMJob.locked_at < now - timedelta(seconds=timeout_seconds))
+    failed = (db.session.query(LLMJob)
+              .filter(*stale, LLMJob.attempts >= LLMJob.max_attempts)
+              .update({'status': 'failed', 'locked_by': None, 'finished_at': now,
+                       'error': 'Worker stopped while running the final attempt'}, synchronize_session=False))
+    requeued = (db.session.query(LLMJob)
+                .filter(*stale)
+                .update({'status': 'queued', 'locked_by': None}, synchronize_session=False))
+    db.session.commit()
+    if failed:
+        logger.error("Stale jobs out of attempts marked failed", extra={'failed': failed})
+    return requeued, failed
+
+
+def prune(retention_seconds):
+    """Deletes finished jobs older than the retention window."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)
+    deleted = (db.session.query(LLMJob)
+               .filter(LLMJob.status.in_(('succeeded', 'failed')), LLMJob.finished_at < cutoff)
+               .delete(synchronize_session=False))
+    db.session.commit()
+    return deleted
+
+
+def collect_metrics():
+    """Scrape-time queue depth (one grouped COUNT over unfinished jobs)."""
+    rows = (db.session.query(LLMJob.kind, LLMJob.status, func.count(LLMJob.job_id))
+            .filter(LLMJob.status.in_(('queued', 'running')))
+            .group_by(LLMJob.kind, LLMJob.status)
+            .all())
+    return [('llm_jobs', 'gauge', 'Unfinished LLM jobs by kind and status.',
+             [({'kind': kind, 'status': status}, count) for kind, status, count in rows])]
+
+
+class JobWorker:
+    """
+    Claims and runs jobs in a loop on `concurrency` threads, each with its own
+    app context and DB session. One thread also requeues stale jobs and
+    prunes old ones every maintenance_interval seconds.
+
+    A heartbeat thread refreshes locked_at on this process's running jobs
+    every heartbeat_interval seconds, so a job is only taken for stale once
+    its process has stopped, however long its LLM calls take.
+    stale_after should be several heartbeat intervals.
+    """
+    def __init__(self, app, concurrency=1, poll_interval=1.0, stale_after=120, retention_seconds=7 * 24 * 3600,
+                 retry_backoff=5.0, maintenance_interval=60, heartbeat_interval=15):
+        self.app = app
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.retention_seconds = retention_seconds
+        self.retry_backoff = retry_backoff
+        self.maintenance_interval = maintenance_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _loop(self, index):
+        worker_id = f"{self.worker_id}:{index}"
+        next_maintenance = 0.0
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    if index == 0 and time.monotonic() >= next_maintenance:
+                        next_maintenance = time.monotonic() + self.maintenance_interval
+                        requeued, failed = requeue_stale(self.stale_after)
+                        pruned = prune(self.retention_seconds)
+                        if requeued or failed or pruned:
+                            logger.info("Job maintenance", extra={'requeued': requeued, 'failed': failed,
+                                                                  'pruned': pruned})
+                    jobs = claim_jobs(worker_id)
+                    for job in jobs:
+                        run_job(job, retry_backoff=self.retry_backoff)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Job worker error")
+                    jobs = []
+                finally:
+                    db.session.remove()
+                if not jobs:
+                    self._stop.wait(self.poll_interval)
+
+    def _heartbeat_loop(self):
+        with self.app.app_context():
+            # Keeps beating until the run threads have finished, so draining jobs stay locked
+            while any(thread.is_alive() for thread in self._threads):
+                try:
+                    heartbeat(self.worker_id)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Job heartbeat failed")
+                finally:
+                    db.session.remove()
+                time.sleep(self.heartbeat_interval)
+
+    def start(self):
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(index,), name=f'llm-job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        threading.Thread(target=self._heartbeat_loop, name='llm-job-heartbeat', daemon=True).start()
+
+    def stop(self, timeout=None):
+        """Stops claiming new jobs and waits for the running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
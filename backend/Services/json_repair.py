@@ -0,0 +1,196 @@
+import json
+import re
+from collections import namedtuple
+
+# repaired: the text was not valid JSON as-is.
+# open_depth: containers the text left open, 0 unless it was cut off. For a truncated
+# {"questions": [{...}, {... it is 3: the last question object was closed by the repair
+# and may be missing fields, while every earlier one is complete.
+ParsedJSON = namedtuple('ParsedJSON', ['value', 'repaired', 'open_depth'])
+
+_SCALAR = re.compile(r'[^\s,:\[\]{}"]+')
+_WHITESPACE = ' \t\r\n'
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_CONTROL = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+_ARRAY_ITEM_START = '"{[-0123456789tfn'
+_KEY = re.compile(r'"(?:[^"\\\n]|\\.)*"[ \t\r\n]*:')
+
+
+class _Frame:
+    __slots__ = ('closer', 'is_object', 'expect_key', 'has_value')
+
+    def __init__(self, opener):
+        self.is_object = opener == '{'
+        self.closer = '}' if self.is_object else ']'
+        self.expect_key = self.is_object
+        self.has_value = False
+
+
+def _next_non_space(text, i):
+    while i < len(text) and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _closes_string(text, i, is_key, in_object):
+    """Decides whether the quote at text[i] ends the string or is an unescaped quote inside it."""
+    j = _next_non_space(text, i + 1)
+    if j >= len(text):
+        return True
+    nxt = text[j]
+    if is_key:
+        return nxt == ':'
+    if nxt in '}]':
+        return True
+    if nxt == ',':
+        # A real separator is followed by the next key (objects) or value (arrays)
+        k = _next_non_space(text, j + 1)
+        return k >= len(text) or text[k] in ('"}' if in_object else _ARRAY_ITEM_START + ']')
+    if nxt != '"':
+        return False
+    # Missing comma between fields on separate lines: "a": "x"\n  "b": ...
+    # or on the same line, when what follows is clearly the next key: "a": "x" "b": ...
+    return '\n' in text[i + 1:j] or (in_object and j > i + 1 and _KEY.match(text, j) is not None)
+
+
+def _scan_string(text, i, is_key, in_object):
+    """Reads the string opening at text[i]. Returns (json_string, next_index, closed)."""
+    out = ['"']
+    i += 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            if i + 1 >= n:
+                break
+            out.append(text[i:i + 2])
+            i += 2
+        elif c == '"':
+            if _closes_string(text, i, is_key, in_object):
+                out.append('"')
+                return ''.join(out), i + 1, True
+            out.append('\\"')
+            i += 1
+        elif c < ' ':
+            out.append(_CONTROL.get(c) or '\\u%04x' % ord(c))
+            i += 1
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out), n, False
+
+
+def repair_json(text):
+    """
+    Rewrites the first JSON object or array in `text` into valid JSON.
+
+    Text around the document (prose, code fences) is dropped, trailing and
+    duplicate commas are removed, missing commas between values are added,
+    unescaped quotes and raw control characters inside strings are escaped
+    and Python literals (True/False/None) are converted. If the document is
+    cut off, it is rolled back to the last complete value and the open
+    containers are closed.
+
+    Returns:
+        tuple: (repaired_text, open_depth), see ParsedJSON.
+    Raises:
+        json.JSONDecodeError: If no document start is found.
+    """
+    match = re.search(r'[{\[]', text)
+    if not match:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+
+    out = [match.group()]
+    stack = [_Frame(match.group())]
+    safe = (1, 1) # (len(out), len(stack)) at the last point where closing the stack gives valid JSON
+    i, n = match.end(), len(text)
+
+    def value_done():
+        nonlocal safe
+        stack[-1].has_value = True
+        safe = (len(out), len(stack))
+
+    while i < n:
+        c = text[i]
+        frame = stack[-1]
+        if c in _WHITESPACE or c == ':':
+            i += 1 # Whitespace is dropped; the colon is written together with its key
+            continue
+        if c in '}]':
+            if out[-1] == ',':
+                out.pop()
+            out.append(stack.pop().closer)
+            i += 1
+            if not stack:
+                return ''.join(out), 0
+            value_done()
+            continue
+        if c == ',':
+            if frame.has_value:
+                out.append(',')
+                frame.has_value = False
+                frame.expect_key = frame.is_object
+            i += 1
+            continue
+
+        if frame.has_value:
+            out.append(',') # Missing separator between two values
+            frame.has_value = False
+            frame.expect_key = frame.is_object
+
+        if frame.expect_key:
+            if c == '"':
+                key, i, closed = _scan_string(text, i, True, True)
+            else:
+                token = _SCALAR.match(text, i) if c not in '{[' else None
+                if token is None: # A container where a key belongs; not something we can guess
+                    break
+                key, i, closed = json.dumps(token.group()), token.end(), token.end() < n
+            if not closed:
+                break
+            out.append(key)
+            out.append(':')
+            frame.expect_key = False
+            continue
+
+        if c in '{[':
+            stack.append(_Frame(c))
+            out.append(c)
+            i += 1
+            safe = (len(out), len(stack))
+        elif c == '"':
+            string, i, closed = _scan_string(text, i, False, frame.is_object)
+            if not closed:
+                break
+            out.append(string)
+            value_done()
+        else:
+            token = _SCALAR.match(text, i)
+            if token.end() >= n:
+                break # Possibly cut off mid-number or mid-literal
+            out.append(_LITERALS.get(token.group(), token.group()))
+            i = token.end()
+            value_done()
+
+    length, depth = safe
+    del out[length:]
+    out.extend(frame.closer for frame in reversed(stack[:depth]))
+    return ''.join(out), depth
+
+
+def parse_llm_json(text):
+    """
+    Parses a model response, repairing it with repair_json() when it is not
+    valid JSON as-is.
+
+    Returns:
+        ParsedJSON
+    Raises:
+        json.JSONDecodeError: If the text can't be repaired into valid JSON.
+    """
+    try:
+        return ParsedJSON(json.loads(text), False, 0)
+    except json.JSONDecodeError:
+        pass
+    repaired, open_depth = repair_json(text)
+    return ParsedJSON(json.loads(repaired), True, open_depth)
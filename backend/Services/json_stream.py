@@ -0,0 +1,108 @@
+import json
+
+
+class _Frame:
+    __slots__ = ('kind', 'start', 'key', 'index', 'expect_key')
+
+    def __init__(self, kind, start):
+        self.kind = kind # 'object' or 'array'
+        self.start = start
+        self.key = None
+        self.index = 0
+        self.expect_key = kind == 'object'
+
+    def path_part(self):
+        return self.key if self.kind == 'object' else self.index
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a JSON document that arrives in chunks.
+
+    Call feed() with each chunk of text; it returns a list of (path, value)
+    tuples for every value at `emit_depth` that was completed by that chunk.
+    For example with emit_depth=2, a streamed {"questions": [{...}, {...}]}
+    yields (('questions', 0), {...}) as soon as the first question object
+    closes, long before the whole document is done. With emit_depth=1 every
+    top-level field is emitted once its value is complete.
+
+    Any text before the first '{' or '[' is ignored.
+    """
+    def __init__(self, emit_depth=1):
+        self.emit_depth = emit_depth
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.string_is_key = False
+        self.scalar_start = None
+        self.done = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        while self.pos < len(buf) and not self.done:
+            i = self.pos
+            c = buf[i]
+            self.pos += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.string_is_key:
+                        frame = self.stack[-1]
+                        frame.key = json.loads(buf[self.string_start:i + 1])
+                        frame.expect_key = False
+                    else:
+                        self._complete(self.string_start, i + 1, completed)
+                continue
+
+            if not self.stack and c not in '{[':
+                continue # Skip any preamble before the document starts
+
+            if c == '"':
+                self.in_string = True
+                self.string_start = i
+                frame = self.stack[-1] if self.stack else None
+                self.string_is_key = bool(frame and frame.kind == 'object' and frame.expect_key)
+            elif c in '{[':
+                self.stack.append(_Frame('object' if c == '{' else 'array', i))
+            elif c in '}]':
+                self._end_scalar(i, completed)
+                frame = self.stack.pop()
+                self._complete(frame.start, i + 1, completed)
+                if not self.stack:
+                    self.done = True
+            elif c == ',':
+                self._end_scalar(i, completed)
+                frame = self.stack[-1]
+                if frame.kind == 'object':
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif c in ' \t\r\n:':
+                self._end_scalar(i, completed)
+            elif self.scalar_start is None:
+                self.scalar_start = i # Start of a number, true, false or null
+        return completed
+
+    def _end_scalar(self, end, completed):
+        if self.scalar_start is not None:
+            start, self.scalar_start = self.scalar_start, None
+            self._complete(start, end, completed)
+
+    def _complete(self, start, end, completed):
+        if len(self.stack) != self.emit_depth:
+            return
+        path = tuple(frame.path_part() for frame in self.stack)
+        try:
+            completed.append((path, json.loads(self.buffer[start:end])))
+        except json.JSONDecodeError:
+            pass # Malformed fragment; the final full parse will surface the error
@@ -0,0 +1,139 @@
+import asyncio
+import queue
+import random
+import threading
+
+import groq
+import httpx
+
+_STREAM_END = object()
+
+
+class LLMClientPool:
+    """
+    Shared asyncio-based client layer for Groq calls.
+
+    A single background thread runs an event loop that owns an AsyncGroq client
+    with a bounded httpx connection pool. Sync code (Flask views) submits
+    coroutines with run()/submit(). Connections, per-model concurrency slots
+    and retry backoff are shared by the whole process, and one request can run
+    several calls concurrently (batch analysis, hedged generation).
+
+    run() still blocks its calling thread until the call finishes, so inline
+    LLM views hold a request thread for the whole generation; requests that
+    shouldn't (?async=1, see job_queue.py) are handed to worker.py instead.
+    """
+    def __init__(self, api_key, max_connections=100, max_keepalive_connections=20,
+                 model_concurrency=32, timeout=60.0, base_url=None):
+        self.model_concurrency = model_concurrency
+        self._semaphores = {}
+        self._in_flight = {}
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+            timeout=timeout
+        )
+        # base_url=None keeps the SDK default (https://api.groq.com)
+        self.client = groq.AsyncGroq(api_key=api_key, base_url=base_url, http_client=self._http_client)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='llm-pool', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro):
+        """Schedules a coroutine on the pool's loop and returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """Runs a coroutine on the pool's loop and blocks the calling thread until it finishes."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, agen):
+        """
+        Consumes an async generator on the pool's loop and yields its items to a
+        sync caller. Stopping iteration early cancels the underlying generator.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                items.put(e)
+                return
+            items.put(_STREAM_END)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = items.get()
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def _semaphore(self, model):
+        # Only touched from the loop thread, so no extra locking is needed
+        if model not in self._semaphores:
+            self._semaphores[model] = asyncio.Semaphore(self.model_concurrency)
+        return self._semaphores[model]
+
+    async def chat(self, model, messages, **kwargs):
+        """Creates a chat completion, holding one of the model's concurrency slots for the call."""
+        async with self._semaphore(model):
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+            try:
+                return await self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+            finally:
+                self._in_flight[model] -= 1
+
+    async def stream_chat(self, model, messages, **kwargs):
+        """Streams content deltas for a chat completion, holding a concurrency slot until the stream ends."""
+        async with self._semaphore(model):
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=model, messages=messages, stream=True, **kwargs)
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                self._in_flight[model] -= 1
+
+    async def backoff(self, attempt, base=1.0, cap=8.0):
+        """Non-blocking exponential backoff with jitter before retry number `attempt` (0-based)."""
+        delay = min(cap, base * (2 ** attempt))
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    def stats(self):
+        return {
+            'model_concurrency': self.model_concurrency,
+            'in_flight': dict(self._in_flight)
+        }
+
+    def close(self):
+        async def shutdown():
+            await self._http_client.aclose()
+
+        if self._loop.is_running():
+            self.run(shutdown(), timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
@@ -0,0 +1,184 @@
+import bisect
+import threading
+import time
+
+from flask import g, request
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=HTTP_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {} # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                labels = _format_labels(self.labels, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', '+Inf')])} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {entry[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+
+    Counters and histograms are updated on the hot path under a per-metric
+    lock. Collectors are callables run at scrape time that return
+    (name, type, help, [(labels_dict, value), ...]) tuples, for values that
+    already live elsewhere (queue depths, cache and token totals). Each worker
+    process keeps its own registry, so scrape every worker or sum per instance.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=HTTP_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, key, collect):
+        """Registers (or replaces) the scrape-time collector stored under key."""
+        with self._lock:
+            self._collectors[key] = collect
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for key, collect in collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                lines.append(f"# collector {key} failed: {_escape(e)}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+                for labels, value in samples:
+                    label_names = sorted(labels)
+                    rendered = _format_labels(label_names, [labels[k] for k in label_names])
+                    lines.append(f"{name}{rendered} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds',
+    'Time to produce a response per endpoint (streamed responses: until the stream starts).',
+    labels=('endpoint', 'method', 'status'), buckets=HTTP_BUCKETS)
+HTTP_REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL statements issued per request.',
+    labels=('endpoint',), buckets=QUERY_COUNT_BUCKETS)
+LLM_CALL_DURATION = registry.histogram(
+    'llm_call_duration_seconds', 'Latency of upstream LLM calls.',
+    labels=('model', 'operation', 'outcome'), buckets=LLM_BUCKETS)
+LLM_RETRIES = registry.counter(
+    'llm_retries_total', 'Extra LLM attempts after a failure (retry) or a slow primary (hedge).',
+    labels=('model', 'reason'))
+LLM_PARSE_FAILURES = registry.counter(
+    'llm_json_parse_failures_total', 'LLM responses that were not valid JSON, even after repair.',
+    labels=('model', 'operation'))
+LLM_PARSE_REPAIRS = registry.counter(
+    'llm_json_repairs_total', 'LLM responses that only parsed after repair, by whether they were cut off (truncated).',
+    labels=('model', 'operation', 'outcome'))
+HTTP_REQUESTS_REJECTED = registry.counter(
+    'http_requests_rejected_total', 'Requests shed with 429 by rate limiting or admission control, or with 503 by the password hasher.',
+    labels=('endpoint', 'reason'))
+DB_QUERY_DURATION = registry.histogram(
+    'db_query_duration_seconds', 'SQL statement execution time.',
+    labels=('statement',), buckets=DB_BUCKETS)
+LOG_RECORDS_DROPPED = registry.counter(
+    'log_records_dropped_total', 'Log records dropped because the log queue was full.')
+
+
+def install_request_metrics(app):
+    """Observes request duration and SQL statement count for every request."""
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint,
+                                          method=request.method, status=response.status_code)
+            HTTP_REQUEST_QUERIES.observe(g.get('query_count', 0), endpoint=endpoint)
+        return response
@@ -0,0 +1,333 @@
+import importlib.util
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Float, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import OperationalError, DBAPIError
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+_ADVISORY_LOCK_KEY = 0x6d6f636b # Any constant shared by every deployer; 'mock'
+
+# Bookkeeping tables live outside db.metadata so create_all() never touches them
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', String(4), primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_seconds', Float, nullable=False)
+)
+migration_checkpoints = Table(
+    'schema_migration_checkpoints', _metadata,
+    Column('version', String(4), primary_key=True),
+    Column('name', String(100), primary_key=True),
+    Column('last_key', String(255), nullable=False),
+    Column('updated_at', DateTime, nullable=False)
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def load(self):
+        spec = importlib.util.spec_from_file_location(f'migrations.m{self.version}_{self.name}', self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not callable(getattr(module, 'upgrade', None)):
+            raise MigrationError(f"Migration {self.version}_{self.name} has no upgrade(m) function")
+        return module
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Migrations in `directory` named NNNN_description.py, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(match.group(1), match.group(2), os.path.join(directory, filename)))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise MigrationError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def _is_lock_timeout(e):
+    # 55P03 is Postgres' lock_not_available, raised when lock_timeout expires
+    return getattr(getattr(e, 'orig', None), 'pgcode', None) == '55P03'
+
+
+class MigrationContext:
+    """
+    Passed to a migration's upgrade(m). Every helper runs as its own short
+    transaction (or none, for concurrent index builds) and is idempotent, so
+    a migration that fails halfway can simply be run again.
+
+    On Postgres, DDL runs with a short lock_timeout and is retried with
+    backoff when it can't get its lock: an ALTER TABLE that waits behind a
+    long query would otherwise block every query queued after it.
+    """
+    def __init__(self, engine, version, lock_timeout_ms=2000, lock_retries=10, batch_size=1000,
+                 batch_sleep=0.05, batch_target_seconds=0.5, log=logger.info):
+        self.engine = engine
+        self.version = version
+        self.lock_timeout_ms = lock_timeout_ms
+        self.lock_retries = lock_retries
+        self.batch_size = batch_size
+        self.batch_sleep = batch_sleep
+        self.batch_target_seconds = batch_target_seconds
+        self.log = log
+
+    @property
+    def is_postgres(self):
+        return self.engine.dialect.name == 'postgresql'
+
+    def _with_lock_retries(self, description, fn):
+        for attempt in range(self.lock_retries + 1):
+            try:
+                return fn()
+            except (OperationalError, DBAPIError) as e:
+                if not _is_lock_timeout(e) or attempt == self.lock_retries:
+                    raise
+                delay = min(30.0, 0.5 * 2 ** attempt)
+                self.log(f"  {description}: lock not available, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _set_lock_timeout(self, conn, local=True):
+        if self.is_postgres:
+            scope = 'LOCAL ' if local else ''
+            conn.exec_driver_sql(f"SET {scope}lock_timeout = '{int(self.lock_timeout_ms)}ms'")
+
+    @contextmanager
+    def _autocommit(self):
+        # For statements that can't run in a transaction (the CONCURRENTLY variants). The settings are
+        # session-wide here, so they're reset before the connection goes back to the pool.
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            self._set_lock_timeout(conn, local=False)
+            conn.exec_driver_sql("SET statement_timeout = 0") # Index builds on big tables take a while
+            try:
+                yield conn
+            finally:
+                conn.exec_driver_sql("RESET lock_timeout")
+                conn.exec_driver_sql("RESET statement_timeout")
+
+    def execute(self, sql, **params):
+        """Runs one statement in its own transaction under the lock timeout."""
+        def run():
+            with self.engine.begin() as conn:
+                self._set_lock_timeout(conn)
+                return conn.execute(text(sql), params).rowcount
+        return self._with_lock_retries(sql.split('\n', 1)[0][:60], run)
+
+    def has_table(self, table):
+        return inspect(self.engine).has_table(table)
+
+    def has_column(self, table, column):
+        return column in {c['name'] for c in inspect(self.engine).get_columns(table)}
+
+    def has_index(self, table, name):
+        return name in {i['name'] for i in inspect(self.engine).get_indexes(table)}
+
+    def add_column(self, table, column, ddl_type):
+        """
+        Adds a nullable column if it is missing. Keep it nullable and without a
+        volatile default so Postgres only updates the catalog instead of
+        rewriting the table; fill it with backfill() instead.
+        """
+        if self.has_column(table, column):
+            self.log(f"  {table}.{column} already exists")
+            return
+        self.execute(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}')
+        self.log(f"  added {table}.{column}")
+
+    def create_tables(self, *tables):
+        """Creates missing tables (with their indexes) from the models' current definitions."""
+        from extensions import db
+        for name in tables:
+            if self.has_table(name):
+                self.log(f"  table {name} already exists")
+                continue
+            self._with_lock_retries(f"create {name}", lambda: self._create_table(db.metadata.tables[name]))
+            self.log(f"  created table {name}")
+
+    def _create_table(self, table):
+        with self.engine.begin() as conn:
+            self._set_lock_timeout(conn) # Foreign keys lock the referenced tables briefly
+            table.create(conn, checkfirst=True)
+
+    def create_index(self, name, table, columns, unique=False, where=None):
+        """
+        Builds an index without blocking writes. On Postgres this is CREATE
+        INDEX CONCURRENTLY, which can't run in a transaction and leaves an
+        INVALID index behind if it fails; such a leftover is dropped and
+        rebuilt on the next run.
+        """
+        columns_sql = ', '.join(columns)
+        unique_sql = 'UNIQUE ' if unique else ''
+        where_sql = f' WHERE {where}' if where else ''
+        if not self.is_postgres:
+            self.execute(f'CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns_sql}){where_sql}')
+            self.log(f"  index {name} ready")
+            return
+
+        def run():
+            with self._autocommit() as conn:
+                valid = conn.execute(text(
+                    "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name"), {'name': name}).scalar()
+                if valid:
+                    return False
+                if valid is False:
+                    self.log(f"  dropping invalid index {name} left by an earlier run")
+                    conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+                conn.exec_driver_sql(
+                    f'CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns_sql}){where_sql}')
+                return True
+        built = self._with_lock_retries(f"index {name}", run)
+        self.log(f"  {'built' if built else 'already have'} index {name}")
+
+    def drop_index(self, name):
+        if self.is_postgres:
+            def run():
+                with self._autocommit() as conn:
+                    conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            self._with_lock_retries(f"drop index {name}", run)
+        else:
+            self.execute(f'DROP INDEX IF EXISTS {name}')
+
+    def backfill(self, name, table, key_column, process, batch_size=None):
+        """
+        Walks `table` in ascending `key_column` order in chunks, calling
+        process(conn, after_key, last_key) for each one inside a transaction
+        that also saves the chunk's last key as a checkpoint, so an
+        interrupted backfill resumes where it stopped.
+
+        Chunk sizes adapt to keep each transaction near batch_target_seconds
+        (short row locks, modest WAL bursts), with batch_sleep between chunks
+        to leave headroom for live traffic. Returns the rows processed.
+        """
+        batch_size = batch_size or self.batch_size
+        max_batch = batch_size * 10
+        after = self._checkpoint(name)
+        if after is not None:
+            self.log(f"  {name}: resuming after {key_column} {after}")
+        total = 0
+        while True:
+            started = time.monotonic()
+            with self.engine.begin() as conn:
+                self._set_lock_timeout(conn)
+                keys = conn.execute(text(
+                    f"SELECT {key_column} FROM {table}"
+                    + (f" WHERE {key_column} > :after" if after is not None else '')
+                    + f" ORDER BY {key_column} LIMIT :limit"), {'after': after, 'limit': batch_size}).scalars().all()
+                if not keys:
+                    break
+                processed = process(conn, after, keys[-1])
+                total += len(keys) if processed is None else processed
+                after = keys[-1]
+                self._save_checkpoint(conn, name, after)
+            elapsed = time.monotonic() - started
+            if elapsed > self.batch_target_seconds * 2:
+                batch_size = max(10, batch_size // 2)
+            elif elapsed < self.batch_target_seconds / 2:
+                batch_size = min(max_batch, int(batch_size * 1.5) + 1)
+            if self.batch_sleep:
+                time.sleep(self.batch_sleep)
+        self.log(f"  {name}: {total} rows backfilled")
+        return total
+
+    def backfill_update(self, name, table, key_column, set_sql, where=None, batch_size=None):
+        """backfill() with a plain UPDATE ... SET set_sql per chunk, e.g. for populating a new column."""
+        condition = f" AND ({where})" if where else ''
+
+        def process(conn, after, last):
+            return conn.execute(text(
+                f"UPDATE {table} SET {set_sql} WHERE "
+                + (f"{key_column} > :after AND " if after is not None else '')
+                + f"{key_column} <= :last{condition}"), {'after': after, 'last': last}).rowcount
+        return self.backfill(name, table, key_column, process, batch_size=batch_size)
+
+    def _checkpoint(self, name):
+        with self.engine.connect() as conn:
+            row = conn.execute(select(migration_checkpoints.c.last_key).where(
+                migration_checkpoints.c.version == self.version, migration_checkpoints.c.name == name)).first()
+        if row is None:
+            return None
+        return int(row[0]) if row[0].lstrip('-').isdigit() else row[0]
+
+    def _save_checkpoint(self, conn, name, last_key):
+        values = {'last_key': str(last_key), 'updated_at': datetime.now(timezone.utc)}
+        updated = conn.execute(migration_checkpoints.update().where(
+            migration_checkpoints.c.version == self.version, migration_checkpoints.c.name == name).values(**values))
+        if not updated.rowcount:
+            conn.execute(migration_checkpoints.insert().values(version=self.version, name=name, **values))
+
+
+class MigrationRunner:
+    """
+    Applies the pending migrations in MIGRATIONS_DIR in version order,
+    recording each in schema_migrations once its upgrade() returns.
+    A Postgres advisory lock keeps two deploys from migrating at once.
+    """
+    def __init__(self, engine, directory=MIGRATIONS_DIR, log=logger.info, **context_options):
+        self.engine = engine
+        self.directory = directory
+        self.log = log
+        self.context_options = context_options
+
+    def applied(self):
+        _metadata.create_all(self.engine, checkfirst=True)
+        with self.engine.connect() as conn:
+            return {row.version: row for row in conn.execute(select(schema_migrations))}
+
+    def status(self):
+        """Returns [(migration, applied_row_or_None)] for every migration on disk."""
+        applied = self.applied()
+        return [(migration, applied.get(migration.version)) for migration in discover(self.directory)]
+
+    def pending(self, target=None):
+        return [migration for migration, row in self.status()
+                if row is None and (target is None or migration.version <= target)]
+
+    def run(self, target=None):
+        """Applies pending migrations up to and including `target`. Returns the versions applied."""
+        lock_conn = None
+        if self.engine.dialect.name == 'postgresql':
+            # Autocommit: an open transaction here would make CREATE INDEX CONCURRENTLY wait on it forever
+            lock_conn = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+            if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': _ADVISORY_LOCK_KEY}).scalar():
+                lock_conn.close()
+                raise MigrationError("Another migration run holds the lock")
+        try:
+            done = []
+            for migration in self.pending(target):
+                self.log(f"Applying {migration.version}_{migration.name}")
+                started = time.monotonic()
+                module = migration.load()
+                module.upgrade(MigrationContext(self.engine, migration.version, log=self.log, **self.context_options))
+                duration = time.monotonic() - started
+                with self.engine.begin() as conn:
+                    conn.execute(schema_migrations.insert().values(
+                        version=migration.version, name=migration.name,
+                        applied_at=datetime.now(timezone.utc), duration_seconds=round(duration, 3)))
+                    conn.execute(migration_checkpoints.delete().where(migration_checkpoints.c.version == migration.version))
+                self.log(f"Applied {migration.version}_{migration.name} in {duration:.1f}s")
+                done.append(migration.version)
+            return done
+        finally:
+            if lock_conn is not None:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': _ADVISORY_LOCK_KEY})
+                lock_conn.close()
@@ -0,0 +1,82 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Too many password hashes in progress, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Password hashing with a configurable werkzeug method, e.g. 'scrypt',
+    'scrypt:16384:8:1' or 'pbkdf2:sha256:600000'.
+
+    Hashing and verification run on a bounded executor so only pool_size
+    hashes are computed at once per process instead of oversubscribing the
+    CPU. hashlib's scrypt/pbkdf2 release the GIL, so a thread pool is
+    usually enough; 'process' is available as well.
+
+    The calling request thread still blocks until its hash is done; the
+    pool caps CPU use, it doesn't free threads. So that a burst of logins
+    can't tie up every request thread behind the pool, at most max_queue
+    hashes wait for it, each for up to queue_timeout seconds. Beyond that
+    PasswordHasherBusy is raised, which the auth routes answer with 503.
+    """
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self.method_prefix = None
+        self._executor = None
+        self.max_pending = 0
+        self.queue_timeout = None
+        self.pending = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        # werkzeug stores the full parameter string before the first '$', e.g. 'scrypt:32768:8:1'
+        self.method_prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+        pool_size = app.config.get('PASSWORD_HASH_POOL_SIZE') or os.cpu_count() or 1
+        self.max_pending = pool_size + app.config.get('PASSWORD_HASH_MAX_QUEUE', pool_size * 2)
+        self.queue_timeout = app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS', 2.0)
+        if app.config.get('PASSWORD_HASH_POOL_KIND', 'thread') == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=pool_size)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='password-hash')
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise PasswordHasherBusy(1)
+            self.pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+            try:
+                return future.result(timeout=self.queue_timeout)
+            except FutureTimeout:
+                # Still queued: give up on it. Already hashing: it finishes within one hash time
+                if future.cancel():
+                    raise PasswordHasherBusy(max(1, round(self.queue_timeout)))
+                return future.result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if pwhash was made with different parameters than the configured method."""
+        return pwhash.split('$', 1)[0] != self.method_prefix
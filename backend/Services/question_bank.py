@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+
+from sqlalchemy import func
+
+from extensions import db
+from models import QuestionBankEntry, QuestionBankTitleToken, InterviewSession
+
+logger = logging.getLogger(__name__)
+
+# Words that don't change which questions fit a role
+TITLE_STOP_WORDS = {'a', 'an', 'and', 'the', 'of', 'for', 'in', 'senior', 'sr', 'junior', 'jr', 'lead',
+                    'principal', 'staff', 'associate', 'entry', 'level', 'i', 'ii', 'iii', 'iv'}
+TITLE_SYNONYMS = {'dev': 'developer', 'eng': 'engineer', 'engr': 'engineer', 'swe': 'software engineer',
+                  'sde': 'software engineer', 'mgr': 'manager', 'pm': 'product manager', 'ml': 'machine learning'}
+MIN_TOKEN_OVERLAP = 0.6 # Share of both titles' tokens that must be shared, so 'engineer' doesn't match every engineer title
+
+
+def title_tokens(job_title):
+    words = re.findall(r"[a-z0-9+#]+", (job_title or '').lower())
+    tokens = []
+    for word in words:
+        for token in TITLE_SYNONYMS.get(word, word).split():
+            if token not in TITLE_STOP_WORDS and token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def title_key(job_title):
+    """'Senior Software Dev' and 'software developer' both become 'developer software'."""
+    return ' '.join(sorted(title_tokens(job_title)))
+
+
+def _normalize(value):
+    return ' '.join(str(value or '').lower().split())
+
+
+def _question_hash(question):
+    return hashlib.sha256(_normalize(question.get('question')).encode('utf-8')).hexdigest()
+
+
+def add_questions(job_data, questions):
+    """Stores generated questions in the bank, skipping ones it already has. Returns rows added."""
+    key = title_key(job_data.get('jobTitle'))
+    if not key:
+        return 0
+    industry = _normalize(job_data.get('companyIndustry'))
+    interview_type = _normalize(job_data.get('interviewType'))
+
+    by_hash = {}
+    for question in questions:
+        if isinstance(question, dict) and question.get('question'):
+            by_hash.setdefault(_question_hash(question), question)
+    if not by_hash:
+        return 0
+
+    existing = {h for (h,) in db.session.query(QuestionBankEntry.question_hash)
+                .filter(QuestionBankEntry.title_key == key,
+                        QuestionBankEntry.interview_type == interview_type,
+                        QuestionBankEntry.industry_key == industry,
+                        QuestionBankEntry.question_hash.in_(list(by_hash)))}
+    new_entries = [QuestionBankEntry(
+                        title_key=key,
+                        job_title=job_data.get('jobTitle'),
+                        industry_key=industry,
+                        interview_type=interview_type,
+                        complexity=str(question.get('complexity') or '')[:20] or None,
+                        question_hash=h,
+                        payload=json.dumps(question))
+                   for h, question in by_hash.items() if h not in existing]
+    if not new_entries:
+        return 0
+
+    known_tokens = {t for (t,) in db.session.query(QuestionBankTitleToken.token)
+                    .filter(QuestionBankTitleToken.title_key == key)}
+    db.session.add_all(new_entries)
+    db.session.add_all(QuestionBankTitleToken(token=token, title_key=key)
+                       for token in key.split() if token not in known_tokens)
+    db.session.commit()
+    return len(new_entries)
+
+
+def _similar_title_keys(job_title, limit=3):
+    tokens = title_tokens(job_title)
+    if not tokens:
+        return []
+    matches = func.count(QuestionBankTitleToken.token)
+    # title_key is the candidate's tokens joined by spaces
+    key = QuestionBankTitleToken.title_key
+    key_tokens = func.length(key) - func.length(func.replace(key, ' ', '')) + 1
+    rows = (db.session.query(key, matches)
+            .filter(QuestionBankTitleToken.token.in_(tokens))
+            .group_by(key)
+            .having(matches >= math.ceil(len(tokens) * MIN_TOKEN_OVERLAP))
+            .having(matches >= key_tokens * MIN_TOKEN_OVERLAP)
+            .order_by(matches.desc(), key_tokens)
+            .limit(limit)
+            .all())
+    return [key for key, _ in rows]
+
+
+def get_question_set(job_data, count=5, min_banked=15):
+    """
+    Returns a fresh random set of `count` banked questions for the role, or
+    None on a miss. Exact normalized titles are tried first, then titles that
+    share most of their tokens; a matching industry is preferred but not required.
+
+    A role only counts as banked once it holds min_banked questions (at least
+    `count`), so the sets drawn from it actually vary; thinner roles are a miss
+    and keep going to the LLM, which adds to the bank.
+    """
+    min_banked = max(count, min_banked or 0)
+    key = title_key(job_data.get('jobTitle'))
+    if not key:
+        return None
+    interview_type = _normalize(job_data.get('interviewType'))
+    industry = _normalize(job_data.get('companyIndustry'))
+
+    def pick(keys, industry_key=None):
+        query = (db.session.query(QuestionBankEntry.payload)
+                 .filter(QuestionBankEntry.title_key.in_(keys),
+                         QuestionBankEntry.interview_type == interview_type))
+        if industry_key is not None:
+            query = query.filter(QuestionBankEntry.industry_key == industry_key)
+        rows = query.order_by(func.random()).limit(min_banked).all()
+        return rows[:count] if len(rows) >= min_banked else None
+
+    rows = (industry and pick([key], industry)) or pick([key])
+    if rows is None:
+        similar = [k for k in _similar_title_keys(job_data.get('jobTitle')) if k != key]
+        rows = similar and ((industry and pick(similar, industry)) or pick(similar))
+    if not rows:
+        return None
+
+    questions = []
+    for i, (payload,) in enumerate(rows):
+        question = json.loads(payload)
+        question['id'] = i + 1
+        questions.append(question)
+    return questions
+
+
+def most_requested_roles(limit=20):
+    """Most frequent (title, industry, type) combinations across interview sessions."""
+    sessions = func.count(InterviewSession.session_id)
+    rows = (db.session.query(InterviewSession.job_title, InterviewSession.company_industry,
+                             InterviewSession.interview_type, sessions)
+            .group_by(InterviewSession.job_title, InterviewSession.company_industry, InterviewSession.interview_type)
+            .order_by(sessions.desc())
+            .limit(limit)
+            .all())
+    return [{'jobTitle': t, 'companyIndustry': i, 'interviewType': it} for t, i, it, _ in rows]
+
+
+def warm_question_bank(groq_service, limit=20, target_per_role=15, max_rounds=3):
+    """
+    Generates questions for the most requested roles until each has at least
+    target_per_role banked questions (or max_rounds generations were tried).
+    Must run inside an app context. Returns the number of questions added.
+    """
+    added = 0
+    for job_data in most_requested_roles(limit):
+        key = title_key(job_data['jobTitle'])
+        for _ in range(max_rounds):
+            banked = (db.session.query(func.count(QuestionBankEntry.entry_id))
+                      .filter(QuestionBankEntry.title_key == key,
+                              QuestionBankEntry.interview_type == _normalize(job_data['interviewType']),
+                              QuestionBankEntry.industry_key == _normalize(job_data['companyIndustry']))
+                      .scalar())
+            if banked >= target_per_role:
+                break
+            try:
+                # Bypass the question cache so every round produces new questions
+                questions = groq_service.pool.run(groq_service.generate_interview_questions_async(job_data))
+                added += add_questions(job_data, questions)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning("Question bank warming failed for %s: %s", job_data['jobTitle'], e)
+                break
+    return added
+
+
+def start_background_warmer(app, groq_service, interval_seconds, limit=20, target_per_role=15):
+    """Runs warm_question_bank every interval_seconds on a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                with app.app_context():
+                    added = warm_question_bank(groq_service, limit=limit, target_per_role=target_per_role)
+                logger.info("Question bank warming added %s questions.", added)
+            except Exception as e:
+                logger.warning("Question bank warming error: %s", e)
+
+    thread = threading.Thread(target=run, name='question-bank-warmer', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from utils import LRUCache
+from Services.token_budget import question_count
+
+logger = logging.getLogger(__name__)
+
+# Bump when build_prompt changes in a way that should invalidate cached sets
+PROMPT_VERSION = 2
+
+
+def make_cache_key(job_data, model):
+    """
+    Builds a content-addressed key for a question set request.
+
+    The prompt inputs are normalized (case, surrounding and repeated whitespace)
+    so that "Software Engineer " and "software  engineer" share one entry.
+    """
+    def normalize(value):
+        return " ".join(str(value or "").lower().split())
+
+    payload = {
+        'jobTitle': normalize(job_data.get('jobTitle')),
+        'companyIndustry': normalize(job_data.get('companyIndustry')),
+        'interviewType': normalize(job_data.get('interviewType')),
+        'questionCount': question_count(job_data),
+        'model': model,
+        'version': PROMPT_VERSION
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class _PruneSchedule:
+    # Shared stores prune themselves from add_variant at most every prune_interval seconds per process
+    def __init__(self, prune_interval):
+        self.prune_interval = prune_interval
+        self._next_prune = time.monotonic() + prune_interval if prune_interval else None
+
+    def _maybe_prune(self):
+        if self._next_prune is None or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + self.prune_interval
+        try:
+            deleted = self.prune()
+            logger.info("Pruned %s question cache entries", deleted)
+        except Exception as e:
+            logger.warning("Question cache prune failed: %s", e)
+
+
+class SQLQuestionStore(_PruneSchedule):
+    """
+    Shared cache tier backed by the question_set_cache table, so every worker
+    process sees the sets generated by the others.
+
+    A key never holds more than max_variants live sets. prune() deletes
+    expired sets, sets beyond that cap, and the oldest sets once the table
+    holds more than max_keys keys' worth.
+    """
+    def __init__(self, ttl, max_variants=3, max_keys=5000, prune_interval=3600):
+        super().__init__(prune_interval)
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self.max_keys = max_keys
+
+    def get_variants(self, key, limit):
+        from models import QuestionSetCacheEntry
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        rows = (QuestionSetCacheEntry.query
+                .filter(QuestionSetCacheEntry.cache_key == key,
+                        QuestionSetCacheEntry.created_at > cutoff)
+                .order_by(QuestionSetCacheEntry.created_at.desc())
+                .limit(limit)
+                .all())
+        return [json.loads(row.questions) for row in rows]
+
+    def add_variant(self, key, questions):
+        from models import QuestionSetCacheEntry
+        from extensions import db
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        try:
+            # Other processes may have filled the key since this one last read it
+            live = (QuestionSetCacheEntry.query
+                    .filter(QuestionSetCacheEntry.cache_key == key, QuestionSetCacheEntry.created_at > cutoff)
+                    .count())
+            if live < self.max_variants:
+                db.session.add(QuestionSetCacheEntry(cache_key=key, questions=json.dumps(questions)))
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Question cache write failed: %s", e)
+        self._maybe_prune()
+
+    def prune(self):
+        from sqlalchemy import func, select
+        from models import QuestionSetCacheEntry as Entry
+        from extensions import db
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        deleted = Entry.query.filter(Entry.created_at <= cutoff).delete(synchronize_session=False)
+        rank = func.row_number().over(partition_by=Entry.cache_key, order_by=Entry.created_at.desc())
+        ranked = select(Entry.entry_id, rank.label('rank')).subquery()
+        deleted += (Entry.query
+                    .filter(Entry.entry_id.in_(select(ranked.c.entry_id).where(ranked.c.rank > self.max_variants)))
+                    .delete(synchronize_session=False))
+        oldest = (select(Entry.entry_id).order_by(Entry.created_at.desc())
+                  .offset(self.max_keys * self.max_variants).scalar_subquery())
+        deleted += Entry.query.filter(Entry.entry_id.in_(oldest)).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+
+class FileQuestionStore(_PruneSchedule):
+    """
+    Shared cache tier backed by one JSON file per key in a local directory.
+    Writes go through a temp file and os.replace so readers never see a partial file.
+
+    A file keeps at most max_variants live sets. prune() removes files whose
+    sets all expired, then the least recently written files beyond max_keys.
+    """
+    def __init__(self, directory, ttl, max_variants=3, max_keys=5000, prune_interval=3600):
+        super().__init__(prune_interval)
+        self.directory = directory
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        cutoff = time.time() - self.ttl
+        return [entry for entry in entries if entry.get('created_at', 0) > cutoff]
+
+    def get_variants(self, key, limit):
+        entries = self._read(key)
+        return [entry['questions'] for entry in entries[-limit:]]
+
+    def add_variant(self, key, questions):
+        with self._lock:
+            entries = self._read(key)
+            if len(entries) >= self.max_variants:
+                return
+            entries.append({'created_at': time.time(), 'questions': questions})
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.warning("Question cache write failed: %s", e)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        self._maybe_prune()
+
+    def prune(self):
+        deleted = 0
+        remaining = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if not self._read(name[:-len('.json')]):
+                    os.remove(path)
+                    deleted += 1
+                else:
+                    remaining.append((os.path.getmtime(path), path))
+            except FileNotFoundError: # Removed by another process meanwhile
+                continue
+        for _, path in sorted(remaining, reverse=True)[self.max_keys:]:
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
+
+class QuestionCache:
+    """
+    Two-tier cache for generated question sets.
+
+    Each key holds up to `variants` distinct question sets. Until a key has that
+    many, lookups count as misses so a fresh set gets generated and added;
+    afterwards a random stored set is served, so users requesting the same role
+    don't all see the same questions.
+    """
+    def __init__(self, ttl=86400, max_entries=512, variants=3, shared_store=None):
+        self.variants = max(1, variants)
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.shared_store = shared_store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        stored = self.memory.get(key) or []
+        if len(stored) < self.variants and self.shared_store is not None:
+            shared = self.shared_store.get_variants(key, self.variants)
+            if len(shared) > len(stored):
+                stored = shared
+                self.memory.set(key, stored)
+                if len(stored) >= self.variants:
+                    with self._lock:
+                        self.shared_hits += 1
+
+        with self._lock:
+            if len(stored) < self.variants:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return random.choice(stored)
+
+    def put(self, key, questions):
+        stored = list(self.memory.get(key) or [])
+        if len(stored) >= self.variants:
+            return
+        stored.append(questions)
+        self.memory.set(key, stored)
+        if self.shared_store is not None:
+            self.shared_store.add_variant(key, questions)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'variants_per_key': self.variants,
+            'backend': type(self.shared_store).__name__ if self.shared_store else 'memory',
+            'memory': self.memory.stats()
+        }
+
+
+def build_question_cache(config):
+    """Creates the question cache described by config, or None when disabled."""
+    backend = (getattr(config, 'QUESTION_CACHE_BACKEND', 'memory') or 'none').lower()
+    if backend == 'none':
+        return None
+
+    ttl = config.QUESTION_CACHE_TTL_SECONDS
+    limits = {'max_variants': max(1, config.QUESTION_CACHE_VARIANTS),
+              'max_keys': config.QUESTION_CACHE_SHARED_MAX_KEYS,
+              'prune_interval': config.QUESTION_CACHE_PRUNE_INTERVAL_SECONDS}
+    shared_store = None
+    if backend == 'sql':
+        shared_store = SQLQuestionStore(ttl=ttl, **limits)
+    elif backend == 'file':
+        shared_store = FileQuestionStore(config.QUESTION_CACHE_DIR, ttl=ttl, **limits)
+    elif backend != 'memory':
+        raise ValueError(f"Unknown QUESTION_CACHE_BACKEND: {backend}")
+
+    return QuestionCache(
+        ttl=ttl,
+        max_entries=config.QUESTION_CACHE_MAX_ENTRIES,
+        variants=config.QUESTION_CACHE_VARIANTS,
+        shared_store=shared_store
+    )
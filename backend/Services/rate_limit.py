@@ -0,0 +1,341 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+
+from Services.metrics import HTTP_REQUESTS_REJECTED
+
+logger = logging.getLogger(__name__)
+
+
+def _take(tokens, updated, now, rate, burst, cost):
+    """One token-bucket step. Returns (tokens_left, allowed, retry_after_seconds)."""
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= cost:
+        return tokens - cost, True, 0.0
+    return tokens, False, (cost - tokens) / rate
+
+
+def _take_all(buckets, current, now):
+    """
+    Applies a request to several buckets at once: either every bucket is
+    debited or, if any is short, none is. current maps key -> (tokens, updated).
+
+    Returns:
+        tuple: (updates, rejected_index, retry_after) where updates maps key ->
+        new tokens (empty on a reject) and rejected_index is the position of the
+        first short bucket in `buckets`, or None.
+    """
+    updates = {}
+    for index, (key, cost, rate, burst) in enumerate(buckets):
+        tokens, updated = current.get(key) or (burst, now)
+        tokens, allowed, retry_after = _take(tokens, min(updated, now), now, rate, burst, cost)
+        if not allowed:
+            return {}, index, retry_after
+        updates[key] = (tokens, (burst - tokens) / rate)
+    return updates, None, 0.0
+
+
+class MemoryBucketStore:
+    """Token buckets in a dict; limits apply per process."""
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {} # key -> (tokens, updated, full_at)
+        self._next_prune = 0.0
+
+    def take(self, buckets):
+        """Takes from every (key, cost, rate, burst) bucket, or none. Returns (rejected_index, retry_after)."""
+        now = time.monotonic()
+        with self._lock:
+            current = {key: self._buckets[key][:2] for key, _, _, _ in buckets if key in self._buckets}
+            updates, rejected, retry_after = _take_all(buckets, current, now)
+            for key, (tokens, refill_seconds) in updates.items():
+                self._buckets[key] = (tokens, now, now + refill_seconds)
+            if len(self._buckets) > self.max_keys and now >= self._next_prune:
+                self._next_prune = now + 1.0 # At most once a second if every bucket is still in use
+                # Buckets that have refilled behave exactly like missing ones
+                self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+            return rejected, retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file, so every worker process on the host
+    shares the same limits. Each take() is one short IMMEDIATE transaction;
+    if the file stays locked past `timeout` the call is allowed rather than
+    failing the request.
+    """
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, timeout=0.5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._takes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF") # Losing a few token updates on a crash is harmless
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets):
+        """Takes from every (key, cost, rate, burst) bucket, or none. Returns (rejected_index, retry_after)."""
+        now = time.time() # Wall clock, since monotonic clocks aren't comparable across processes
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = {}
+                for key, _, _, _ in buckets:
+                    row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+                    if row:
+                        current[key] = row
+                updates, rejected, retry_after = _take_all(buckets, current, now)
+                conn.executemany("INSERT OR REPLACE INTO rate_buckets VALUES (?, ?, ?, ?)",
+                                 [(key, tokens, now, now + refill_seconds)
+                                  for key, (tokens, refill_seconds) in updates.items()])
+                self._takes += 1
+                if self._takes % self.PRUNE_EVERY == 0:
+                    conn.execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return rejected, retry_after
+        except sqlite3.Error as e:
+            logger.warning("Rate limit store unavailable, allowing request: %s", e)
+            return None, 0.0
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limits for the LLM-backed endpoints, applied per
+    user_id (when the request carries one) and per client IP. A request is
+    only admitted if every bucket has room, and only then are they debited,
+    so rejected requests don't use up quota.
+
+    The user_id comes from the request body (there is no authenticated
+    session), so a client can change it at will: the per-user limit only
+    keeps honest clients of one user from crowding out others, and the
+    per-IP limit is the one that holds against abuse. Behind a reverse
+    proxy the client IP is only right with TRUSTED_PROXY_COUNT set.
+
+    Each bucket holds up to `burst` tokens and refills at per_minute / 60
+    tokens per second; a request costs one token unless the view says
+    otherwise (e.g. one per answer in a batch).
+    """
+    def __init__(self, app=None):
+        self.enabled = False
+        self.limits = {}
+        self.store = None
+        self.allowed = 0
+        self.limited = {'user': 0, 'ip': 0}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.limits = {
+            'user': (app.config.get('RATE_LIMIT_USER_PER_MINUTE', 20) / 60.0, app.config.get('RATE_LIMIT_USER_BURST', 10)),
+            'ip': (app.config.get('RATE_LIMIT_IP_PER_MINUTE', 60) / 60.0, app.config.get('RATE_LIMIT_IP_BURST', 30))
+        }
+        if app.config.get('RATE_LIMIT_STORE', 'memory') == 'sqlite':
+            self.store = SQLiteBucketStore(app.config['RATE_LIMIT_STORE_PATH'])
+        else:
+            self.store = MemoryBucketStore()
+        app.extensions['rate_limiter'] = self
+
+    def check(self, user_id, ip_address, cost=1):
+        """
+        Takes `cost` tokens from each of the caller's buckets, or from none.
+        Returns (scope, retry_after) for the first bucket that is short, or (None, 0).
+        """
+        scopes, buckets = [], []
+        for scope, identity in (('ip', ip_address), ('user', user_id)):
+            if identity is None or identity == '':
+                continue
+            rate, burst = self.limits[scope]
+            scopes.append(scope)
+            buckets.append((f"{scope}:{identity}", min(cost, burst), rate, burst))
+        rejected, retry_after = self.store.take(buckets) if buckets else (None, 0.0)
+        if rejected is not None:
+            with self._lock:
+                self.limited[scopes[rejected]] += 1
+            return scopes[rejected], retry_after
+        with self._lock:
+            self.allowed += 1
+        return None, 0
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'store': type(self.store).__name__ if self.store else None,
+            'tracked_keys': len(self.store) if self.store else 0,
+            'allowed': self.allowed,
+            'limited': dict(self.limited)
+        }
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Too many concurrent LLM requests, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps how many LLM-backed requests a process serves at once.
+
+    Requests beyond max_concurrent wait in a bounded queue for up to
+    queue_timeout seconds. When the queue is full, or the wait runs out, the
+    request is shed with Overloaded, whose retry_after estimates how long
+    the current backlog takes to drain from the recent request durations.
+    This keeps latency for admitted requests predictable instead of letting
+    every thread pile onto the upstream API.
+    """
+    def __init__(self, app=None):
+        self.max_concurrent = 0
+        self.max_queue = 0
+        self.queue_timeout = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self._avg_duration = 5.0 # Seconds; moving average of admitted request durations
+        self._cond = threading.Condition()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_concurrent = app.config.get('LLM_ADMISSION_MAX_CONCURRENT', 32)
+        self.max_queue = app.config.get('LLM_ADMISSION_MAX_QUEUE', 64)
+        self.queue_timeout = app.config.get('LLM_ADMISSION_QUEUE_TIMEOUT_SECONDS', 10.0)
+        app.extensions['admission_controller'] = self
+
+    @property
+    def enabled(self):
+        return self.max_concurrent > 0
+
+    def _retry_after(self):
+        return max(1, math.ceil(self._avg_duration * (self.waiting + 1) / self.max_concurrent))
+
+    def acquire(self):
+        """Waits for a slot and returns the admission time for release(); raises Overloaded when shedding."""
+        with self._cond:
+            if self.in_flight >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    self.shed += 1
+                    raise Overloaded(self._retry_after())
+                self.waiting += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while self.in_flight >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.shed += 1
+                            raise Overloaded(self._retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+        return time.monotonic()
+
+    def release(self, admitted_at):
+        with self._cond:
+            self.in_flight -= 1
+            self._avg_duration += 0.1 * ((time.monotonic() - admitted_at) - self._avg_duration)
+            self._cond.notify()
+
+    def stats(self):
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'avg_duration_seconds': round(self._avg_duration, 3)
+        }
+
+    def collect_metrics(self):
+        return [
+            ('llm_admission_in_flight', 'gauge', 'LLM-backed requests currently admitted.', [({}, self.in_flight)]),
+            ('llm_admission_waiting', 'gauge', 'LLM-backed requests queued for admission.', [({}, self.waiting)])
+        ]
+
+
+def _too_many(message, retry_after, reason):
+    HTTP_REQUESTS_REJECTED.inc(endpoint=request.endpoint or 'unknown', reason=reason)
+    retry_after = max(1, math.ceil(retry_after))
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def _request_user_id():
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and data.get('user_id') is not None:
+        return str(data['user_id'])
+    return request.form.get('user_id')
+
+
+def llm_endpoint(cost=1):
+    """
+    Applies the per-user/IP rate limit and admission control to a view that
+    calls the LLM. `cost` is the number of tokens the request takes, or a
+    function of the request returning it. Streamed responses keep their
+    admission slot until the stream is closed.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is not None and limiter.enabled:
+                scope, retry_after = limiter.check(_request_user_id(), request.remote_addr,
+                                                   cost(request) if callable(cost) else cost)
+                if scope:
+                    return _too_many('Rate limit exceeded, please slow down.', retry_after, f'rate_limit_{scope}')
+
+            admission = current_app.extensions.get('admission_controller')
+            if admission is None or not admission.enabled:
+                return f(*args, **kwargs)
+            try:
+                admitted_at = admission.acquire()
+            except Overloaded as e:
+                return _too_many('The server is busy, please retry shortly.', e.retry_after, 'overloaded')
+            try:
+                response = make_response(f(*args, **kwargs))
+            except BaseException:
+                admission.release(admitted_at)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: admission.release(admitted_at))
+            else:
+                admission.release(admitted_at)
+            return response
+        return decorated
+    return decorator
@@ -0,0 +1,269 @@
+import atexit
+import copy
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows: shards are still merged on load, just never compacted
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+
+class HashedNgramEmbedder:
+    """
+    Embeds text as a signed feature-hashed bag of character 3-5-grams plus word
+    unigrams and bigrams, L2-normalized. It needs no model download and runs in
+    microseconds, and paraphrases with small edits (typos, filler words,
+    reordered clauses) keep most of their n-grams, so cosine similarity stays high.
+    """
+    def __init__(self, dim=1024, char_ngrams=(3, 4, 5)):
+        import numpy as np
+
+        self.np = np
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text):
+        text = _normalize(text)
+        words = _WORD.findall(text)
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        padded = f" {' '.join(words)} "
+        for n in self.char_ngrams:
+            features += [padded[i:i + n] for i in range(len(padded) - n + 1)]
+        return features
+
+    def embed(self, text):
+        np = self.np
+        hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in self._features(text)), dtype=np.uint32)
+        # The top bit picks the sign so colliding features tend to cancel out
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        vector = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim).astype(np.float32)
+        norm = self.np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticFeedbackCache:
+    """
+    Reuses answer feedback for near-duplicate answers to the same question.
+
+    Entries are grouped by a bucket key built from the normalized question text,
+    job title and interview type, so an answer is only compared with answers to
+    the same question in the same context. Vectors live in one preallocated
+    float32 matrix; a lookup is a single matrix-vector product over the rows of
+    its bucket, and a hit needs cosine similarity >= threshold. When the matrix
+    is full the oldest rows are overwritten.
+
+    With a path configured the index is persisted across restarts. Every
+    process (gunicorn worker) writes only the entries it added itself, to its
+    own shard <path>.<shard>.npy/.json, so workers exiting together don't
+    overwrite each other. On startup a process loads the compacted index
+    <path>.npy/.json plus every shard, then (under a file lock) writes the
+    merged result back as the compacted index and deletes the shards it read.
+    """
+    def __init__(self, threshold=0.95, dim=1024, max_entries=50000, path=None):
+        import numpy as np
+
+        self.np = np
+        self.threshold = threshold
+        self.embedder = HashedNgramEmbedder(dim=dim)
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._feedback = [None] * max_entries
+        self._bucket_of = [None] * max_entries
+        self._own = [False] * max_entries # Added by this process, so saved to its shard
+        self._buckets = {}
+        self._next_row = 0
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.shard = f"{path}.{os.getpid()}-{secrets.token_hex(4)}" if path else None
+        if path:
+            self.load()
+
+    def bucket_key(self, question, job_context):
+        payload = '\x1f'.join([
+            _normalize(question.get('question')),
+            _normalize(job_context.get('jobTitle')),
+            _normalize(job_context.get('interviewType'))
+        ])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _search(self, bucket, vector):
+        rows = self._buckets.get(bucket)
+        if not rows:
+            return None, 0.0
+        scores = self._vectors[rows] @ vector
+        best = int(self.np.argmax(scores))
+        return rows[best], float(scores[best])
+
+    def lookup(self, question, answer, job_context):
+        """
+        Returns (feedback, similarity) for the closest stored answer, or
+        (None, similarity) when nothing clears the threshold.
+        """
+        bucket = self.bucket_key(question, job_context)
+        vector = self.embedder.embed(answer)
+        with self._lock:
+            row, similarity = self._search(bucket, vector)
+            if row is None or similarity < self.threshold:
+                self.misses += 1
+                return None, similarity
+            self.hits += 1
+            return copy.deepcopy(self._feedback[row]), similarity
+
+    def get(self, question, answer, job_context):
+        return self.lookup(question, answer, job_context)[0]
+
+    def put(self, question, answer, job_context, feedback):
+        bucket = self.bucket_key(question, job_context)
+        vector = self.embedder.embed(answer)
+        with self._lock:
+            row, similarity = self._search(bucket, vector)
+            if row is not None and similarity >= 0.999:
+                return # Same answer already stored
+            self._insert(bucket, vector, copy.deepcopy(feedback))
+
+    def _insert(self, bucket, vector, feedback, own=True):
+        row = self._next_row
+        old_bucket = self._bucket_of[row]
+        if old_bucket is not None:
+            # Evict the oldest entry occupying this row
+            self._buckets[old_bucket].remove(row)
+            if not self._buckets[old_bucket]:
+                del self._buckets[old_bucket]
+        else:
+            self._size += 1
+        self._vectors[row] = vector
+        self._feedback[row] = feedback
+        self._bucket_of[row] = bucket
+        self._own[row] = own
+        self._buckets.setdefault(bucket, []).append(row)
+        self._next_row = (row + 1) % self.max_entries
+
+    def _rows(self, own_only=False):
+        # Occupied rows, oldest first
+        order = [(self._next_row + i) % self.max_entries for i in range(self.max_entries)]
+        return [row for row in order if self._bucket_of[row] is not None and (self._own[row] or not own_only)]
+
+    def _write(self, prefix, rows):
+        vectors = self._vectors[rows]
+        meta = {'dim': self.embedder.dim,
+                'entries': [{'bucket': self._bucket_of[row], 'feedback': self._feedback[row]} for row in rows]}
+        tmp = f".{os.getpid()}.tmp"
+        with open(f"{prefix}.npy{tmp}", 'wb') as f:
+            self.np.save(f, vectors)
+        with open(f"{prefix}.json{tmp}", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        # The .json goes last: loaders only look at files whose .json exists
+        os.replace(f"{prefix}.npy{tmp}", f"{prefix}.npy")
+        os.replace(f"{prefix}.json{tmp}", f"{prefix}.json")
+
+    def _read(self, prefix):
+        try:
+            with open(f"{prefix}.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            vectors = self.np.load(f"{prefix}.npy")
+        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning("Ignoring unreadable semantic cache at %s: %s", prefix, e)
+            return []
+        entries = meta.get('entries', [])
+        if meta.get('dim') != self.embedder.dim or len(entries) != len(vectors):
+            logger.warning("Ignoring semantic cache at %s: built with different settings", prefix)
+            return []
+        return list(zip(vectors, entries))
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield False
+            return
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """Writes the entries this process added to its shard file (no-op without a path)."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            rows = self._rows(own_only=True)
+            if rows:
+                self._write(self.shard, rows)
+
+    def load(self):
+        """Loads the compacted index and every worker's shard, and compacts them into one index."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._file_lock() as locked, self._lock:
+            shards = sorted((prefix[:-len('.json')] for prefix in glob.glob(f"{glob.escape(self.path)}.*.json")),
+                            key=lambda prefix: os.path.getmtime(f"{prefix}.json"))
+            for prefix in [self.path] + shards:
+                for vector, entry in self._read(prefix):
+                    row, similarity = self._search(entry['bucket'], vector)
+                    if row is None or similarity < 0.999: # Several workers may have cached the same answer
+                        self._insert(entry['bucket'], vector, entry['feedback'], own=False)
+            if not locked or not shards:
+                return
+            try:
+                self._write(self.path, self._rows())
+                for prefix in shards:
+                    for suffix in ('.json', '.npy'):
+                        os.remove(f"{prefix}{suffix}")
+            except OSError as e:
+                logger.warning("Could not compact semantic cache at %s: %s", self.path, e)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': self._size,
+            'buckets': len(self._buckets),
+            'threshold': self.threshold
+        }
+
+
+def build_semantic_cache(config):
+    """Creates the semantic feedback cache described by config, or None when disabled."""
+    if not getattr(config, 'SEMANTIC_CACHE_ENABLED', False):
+        return None
+    try:
+        import numpy # noqa: F401
+    except ImportError:
+        raise ImportError("SEMANTIC_CACHE_ENABLED requires numpy (pip install numpy)")
+    cache = SemanticFeedbackCache(
+        threshold=config.SEMANTIC_CACHE_THRESHOLD,
+        dim=config.SEMANTIC_CACHE_DIM,
+        max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES,
+        path=config.SEMANTIC_CACHE_PATH or None
+    )
+    if cache.path:
+        atexit.register(cache.save)
+    return cache
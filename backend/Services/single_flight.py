@@ -0,0 +1,140 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError: # Windows: cross-process coalescing is unavailable
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for the leader's result instead of
+    starting their own call. Each caller gets its own deep copy, and an
+    exception raised by the leader is raised in every waiter.
+
+    With lock_dir set, processes on the same host also coalesce: the leader
+    holds an exclusive flock on <lock_dir>/<key>.lock while it runs and leaves
+    its result in <key>.json for result_ttl seconds, so a process that was
+    blocked on the lock picks that result up instead of calling again.
+    """
+    def __init__(self, lock_dir=None, wait_timeout=120.0, result_ttl=30.0):
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        self.lock_dir = lock_dir if lock_dir and fcntl is not None else None
+        if lock_dir and fcntl is None:
+            logger.warning("Cross-process request coalescing needs fcntl; coalescing within this process only.")
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.coalesced_cross_process = 0
+        self.failures = 0
+
+    def do(self, key, fn):
+        """Returns fn()'s result, sharing one call among concurrent callers with the same key."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            return copy.deepcopy(future.result(self.wait_timeout))
+
+        try:
+            result = self._run_leader(key, fn)
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+        future.set_result(result)
+        return copy.deepcopy(result)
+
+    def _run_leader(self, key, fn):
+        if not self.lock_dir:
+            return fn()
+
+        with open(os.path.join(self.lock_dir, f"{key}.lock"), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is generating this key; wait for it, then reuse its result
+                self._wait_for_lock(lock_file)
+                shared = self._read_result(key)
+                if shared is not None:
+                    with self._lock:
+                        self.coalesced_cross_process += 1
+                    return shared
+            try:
+                result = fn()
+                self._write_result(key, result)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _wait_for_lock(self, lock_file):
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError("Timed out waiting for another process to finish the same request")
+                time.sleep(0.05)
+
+    def _result_path(self, key):
+        return os.path.join(self.lock_dir, f"{key}.json")
+
+    def _read_result(self, key):
+        path = self._result_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_result(self, key, result):
+        fd, tmp_path = tempfile.mkstemp(dir=self.lock_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self._result_path(key))
+        except (OSError, TypeError) as e:
+            logger.warning("Single-flight result write failed: %s", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self):
+        return {
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'coalesced_cross_process': self.coalesced_cross_process,
+            'failures': self.failures,
+            'in_flight': len(self._in_flight),
+            'cross_process': self.lock_dir is not None
+        }
@@ -0,0 +1,226 @@
+import re
+
+from sqlalchemy import and_, bindparam, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models import Skill, UserSkill, IndustrySkillCount, User, UserProfile
+
+MAX_SKILLS_PER_PROFILE = 50
+MAX_SEARCH_SKILLS = 5
+SKILL_NAME_MAX_LENGTH = 100
+# Common spellings that should land on the same tag
+SKILL_SYNONYMS = {'js': 'javascript', 'ts': 'typescript', 'golang': 'go', 'k8s': 'kubernetes',
+                  'postgres': 'postgresql', 'ml': 'machine learning', 'ai': 'artificial intelligence',
+                  'node': 'node.js', 'nodejs': 'node.js', 'react.js': 'react', 'reactjs': 'react'}
+_SEPARATORS = re.compile(r'[,;\n|•]+')
+
+
+def skill_slug(name):
+    slug = ' '.join(str(name or '').lower().split())[:SKILL_NAME_MAX_LENGTH]
+    return SKILL_SYNONYMS.get(slug, slug)
+
+
+def industry_key(industry):
+    return ' '.join(str(industry or '').lower().split())[:100]
+
+
+def parse_skills(skills):
+    """
+    Splits a profile's free-text skills ('Python, SQL; Leadership') into
+    {slug: display name}, in order, without duplicates. Lists are accepted too.
+    """
+    parts = skills if isinstance(skills, (list, tuple)) else _SEPARATORS.split(str(skills or ''))
+    parsed = {}
+    for part in parts:
+        name = ' '.join(str(part).split())[:SKILL_NAME_MAX_LENGTH]
+        slug = skill_slug(name)
+        if slug and slug not in parsed:
+            parsed[slug] = name if slug == name.lower() else slug # 'JS' is shown as 'javascript'
+            if len(parsed) >= MAX_SKILLS_PER_PROFILE:
+                break
+    return parsed
+
+
+def _dialect_insert(conn):
+    return {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(conn.dialect.name)
+
+
+def _resolve_skill_ids(conn, names):
+    """Returns {slug: skill_id}, creating the skills that don't exist yet."""
+    if not names:
+        return {}
+    slugs = sorted(names)
+    ids = dict(conn.execute(select(Skill.slug, Skill.skill_id).where(Skill.slug.in_(slugs))).all())
+    missing = [slug for slug in slugs if slug not in ids]
+    if missing:
+        rows = [{'slug': slug, 'name': names[slug], 'user_count': 0} for slug in missing]
+        dialect_insert = _dialect_insert(conn)
+        if dialect_insert:
+            # Another request may create the same skill concurrently; whichever commits first wins
+            conn.execute(dialect_insert(Skill).on_conflict_do_nothing(index_elements=['slug']), rows)
+        else:
+            conn.execute(insert(Skill), rows)
+        ids.update(conn.execute(select(Skill.slug, Skill.skill_id).where(Skill.slug.in_(missing))).all())
+    return ids
+
+
+def _apply_industry_deltas(conn, deltas):
+    rows = [{'industry_key': industry, 'skill_id': skill_id, 'user_count': delta}
+            for (industry, skill_id), delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    dialect_insert = _dialect_insert(conn)
+    if dialect_insert:
+        stmt = dialect_insert(IndustrySkillCount)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=['industry_key', 'skill_id'],
+            set_={'user_count': IndustrySkillCount.user_count + stmt.excluded.user_count}), rows)
+        return
+    for row in rows:
+        updated = conn.execute(update(IndustrySkillCount)
+                               .where(IndustrySkillCount.industry_key == row['industry_key'],
+                                      IndustrySkillCount.skill_id == row['skill_id'])
+                               .values(user_count=IndustrySkillCount.user_count + row['user_count']))
+        if not updated.rowcount:
+            conn.execute(insert(IndustrySkillCount), row)
+
+
+def sync_skills(conn, profiles):
+    """
+    Brings user_skills and the skill counts in line with profiles' free-text
+    skills, for any number of profiles in a fixed number of statements.
+
+    profiles is an iterable of (user_id, skills_text, industry). Runs on
+    `conn` (db.session.connection() in a request, so it commits with the
+    profile); rows are written in key order so concurrent updates touching
+    the same skills can't deadlock.
+    """
+    desired = {}
+    names = {}
+    for user_id, skills_text, industry in profiles:
+        parsed = parse_skills(skills_text)
+        desired[user_id] = (industry_key(industry), parsed)
+        for slug, name in parsed.items():
+            names.setdefault(slug, name)
+    if not desired:
+        return
+
+    ids = _resolve_skill_ids(conn, names)
+    current = {}
+    for user_id, skill_id, industry in conn.execute(
+            select(UserSkill.user_id, UserSkill.skill_id, UserSkill.industry_key)
+            .where(UserSkill.user_id.in_(sorted(desired)))):
+        current.setdefault(user_id, {})[skill_id] = industry
+
+    added, removed, moved = [], [], []
+    skill_deltas, industry_deltas = {}, {}
+    for user_id, (industry, parsed) in desired.items():
+        wanted = {ids[slug] for slug in parsed}
+        have = current.get(user_id, {})
+        for skill_id, old_industry in have.items():
+            if skill_id not in wanted:
+                removed.append({'u': user_id, 's': skill_id})
+                skill_deltas[skill_id] = skill_deltas.get(skill_id, 0) - 1
+            elif old_industry != industry:
+                moved.append({'u': user_id, 's': skill_id, 'industry': industry})
+                industry_deltas[(industry, skill_id)] = industry_deltas.get((industry, skill_id), 0) + 1
+            else:
+                continue
+            industry_deltas[(old_industry, skill_id)] = industry_deltas.get((old_industry, skill_id), 0) - 1
+        for skill_id in wanted - have.keys():
+            added.append({'user_id': user_id, 'skill_id': skill_id, 'industry_key': industry})
+            skill_deltas[skill_id] = skill_deltas.get(skill_id, 0) + 1
+            industry_deltas[(industry, skill_id)] = industry_deltas.get((industry, skill_id), 0) + 1
+
+    key = lambda row: (row.get('u', row.get('user_id')), row.get('s', row.get('skill_id')))
+    if removed:
+        conn.execute(delete(UserSkill).where(UserSkill.user_id == bindparam('u'), UserSkill.skill_id == bindparam('s')),
+                     sorted(removed, key=key))
+    if moved:
+        conn.execute(update(UserSkill).where(UserSkill.user_id == bindparam('u'), UserSkill.skill_id == bindparam('s'))
+                     .values(industry_key=bindparam('industry')), sorted(moved, key=key))
+    if added:
+        conn.execute(insert(UserSkill), sorted(added, key=key))
+    deltas = [{'s': skill_id, 'd': delta} for skill_id, delta in sorted(skill_deltas.items()) if delta]
+    if deltas:
+        conn.execute(update(Skill).where(Skill.skill_id == bindparam('s'))
+                     .values(user_count=Skill.user_count + bindparam('d')), deltas)
+    _apply_industry_deltas(conn, industry_deltas)
+
+
+def find_users_with_skills(skill_names, limit=50, after_user_id=None):
+    """
+    Users having every one of skill_names, in user_id order, `limit` at a time
+    (pass the last user_id as after_user_id for the next page).
+
+    The scan starts from the rarest of the skills and probes user_skills'
+    primary key for the others, so its cost follows the rarest skill and the
+    page size rather than the number of profiles.
+
+    Returns:
+        tuple: (skills, users) where skills are the matched Skill rows; users
+        is empty if any skill is unknown.
+    """
+    slugs = list(dict.fromkeys(skill_slug(name) for name in skill_names if skill_slug(name)))[:MAX_SEARCH_SKILLS]
+    if not slugs:
+        return [], []
+    skills = sorted(Skill.query.filter(Skill.slug.in_(slugs)).all(), key=lambda skill: skill.user_count)
+    if len(skills) < len(slugs) or skills[0].user_count <= 0:
+        return skills, []
+
+    driver = aliased(UserSkill)
+    query = (db.session.query(User.user_id, User.first_name, User.last_name,
+                              UserProfile.occupation, UserProfile.industry, UserProfile.experience_level)
+             .select_from(driver)
+             .filter(driver.skill_id == skills[0].skill_id))
+    for skill in skills[1:]:
+        other = aliased(UserSkill)
+        query = query.join(other, and_(other.user_id == driver.user_id, other.skill_id == skill.skill_id))
+    if after_user_id is not None:
+        query = query.filter(driver.user_id > after_user_id)
+    rows = (query.join(User, User.user_id == driver.user_id)
+            .outerjoin(UserProfile, UserProfile.user_id == driver.user_id)
+            .order_by(driver.user_id)
+            .limit(limit)
+            .all())
+    return skills, [row._asdict() for row in rows]
+
+
+def top_skills(industry=None, limit=10):
+    """Most common skills among profiles in `industry` (all profiles when None), most common first."""
+    if industry is None:
+        rows = (db.session.query(Skill.name, Skill.user_count)
+                .filter(Skill.user_count > 0)
+                .order_by(Skill.user_count.desc())
+                .limit(limit))
+    else:
+        rows = (db.session.query(Skill.name, IndustrySkillCount.user_count)
+                .join(Skill, Skill.skill_id == IndustrySkillCount.skill_id)
+                .filter(IndustrySkillCount.industry_key == industry_key(industry), IndustrySkillCount.user_count > 0)
+                .order_by(IndustrySkillCount.user_count.desc())
+                .limit(limit))
+    return [{'skill': name, 'user_count': count} for name, count in rows]
+
+
+def skill_gaps(profile, limit=3):
+    """Top skills in the profile's industry that the profile doesn't list, for practice recommendations."""
+    if not profile or not profile.industry:
+        return []
+    have = set(parse_skills(profile.skills))
+    candidates = top_skills(profile.industry, limit=limit + len(have))
+    return [entry['skill'] for entry in candidates if skill_slug(entry['skill']) not in have][:limit]
+
+
+def rebuild_counts():
+    """Recomputes skills.user_count and industry_skill_counts from user_skills, e.g. after deleting users."""
+    conn = db.session.connection()
+    counts = select(UserSkill.skill_id, func.count().label('n')).group_by(UserSkill.skill_id).subquery()
+    conn.execute(update(Skill).values(user_count=func.coalesce(
+        select(counts.c.n).where(counts.c.skill_id == Skill.skill_id).scalar_subquery(), 0)))
+    conn.execute(delete(IndustrySkillCount))
+    conn.execute(insert(IndustrySkillCount).from_select(
+        ['industry_key', 'skill_id', 'user_count'],
+        select(UserSkill.industry_key, UserSkill.skill_id, func.count()).group_by(UserSkill.industry_key, UserSkill.skill_id)))
+    db.session.commit()
@@ -0,0 +1,128 @@
+import math
+import re
+import threading
+
+# Output budget per generated question object (question, importance, tips,
+# interviewer_expectations, complexity) and for the surrounding JSON.
+TOKENS_PER_QUESTION = 220
+QUESTION_SET_OVERHEAD_TOKENS = 30
+# Output budget for one answer's feedback (3 strengths, 3 improvements, score, summary)
+TOKENS_PER_FEEDBACK = 350
+BATCH_SUMMARY_TOKENS = 200
+# Headroom so a slightly verbose response isn't cut off mid-JSON
+OUTPUT_MARGIN = 1.25
+MAX_COMPLETION_TOKENS = 6000
+
+DEFAULT_QUESTION_COUNT = 5
+MAX_QUESTION_COUNT = 10
+
+_PIECE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+_ENCODING = None
+_ENCODING_LOADED = False
+_ENCODING_LOCK = threading.Lock()
+
+
+def get_encoding():
+    """
+    The tiktoken encoding, loaded on first use since reading the BPE ranks
+    takes a noticeable part of worker boot. None when tiktoken isn't installed.
+    """
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        with _ENCODING_LOCK:
+            if not _ENCODING_LOADED:
+                try:
+                    import tiktoken
+                    _ENCODING = tiktoken.get_encoding('cl100k_base') # Close to the Llama 3 tokenizer for English text
+                except Exception: # tiktoken is optional; fall back to the heuristic in estimate_tokens
+                    _ENCODING = None
+                _ENCODING_LOADED = True
+    return _ENCODING
+
+
+def estimate_tokens(text):
+    """
+    Estimates the token count of text. Uses tiktoken when installed, otherwise
+    a local approximation of BPE: one token per punctuation mark or 3-digit
+    group, and one token per ~6 letters of each word.
+    """
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        tokens += math.ceil(len(piece) / 6) if piece[0].isalpha() else 1
+    return tokens
+
+
+def question_count(job_data):
+    """Number of questions requested in job_data ('questionCount'), clamped to 1..MAX_QUESTION_COUNT."""
+    try:
+        count = int(job_data.get('questionCount') or DEFAULT_QUESTION_COUNT)
+    except (TypeError, ValueError):
+        count = DEFAULT_QUESTION_COUNT
+    return max(1, min(count, MAX_QUESTION_COUNT))
+
+
+def _with_margin(tokens):
+    return min(int(tokens * OUTPUT_MARGIN), MAX_COMPLETION_TOKENS)
+
+
+def question_max_tokens(count):
+    return _with_margin(QUESTION_SET_OVERHEAD_TOKENS + TOKENS_PER_QUESTION * count)
+
+
+def analysis_max_tokens():
+    return _with_margin(TOKENS_PER_FEEDBACK)
+
+
+def batch_analysis_max_tokens(answers):
+    return _with_margin(TOKENS_PER_FEEDBACK * answers + BATCH_SUMMARY_TOKENS)
+
+
+class UsageRecorder:
+    """
+    Per-(operation, model) totals of LLM calls: prompt/completion tokens as
+    reported by the API (or estimated for streamed calls, which don't report
+    usage), the local prompt estimate, and latency.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, operation, model, latency, prompt_tokens=None, completion_tokens=None,
+               estimated_prompt_tokens=None, estimated=False, failed=False):
+        with self._lock:
+            entry = self._totals.setdefault((operation, model), {
+                'calls': 0,
+                'failures': 0,
+                'estimated_calls': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'estimated_prompt_tokens': 0,
+                'latency_seconds_total': 0.0,
+                'latency_seconds_max': 0.0
+            })
+            entry['calls'] += 1
+            entry['failures'] += int(failed)
+            entry['estimated_calls'] += int(estimated)
+            entry['prompt_tokens'] += prompt_tokens or 0
+            entry['completion_tokens'] += completion_tokens or 0
+            entry['estimated_prompt_tokens'] += estimated_prompt_tokens or 0
+            entry['latency_seconds_total'] += latency
+            entry['latency_seconds_max'] = max(entry['latency_seconds_max'], latency)
+
+    def stats(self):
+        with self._lock:
+            rows = [dict(entry, operation=operation, model=model) for (operation, model), entry in self._totals.items()]
+        for row in rows:
+            succeeded = row['calls'] - row['failures']
+            row['latency_seconds_avg'] = round(row['latency_seconds_total'] / row['calls'], 3)
+            row['latency_seconds_total'] = round(row['latency_seconds_total'], 3)
+            row['latency_seconds_max'] = round(row['latency_seconds_max'], 3)
+            row['avg_prompt_tokens'] = round(row['prompt_tokens'] / succeeded) if succeeded else 0
+            row['avg_completion_tokens'] = round(row['completion_tokens'] / succeeded) if succeeded else 0
+        return sorted(rows, key=lambda row: (row['operation'], row['model']))
@@ -1,7 +1,14 @@
+import click
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
-from extensions import db, cors
+from extensions import db, cors, auth_log_writer, password_hasher, rate_limiter, admission_controller, db_router, response_cache
+from utils import install_query_counter
+from logging_config import configure_logging
+from responses import FastJSONProvider, install_compression
+from Services.metrics import registry, install_request_metrics
+from Services import job_queue
 # Import models to ensure they are known to SQLAlchemy, especially for db.create_all()
 from models import User, UserProfile, UserAuthLog 
 
@@ -10,15 +17,39 @@ from routes.auth_routes import auth_bp
 from routes.user_routes import user_bp
 from routes.interview_routes import interview_bp
 from routes.main_routes import main_bp
+from routes.skill_routes import skill_bp
+from routes.dev_routes import dev_bp
 import os
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    if app.config['TRUSTED_PROXY_COUNT']:
+        # request.remote_addr becomes the client's address rather than the proxy's
+        proxies = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+    configure_logging(app)
+    app.json = FastJSONProvider(app)
 
     # Initialize Flask extensions
     db.init_app(app)
+    db_router.init_app(app, db)
+    install_query_counter(app, db)
+    install_request_metrics(app)
+    if app.config.get('COMPRESS_ENABLED'):
+        install_compression(app)
+    auth_log_writer.init_app(app)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
+    admission_controller.init_app(app)
+    response_cache.init_app(app)
+    registry.register_collector('auth_log_writer', auth_log_writer.collect_metrics)
+    registry.register_collector('admission_controller', admission_controller.collect_metrics)
+    registry.register_collector('llm_jobs', job_queue.collect_metrics)
+    registry.register_collector('response_cache', response_cache.collect_metrics)
+    if db_router.enabled:
+        registry.register_collector('db_router', db_router.collect_metrics)
     cors.init_app(app, resources={r"/api/*": {"origins": app.config.get("CORS_ORIGINS", "*")}})
     # Note: GroqService is initialized within interview_routes.py using Config
 
@@ -27,16 +58,84 @@ def create_app(config_class=Config):
     app.register_blueprint(user_bp)
     app.register_blueprint(interview_bp)
     app.register_blueprint(main_bp)
+    app.register_blueprint(skill_bp)
+    if app.config['SEED_ENDPOINT_ENABLED']:
+        app.register_blueprint(dev_bp)
 
-    # Create database tables if they don't exist
-    # This requires the app context
-    with app.app_context():
-        db.create_all() 
-        # You might want to move db.create_all() to a separate CLI command 
-        # for better control in production environments (e.g., using Flask-Migrate).
+    # Schema changes are not part of startup; run `flask --app app migrate` once per deploy.
+    # Booting a worker only sets things up, it doesn't touch the database or the LLM API.
+    def migration_runner():
+        from Services.migrations import MigrationRunner
+        return MigrationRunner(
+            db.engine, log=print,
+            lock_timeout_ms=app.config['MIGRATION_LOCK_TIMEOUT_MS'],
+            lock_retries=app.config['MIGRATION_LOCK_RETRIES'],
+            batch_size=app.config['MIGRATION_BATCH_SIZE'],
+            batch_sleep=app.config['MIGRATION_BATCH_SLEEP_SECONDS'],
+            batch_target_seconds=app.config['MIGRATION_BATCH_TARGET_SECONDS']
+        )
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Creates any missing database tables, then applies pending migrations."""
+        db.create_all()
+        print("Database tables created.")
+        migration_runner().run()
+
+    @app.cli.command('migrate')
+    @click.option('--target', default=None, help='Stop after this version (e.g. 0002).')
+    def migrate_command(target):
+        """Applies pending schema migrations from migrations/."""
+        applied = migration_runner().run(target=target)
+        print(f"Applied {len(applied)} migrations." if applied else "Database is up to date.")
+
+    @app.cli.command('migrate-status')
+    def migrate_status_command():
+        """Lists migrations and when each was applied."""
+        for migration, row in migration_runner().status():
+            state = f"applied {row.applied_at:%Y-%m-%d %H:%M} ({row.duration_seconds}s)" if row else 'pending'
+            print(f"{migration.version}_{migration.name}: {state}")
+
+    @app.cli.command('warm-question-bank')
+    def warm_question_bank_command():
+        """Pre-generates question bank entries for the most requested roles."""
+        from routes.interview_routes import get_groq_service
+        from Services.question_bank import warm_question_bank
+        groq_service = get_groq_service()
+        if not groq_service:
+            print("Groq service not configured. Missing API Key.")
+            return
+        added = warm_question_bank(groq_service, limit=app.config['QUESTION_BANK_WARM_ROLES'],
+                                   target_per_role=app.config['QUESTION_BANK_TARGET_PER_ROLE'])
+        print(f"Added {added} questions to the bank.")
+
+    @app.cli.command('rebuild-skill-counts')
+    def rebuild_skill_counts_command():
+        """Recomputes the per-skill and per-industry profile counts from user_skills."""
+        from Services import skills
+        skills.rebuild_counts()
+        print("Skill counts rebuilt.")
+
+    @app.cli.command('prune-question-cache')
+    def prune_question_cache_command():
+        """Deletes expired and surplus question sets from the shared question cache tier."""
+        from Services.question_cache import build_question_cache
+        question_cache = build_question_cache(config_class)
+        shared_store = question_cache.shared_store if question_cache else None
+        if shared_store is None:
+            print("No shared question cache configured (QUESTION_CACHE_BACKEND is not 'sql' or 'file').")
+            return
+        print(f"Deleted {shared_store.prune()} question cache entries.")
+
+    @app.cli.command('prune-auth-logs')
+    def prune_auth_logs():
+        """Deletes auth log rows older than AUTH_LOG_RETENTION_DAYS."""
+        deleted = auth_log_writer.prune(retention_days=app.config['AUTH_LOG_RETENTION_DAYS'] or None)
+        print(f"Deleted {deleted} auth log rows.")
 
     return app
 
 if __name__ == '__main__':
+    # Development server only; production runs wsgi:app under gunicorn (see gunicorn.conf.py)
     app = create_app()
-    app.run(debug=True, port=os.environ.get("PORT", 5000)) # Use environment variable for port if available
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG', 'true').lower() == 'true', port=os.environ.get("PORT", 5000)) # Use environment variable for port if available
\ No newline at end of file
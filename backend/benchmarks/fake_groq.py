@@ -0,0 +1,196 @@
+"""
+Local stand-in for the Groq chat completions API, for load tests and
+benchmarks. It answers POST /openai/v1/chat/completions like the real API
+(including stream=True), shaping its output after the prompt: question sets
+for generation prompts, one feedback object for single analysis and a
+results list for batch analysis.
+
+Latency, error rate and malformed-JSON rate are configurable, so the app's
+retry, fallback and parse-failure paths can be exercised.
+
+Usage (from backend/):
+    python -m benchmarks.fake_groq --port 8900 --latency 0.8 --jitter 0.4 --error-rate 0.02 --malformed-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8900 GROQ_API_KEY=fake python app.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = '/openai/v1/chat/completions'
+
+
+def _question(i, title):
+    return {
+        'id': i,
+        'question': f"Question {i}: describe how you would handle a challenging {title} task (variant {random.randint(1, 10 ** 6)}).",
+        'importance': 'Shows how the candidate approaches real problems in this role.',
+        'tips': 'Use a concrete example, explain your reasoning and the outcome.',
+        'interviewer_expectations': 'Structured thinking, ownership and clear communication.',
+        'complexity': random.choice(['low', 'medium', 'high'])
+    }
+
+
+def _feedback():
+    return {
+        'strengths': ['Clear structure', 'Relevant example', 'Confident delivery'],
+        'improvements': ['Quantify the impact', 'Mention trade-offs', 'Be more concise'],
+        'score': random.randint(40, 95),
+        'summary': 'A solid answer that would be stronger with measurable results and a clearer conclusion.'
+    }
+
+
+def build_content(prompt):
+    """Returns a JSON document shaped like the app expects for this prompt."""
+    match = re.search(r"Generate exactly (\d+) interview questions", prompt)
+    if match:
+        title = re.search(r"role of '([^']*)'", prompt)
+        title = title.group(1) if title else 'professional'
+        return json.dumps({'questions': [_question(i, title) for i in range(1, int(match.group(1)) + 1)]})
+    match = re.search(r"Analyze the following (\d+) interview responses", prompt)
+    if match:
+        results = [dict(_feedback(), index=i) for i in range(int(match.group(1)))]
+        return json.dumps({'results': results, 'overall_summary': 'Consistent answers overall.'})
+    return json.dumps(_feedback())
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.5, jitter=0.2, error_rate=0.0, malformed_rate=0.0,
+                 stream_chunk_delay=0.01):
+        super().__init__(address, FakeGroqHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.stream_chunk_delay = stream_chunk_delay
+        self.requests = 0
+        self.errors = 0
+        self.malformed = 0
+        self._lock = threading.Lock()
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real API behind the app's connection pool
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {'error': {'message': 'Invalid JSON body'}})
+            return
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+
+        server.count('requests')
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+        if random.random() < server.error_rate:
+            server.count('errors')
+            self._send_json(503, {'error': {'message': 'Service unavailable (simulated)', 'type': 'server_error'}})
+            return
+
+        model = request.get('model', 'llama3-70b-8192')
+        prompt = (request.get('messages') or [{}])[-1].get('content', '')
+        content = build_content(prompt)
+        if random.random() < server.malformed_rate:
+            server.count('malformed')
+            content = content[:random.randint(1, len(content) - 1)] # Cut off mid-document
+
+        completion_tokens = max(1, len(content) // 4)
+        prompt_tokens = max(1, sum(len(m.get('content', '')) for m in request.get('messages', [])) // 4)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if request.get('stream'):
+            self._stream(completion_id, created, model, content)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        })
+
+    def _stream(self, completion_id, created, model, content):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                     'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        event({'role': 'assistant', 'content': ''})
+        for start in range(0, len(content), 40):
+            event({'content': content[start:start + 40]})
+            time.sleep(self.server.stream_chunk_delay)
+        event({}, finish_reason='stop')
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_fake_groq(host='127.0.0.1', port=0, **options):
+    """Starts a FakeGroqServer on a background thread and returns it (port=0 picks a free port)."""
+    server = FakeGroqServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='fake-groq', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.5, help='mean seconds before responding')
+    parser.add_argument('--jitter', type=float, default=0.2, help='uniform +/- seconds around the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of calls answered with HTTP 503')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='share of responses with truncated JSON')
+    args = parser.parse_args()
+
+    server = FakeGroqServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, malformed_rate=args.malformed_rate)
+    print(f"Fake Groq API listening on {server.url} (set GROQ_BASE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Response serialization cost of the login/profile and interview payloads,
+comparing the previous path (hand-written to_dict with isoformat() per
+datetime, encoded by Flask's default stdlib provider) with the serializers
+and FastJSONProvider, plus gzip/brotli size and time for a large payload.
+
+Models are built in memory, so no database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.json_serialization
+    python -m benchmarks.json_serialization --iterations 20000 --questions 10
+"""
+import argparse
+import gzip
+import time
+from datetime import datetime, timezone
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models import User, UserProfile, InterviewAnswer, AnswerFeedbackItem
+from responses import FastJSONProvider, orjson, brotli
+
+
+def legacy_user_dict(user):
+    # The to_dict implementation before serializers.py, kept here as the baseline
+    profile = user.profile
+    return {
+        'user_id': user.user_id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+        'last_login_at': user.last_login_at.isoformat() if user.last_login_at else None,
+        'profile': {
+            'profile_id': profile.profile_id,
+            'user_id': profile.user_id,
+            'occupation': profile.occupation,
+            'industry': profile.industry,
+            'experience_level': profile.experience_level,
+            'interview_goal': profile.interview_goal,
+            'skills': profile.skills,
+            'location': profile.location,
+            'linkedin_url': profile.linkedin_url,
+            'github_url': profile.github_url,
+            'portfolio_url': profile.portfolio_url,
+            'bio': profile.bio,
+            'updated_at': profile.updated_at.isoformat() if profile.updated_at else None
+        }
+    }
+
+
+def legacy_answer_dict(answer):
+    return {
+        'answer_id': answer.answer_id,
+        'session_id': answer.session_id,
+        'question_position': answer.question_position,
+        'answer_text': answer.answer_text,
+        'score': answer.score,
+        'summary': answer.summary,
+        'strengths': [item.text for item in answer.feedback_items if item.kind == 'strength'],
+        'improvements': [item.text for item in answer.feedback_items if item.kind == 'improvement'],
+        'duration_seconds': answer.duration_seconds,
+        'created_at': answer.created_at.isoformat() if answer.created_at else None
+    }
+
+
+def build_user():
+    now = datetime.now(timezone.utc)
+    user = User(user_id=42, first_name='Ada', last_name='Lovelace', email='ada@example.com',
+                created_at=now, last_login_at=now)
+    user.profile = UserProfile(profile_id=7, user_id=42, occupation='Software Engineer', industry='Technology',
+                               experience_level='senior', interview_goal='Staff engineer role',
+                               skills='Python, SQL, Distributed systems, Leadership', location='London',
+                               linkedin_url='https://linkedin.com/in/ada', github_url='https://github.com/ada',
+                               portfolio_url='https://ada.dev', bio='Engineer who enjoys hard problems. ' * 5,
+                               updated_at=now)
+    return user
+
+
+def build_answers(count):
+    now = datetime.now(timezone.utc)
+    answers = []
+    for i in range(count):
+        answer = InterviewAnswer(answer_id=i + 1, session_id=3, user_id=42, question_position=i,
+                                 answer_text='In my last role I led the migration of our billing service. ' * 6,
+                                 score=70 + i % 20, summary='A solid, structured answer with a clear outcome.',
+                                 duration_seconds=90, created_at=now)
+        answer.feedback_items = [AnswerFeedbackItem(kind='strength', text=f'Strength {j}') for j in range(3)] + \
+                                [AnswerFeedbackItem(kind='improvement', text=f'Improvement {j}') for j in range(3)]
+        answers.append(answer)
+    return answers
+
+
+def build_questions(count):
+    return {'questions': [{
+        'id': i,
+        'question': f'Question {i}: describe how you would design a rate limiter for a public API.',
+        'importance': 'Shows system design depth and awareness of trade-offs.',
+        'tips': 'Start from requirements, compare algorithms, then discuss failure modes.',
+        'interviewer_expectations': 'Token bucket or sliding window, distributed state, clear reasoning.',
+        'complexity': 'high'
+    } for i in range(1, count + 1)], 'interview_id': 3}
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--questions', type=int, default=10, help='questions in the generated set payload')
+    parser.add_argument('--answers', type=int, default=20, help='answers in the history payload')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    legacy = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    user = build_user()
+    answers = build_answers(args.answers)
+    questions = build_questions(args.questions)
+
+    print(f"Fast provider backend: {fast.backend}\n")
+    print(f"{'payload':<28} {'legacy us':>10} {'new us':>10} {'speedup':>8}")
+    cases = [
+        ('user + profile', lambda: legacy.dumps(legacy_user_dict(user)),
+         lambda: fast.dumps(user.to_dict(include_profile=True))),
+        (f'{args.answers} answers', lambda: legacy.dumps([legacy_answer_dict(a) for a in answers]),
+         lambda: fast.dumps([a.to_dict() for a in answers])),
+        (f'{args.questions} questions', lambda: legacy.dumps(questions), lambda: fast.dumps(questions)),
+        ('parse question form blob', lambda: legacy.loads(legacy.dumps(questions['questions'][0])),
+         lambda: fast.loads(fast.dumps(questions['questions'][0]))),
+    ]
+    for name, old, new in cases:
+        old_us, new_us = timed(old, args.iterations), timed(new, args.iterations)
+        print(f"{name:<28} {old_us:>10.1f} {new_us:>10.1f} {old_us / new_us:>7.1f}x")
+
+    body = fast.dumps({'answers': [a.to_dict() for a in answers], **questions}).encode('utf-8')
+    print(f"\nCompression of a {len(body)} byte payload:")
+    print(f"{'encoding':<14} {'bytes':>8} {'ratio':>7} {'us':>9}")
+    codecs = [(f'gzip-{level}', lambda level=level: gzip.compress(body, compresslevel=level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        codecs += [(f'br-{quality}', lambda quality=quality: brotli.compress(body, quality=quality)) for quality in (1, 4, 11)]
+    for name, compress in codecs:
+        size = len(compress())
+        print(f"{name:<14} {size:>8} {len(body) / size:>6.1f}x {timed(compress, max(1, args.iterations // 50)):>9.1f}")
+    if orjson is None or brotli is None:
+        print("\n(orjson and/or brotli are not installed; their rows fall back or are skipped)")
+
+
+if __name__ == '__main__':
+    main()
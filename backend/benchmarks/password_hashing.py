@@ -0,0 +1,60 @@
+"""
+Password hashing throughput per method, to size login capacity.
+
+Usage (from backend/):
+    python -m benchmarks.password_hashing
+    python -m benchmarks.password_hashing --methods scrypt pbkdf2:sha256:600000 --seconds 3 --threads 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHODS = [
+    'scrypt', # werkzeug default, scrypt:32768:8:1
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:1000000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+]
+
+
+def measure(method, seconds, threads):
+    pwhash = generate_password_hash('benchmark-password', method=method)
+
+    def worker(deadline):
+        count = 0
+        while time.perf_counter() < deadline:
+            check_password_hash(pwhash, 'benchmark-password')
+            count += 1
+        return count
+
+    # Single call latency
+    start = time.perf_counter()
+    check_password_hash(pwhash, 'benchmark-password')
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    deadline = time.perf_counter() + seconds
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        total = sum(executor.map(worker, [deadline] * threads))
+    per_second = total / seconds
+    return latency_ms, per_second, per_second / threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'method':<26} {'verify ms':>10} {'verifies/s':>12} {'per core/s':>12}   ({args.threads} threads)")
+    for method in args.methods:
+        latency_ms, per_second, per_core = measure(method, args.seconds, args.threads)
+        print(f"{method:<26} {latency_ms:>10.1f} {per_second:>12.1f} {per_core:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Estimated prompt size and completion budget for each GroqService prompt, to
+check the effect of prompt or budget changes before they reach production.
+Real per-call usage is reported by /api/interview/usage-stats.
+
+Usage (from backend/):
+    python -m benchmarks.prompt_tokens
+    python -m benchmarks.prompt_tokens --counts 3 5 10 --answer-words 250
+"""
+import argparse
+
+from Services.groq_service import GroqService, QUESTION_SYSTEM_ROLE, ANALYSIS_SYSTEM_ROLE
+from Services.token_budget import (estimate_tokens, question_max_tokens, analysis_max_tokens,
+                                   batch_analysis_max_tokens, get_encoding)
+
+JOB_DATA = {'jobTitle': 'Senior Software Engineer', 'companyIndustry': 'Fintech', 'interviewType': 'technical'}
+QUESTION = {
+    'question': 'Describe a time you had to debug a production incident under pressure.',
+    'interviewer_expectations': 'A structured approach, clear communication and lessons learned.'
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[3, 5, 10], help='questions per generated set')
+    parser.add_argument('--answer-words', type=int, default=150)
+    parser.add_argument('--batch-size', type=int, default=5)
+    args = parser.parse_args()
+
+    # Prompt builders don't touch the client, so no pool or API key is needed
+    service = GroqService.__new__(GroqService)
+    answer = " ".join(["word"] * args.answer_words)
+    system_question = estimate_tokens(QUESTION_SYSTEM_ROLE)
+    system_analysis = estimate_tokens(ANALYSIS_SYSTEM_ROLE)
+
+    print(f"Estimator: {'tiktoken cl100k_base' if get_encoding() is not None else 'local heuristic'}\n")
+    print(f"{'operation':<32} {'prompt tokens':>14} {'max_tokens':>11}")
+    for count in args.counts:
+        prompt = service.build_prompt(dict(JOB_DATA, questionCount=count))
+        print(f"{f'generate_questions ({count})':<32} {system_question + estimate_tokens(prompt):>14} "
+              f"{question_max_tokens(count):>11}")
+
+    prompt = service.build_analysis_prompt(QUESTION, answer, JOB_DATA)
+    print(f"{'analyze_response':<32} {system_analysis + estimate_tokens(prompt):>14} {analysis_max_tokens():>11}")
+
+    items = [{'question': QUESTION, 'answer': answer}] * args.batch_size
+    prompt = service.build_batch_analysis_prompt(items, JOB_DATA)
+    print(f"{f'analyze_batch ({args.batch_size})':<32} {system_analysis + estimate_tokens(prompt):>14} "
+          f"{batch_analysis_max_tokens(args.batch_size):>11}")
+
+
+if __name__ == '__main__':
+    main()
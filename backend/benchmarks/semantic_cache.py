@@ -0,0 +1,168 @@
+"""
+Precision/recall and lookup latency of the semantic feedback cache, to tune
+SEMANTIC_CACHE_THRESHOLD.
+
+Each stored answer gets near-duplicate probes (typos, filler words, casing,
+punctuation, a dropped or swapped sentence) that should hit, and probes built
+from other answers to the same question that should miss. A hit on a
+near-duplicate counts as a true positive; a hit on a different answer is a
+false positive, i.e. feedback that would be served for the wrong answer.
+
+Usage (from backend/):
+    python -m benchmarks.semantic_cache
+    python -m benchmarks.semantic_cache --answers 400 --thresholds 0.9 0.95 0.97 --index-size 50000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from Services.semantic_cache import SemanticFeedbackCache
+
+QUESTION = {'question': 'Tell me about yourself.'}
+JOB_CONTEXT = {'jobTitle': 'Software Engineer', 'interviewType': 'behavioral'}
+FEEDBACK = {'strengths': [], 'improvements': [], 'score': 70, 'summary': ''}
+
+OPENINGS = ["I'm a", "I am a", "Currently I work as a", "For the last few years I've been a", "I'm currently a"]
+ROLES = ["backend engineer", "frontend developer", "data engineer", "full-stack developer", "mobile developer",
+         "site reliability engineer", "QA automation engineer", "machine learning engineer"]
+YEARS = ["two", "three", "four", "five", "six", "eight", "ten"]
+STACKS = ["Python and Django", "Java and Spring", "React and TypeScript", "Go and Kubernetes", "Swift and Kotlin",
+          "Spark and Airflow", "Node.js and PostgreSQL", "PyTorch and scikit-learn"]
+WINS = ["cut our API latency in half", "led the migration to microservices", "built the payments integration",
+        "introduced automated testing that reduced regressions", "mentored three junior engineers",
+        "launched a recommendation feature used by millions", "redesigned the onboarding flow",
+        "scaled the data pipeline to billions of events"]
+GOALS = ["I'm looking for a team where I can own larger projects.", "I want to grow into a tech lead role.",
+         "I'm excited about working on products with real user impact.", "I'd like to go deeper into distributed systems.",
+         "I enjoy collaborating closely with product and design."]
+FILLERS = ["um", "so", "basically", "like", "you know", "actually"]
+
+
+def make_answer(rng):
+    return (f"{rng.choice(OPENINGS)} {rng.choice(ROLES)} with {rng.choice(YEARS)} years of experience "
+            f"working mostly with {rng.choice(STACKS)}. At my current company I {rng.choice(WINS)}, "
+            f"and before that I {rng.choice(WINS)}. {rng.choice(GOALS)}")
+
+
+def typo(rng, text):
+    words = text.split()
+    for _ in range(max(1, len(words) // 15)):
+        i = rng.randrange(len(words))
+        word = words[i]
+        if len(word) > 3:
+            j = rng.randrange(len(word) - 1)
+            words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+
+def fillers(rng, text):
+    words = text.split()
+    for _ in range(3):
+        words.insert(rng.randrange(len(words)), rng.choice(FILLERS))
+    return " ".join(words)
+
+
+def casing(rng, text):
+    return text.lower().replace(".", "").replace(",", "")
+
+
+def swap_sentences(rng, text):
+    sentences = [s for s in text.split(". ") if s]
+    rng.shuffle(sentences)
+    return ". ".join(sentences)
+
+
+def drop_sentence(rng, text):
+    sentences = [s for s in text.split(". ") if s]
+    if len(sentences) > 2:
+        sentences.pop(rng.randrange(len(sentences)))
+    return ". ".join(sentences)
+
+
+PARAPHRASES = [typo, fillers, casing, swap_sentences, drop_sentence]
+
+
+def build_dataset(n, seed):
+    rng = random.Random(seed)
+    stored = []
+    seen = set()
+    while len(stored) < n:
+        answer = make_answer(rng)
+        if answer not in seen:
+            seen.add(answer)
+            stored.append(answer)
+    positives = [(i, rng.choice(PARAPHRASES)(rng, answer)) for i, answer in enumerate(stored)]
+    negatives = []
+    while len(negatives) < n:
+        answer = make_answer(rng)
+        if answer not in seen:
+            seen.add(answer)
+            negatives.append(answer)
+    return stored, positives, negatives
+
+
+def evaluate(stored, positives, negatives, threshold, dim):
+    cache = SemanticFeedbackCache(threshold=threshold, dim=dim, max_entries=len(stored))
+    for i, answer in enumerate(stored):
+        cache.put(QUESTION, answer, JOB_CONTEXT, dict(FEEDBACK, summary=str(i)))
+
+    true_positives = wrong_matches = 0
+    for i, probe in positives:
+        feedback = cache.get(QUESTION, probe, JOB_CONTEXT)
+        if feedback is not None:
+            if feedback['summary'] == str(i):
+                true_positives += 1
+            else:
+                wrong_matches += 1
+    false_positives = sum(1 for probe in negatives if cache.get(QUESTION, probe, JOB_CONTEXT) is not None)
+
+    served = true_positives + wrong_matches + false_positives
+    precision = true_positives / served if served else 1.0
+    recall = true_positives / len(positives)
+    return precision, recall, false_positives / len(negatives)
+
+
+def measure_latency(index_size, bucket_size, dim, samples, seed):
+    """Lookup latency with index_size entries spread over buckets of bucket_size answers."""
+    rng = random.Random(seed)
+    cache = SemanticFeedbackCache(threshold=0.95, dim=dim, max_entries=index_size)
+    questions = [{'question': f"Question {q}"} for q in range(max(1, index_size // bucket_size))]
+    for i in range(index_size):
+        cache.put(questions[i % len(questions)], make_answer(rng), JOB_CONTEXT, FEEDBACK)
+
+    timings = []
+    for _ in range(samples):
+        question = rng.choice(questions)
+        answer = make_answer(rng)
+        start = time.perf_counter()
+        cache.get(question, answer, JOB_CONTEXT)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--answers', type=int, default=300, help='stored answers for one question')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.85, 0.88, 0.9, 0.92, 0.94, 0.95, 0.96, 0.98])
+    parser.add_argument('--dim', type=int, default=1024)
+    parser.add_argument('--index-size', type=int, default=20000)
+    parser.add_argument('--bucket-size', type=int, default=500, help='stored answers per question for the latency run')
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    stored, positives, negatives = build_dataset(args.answers, args.seed)
+    print(f"{'threshold':>9} {'precision':>10} {'recall':>8} {'false hit rate':>15}   ({args.answers} answers, dim {args.dim})")
+    for threshold in args.thresholds:
+        precision, recall, false_hit_rate = evaluate(stored, positives, negatives, threshold, args.dim)
+        print(f"{threshold:>9.2f} {precision:>10.3f} {recall:>8.3f} {false_hit_rate:>15.3f}")
+
+    p50, p95 = measure_latency(args.index_size, args.bucket_size, args.dim, args.samples, args.seed)
+    print(f"\nLookup latency with {args.index_size} entries ({args.bucket_size} per question): "
+          f"p50 {p50:.3f} ms, p95 {p95:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
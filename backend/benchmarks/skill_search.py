@@ -0,0 +1,111 @@
+"""
+Latency of skill search ("users with skills X and Y"), top skills per
+industry and the dashboard's skill gaps on a synthetic population, plus the
+throughput of sync_skills() when indexing profiles in bulk (the 0004
+migration backfill).
+
+Skill popularity follows a Zipf-like curve, so the searches cover common,
+mixed and rare combinations. The database is a SQLite file built on the
+first run and reused afterwards; pass --database-url to measure Postgres.
+
+Usage (from backend/):
+    python -m benchmarks.skill_search
+    python -m benchmarks.skill_search --users 1000000 --db-path /tmp/skills_bench.db
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+INDUSTRIES = ['Technology', 'Finance', 'Healthcare', 'Education', 'Retail', 'Manufacturing', 'Media', 'Government']
+COMMON = ['Python', 'SQL', 'JavaScript', 'Excel', 'Communication', 'Leadership', 'Java', 'AWS', 'Docker', 'React',
+          'Project Management', 'Data Analysis', 'Go', 'Kubernetes', 'TypeScript', 'Machine Learning', 'Figma']
+
+
+def skill_pool(size):
+    return COMMON + [f'Skill {i}' for i in range(size - len(COMMON))]
+
+
+def populate(app, users, skills_per_user, pool, chunk=5000):
+    from extensions import db
+    from models import User, UserProfile
+    from Services import skills
+
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        if db.session.query(User.user_id).limit(1).first():
+            return None
+        conn = db.session.connection()
+        started = time.perf_counter()
+        for first in range(1, users + 1, chunk):
+            ids = range(first, min(first + chunk, users + 1))
+            profiles = [(user_id, ', '.join(set(rng.choices(pool, weights, k=skills_per_user))), rng.choice(INDUSTRIES))
+                        for user_id in ids]
+            conn.execute(User.__table__.insert(), [
+                {'user_id': user_id, 'first_name': 'User', 'last_name': str(user_id), 'email': f'user{user_id}@example.com',
+                 'password_hash': '-'} for user_id in ids])
+            conn.execute(UserProfile.__table__.insert(), [
+                {'user_id': user_id, 'occupation': 'Engineer', 'industry': industry, 'experience_level': 'mid',
+                 'skills': text} for user_id, text, industry in profiles])
+            skills.sync_skills(conn, profiles)
+            db.session.commit()
+            conn = db.session.connection()
+        return time.perf_counter() - started
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--skills-per-user', type=int, default=6)
+    parser.add_argument('--distinct-skills', type=int, default=2000)
+    parser.add_argument('--db-path', default='/tmp/skills_bench.db')
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{args.db_path}'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    from app import create_app
+    from extensions import db
+    from models import UserProfile
+    from Services import skills
+
+    app = create_app()
+    pool = skill_pool(args.distinct_skills)
+    elapsed = populate(app, args.users, args.skills_per_user, pool)
+    if elapsed is not None:
+        print(f"Indexed {args.users} profiles in {elapsed:.1f}s ({args.users / elapsed:.0f} profiles/s)\n")
+
+    cases = [
+        ('users: Python + SQL (common)', lambda: skills.find_users_with_skills(['Python', 'SQL'])),
+        ('users: Python + Skill 500', lambda: skills.find_users_with_skills(['Python', 'Skill 500'])),
+        ('users: Go + Docker + AWS', lambda: skills.find_users_with_skills(['Go', 'Docker', 'AWS'])),
+        ('users: Skill 1500 (rare)', lambda: skills.find_users_with_skills(['Skill 1500'])),
+        ('users: Python, page 20', lambda: skills.find_users_with_skills(['Python', 'SQL'], after_user_id=args.users // 2)),
+        ('top skills: Finance', lambda: skills.top_skills('Finance')),
+        ('top skills: all profiles', lambda: skills.top_skills()),
+    ]
+    with app.app_context():
+        profile = db.session.get(UserProfile, 1)
+        cases.append(('skill gaps (dashboard)', lambda: skills.skill_gaps(profile)))
+        print(f"{'query':<32} {'median ms':>10} {'max ms':>8}")
+        for name, fn in cases:
+            fn() # Warm the page cache
+            median, worst = timed(fn, args.repeat)
+            print(f"{name:<32} {median:>10.2f} {worst:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
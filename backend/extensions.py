@@ -1,5 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 
-db = SQLAlchemy()
-cors = CORS()
\ No newline at end of file
+from Services.auth_log_writer import AuthLogWriter
+from Services.password_service import PasswordHasher
+from Services.rate_limit import RateLimiter, AdmissionController
+from Services.db_routing import RoutingSession, ReplicaRouter
+from Services.http_cache import ResponseCache
+
+db = SQLAlchemy(session_options={'class_': RoutingSession}) # Reads in @read_only views may use a replica
+cors = CORS()
+auth_log_writer = AuthLogWriter()
+password_hasher = PasswordHasher()
+rate_limiter = RateLimiter()
+admission_controller = AdmissionController()
+db_router = ReplicaRouter()
+response_cache = ResponseCache()
@@ -0,0 +1,44 @@
+"""
+gunicorn settings for the production profile: gunicorn -c gunicorn.conf.py wsgi:app
+
+Requests spend most of their time waiting on the LLM API or the database,
+so each worker process runs WEB_THREADS request threads (gthread) rather
+than one request at a time. The per-process pools in Config (database
+connections, LLM connections, admission control) are sized from the same
+WEB_THREADS, so with W workers the database sees at most
+W x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+
+Behind a reverse proxy such as nginx, set TRUSTED_PROXY_COUNT so the
+client IP (used for rate limits) comes from X-Forwarded-For; otherwise
+every client appears as the proxy and shares one IP bucket.
+
+With JOB_QUEUE_ENABLED=true, ?async=1 LLM requests are queued for
+worker.py, which runs as its own service next to gunicorn (python worker.py);
+without it running, queued jobs are never picked up.
+
+The app is not preloaded: the LLM pool's event loop thread and the
+background writers don't survive fork(), and each worker builds them
+lazily on first use instead.
+"""
+import os
+
+from config import Config
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = Config.WEB_WORKERS
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+preload_app = False
+
+# Question generation can retry across models, so allow well past one LLM timeout
+timeout = int(os.environ.get('WEB_TIMEOUT_SECONDS', Config.LLM_REQUEST_TIMEOUT_SECONDS * 2 + 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT_SECONDS', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE_SECONDS', 5))
+# Recycle workers now and then to cap slow memory growth; jitter keeps them from restarting together
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 500))
+
+# The app logs through its own queue-backed handler (logging_config.py); keep gunicorn's to errors
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'warning')
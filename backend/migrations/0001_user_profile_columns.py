@@ -0,0 +1,7 @@
+"""Profile columns added after launch (previously migrate_user_profiles.py)."""
+
+
+def upgrade(m):
+    for column, ddl_type in (('skills', 'TEXT'), ('location', 'VARCHAR(255)'), ('linkedin_url', 'VARCHAR(255)'),
+                             ('github_url', 'VARCHAR(255)'), ('portfolio_url', 'VARCHAR(255)'), ('bio', 'TEXT')):
+        m.add_column('user_profiles', column, ddl_type)
@@ -0,0 +1,19 @@
+"""
+Tables added since launch: interview history, dashboard stats, question
+cache and bank, and the LLM job queue. They start empty, so creating them
+takes no lock on the existing tables beyond their foreign key references.
+"""
+
+
+def upgrade(m):
+    m.create_tables(
+        'question_set_cache',
+        'interview_sessions',
+        'interview_questions',
+        'interview_answers',
+        'answer_feedback_items',
+        'user_dashboard_stats',
+        'question_bank',
+        'question_bank_title_tokens',
+        'llm_jobs'
+    )
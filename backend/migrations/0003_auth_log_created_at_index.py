@@ -0,0 +1,5 @@
+"""Index for auth log retention pruning (`flask prune-auth-logs`); the table predates it."""
+
+
+def upgrade(m):
+    m.create_index('ix_user_auth_logs_created_at', 'user_auth_logs', ['created_at'])
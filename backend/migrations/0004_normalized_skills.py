@@ -0,0 +1,25 @@
+"""
+Normalized skills: skill tags, the user-skill links and per-industry counts,
+backfilled from the free-text user_profiles.skills in chunks. The backfill
+syncs each profile to its current text, so profiles edited while it runs
+end up correct either way.
+"""
+from sqlalchemy import select
+
+from models import UserProfile
+from Services import skills
+
+
+def upgrade(m):
+    m.create_tables('skills', 'user_skills', 'industry_skill_counts')
+
+    def index_profiles(conn, after, last):
+        query = select(UserProfile.user_id, UserProfile.skills, UserProfile.industry).where(
+            UserProfile.profile_id <= last, UserProfile.skills.isnot(None), UserProfile.skills != '')
+        if after is not None:
+            query = query.where(UserProfile.profile_id > after)
+        profiles = conn.execute(query).all()
+        skills.sync_skills(conn, profiles)
+        return len(profiles)
+
+    m.backfill('index_profile_skills', 'user_profiles', 'profile_id', index_profiles)
@@ -0,0 +1,25 @@
+"""
+Dashboard stats for users whose interview history predates the stats table,
+built in chunks so the dashboard never has to write them. Users already
+with a row are skipped; store_stats upserts, so a user whose first new
+activity creates the row while this runs is handled either way.
+"""
+from sqlalchemy import select
+
+from models import User, UserDashboardStats
+from Services import dashboard_stats
+
+
+def upgrade(m):
+    def build_stats(conn, after, last):
+        query = (select(User.user_id)
+                 .outerjoin(UserDashboardStats, UserDashboardStats.user_id == User.user_id)
+                 .where(User.user_id <= last, UserDashboardStats.user_id.is_(None)))
+        if after is not None:
+            query = query.where(User.user_id > after)
+        user_ids = conn.execute(query).scalars().all()
+        for user_id in user_ids:
+            dashboard_stats.store_stats(conn, user_id)
+        return len(user_ids)
+
+    m.backfill('dashboard_stats', 'users', 'user_id', build_stats)
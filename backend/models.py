@@ -1,6 +1,8 @@
 from extensions import db # Use a relative import if extensions.py is in the same directory
 from datetime import datetime, timezone
 
+import serializers
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -15,16 +17,14 @@ class User(db.Model):
     
     profile = db.relationship('UserProfile', backref='user', uselist=False, cascade="all, delete-orphan")
     auth_logs = db.relationship('UserAuthLog', backref='user', cascade="all, delete-orphan")
+    dashboard_stats = db.relationship('UserDashboardStats', backref='user', uselist=False, cascade="all, delete-orphan")
 
-    def to_dict(self):
-        return {
-            'user_id': self.user_id,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'email': self.email,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login_at': self.last_login_at.isoformat() if self.last_login_at else None
-        }
+    def to_dict(self, include_profile=False):
+        data = serializers.USER.dump(self)
+        if include_profile:
+            # Load the profile eagerly (see repositories.py) to avoid a second query here
+            data['profile'] = serializers.USER_PROFILE.dump(self.profile) if self.profile else None
+        return data
 
 class UserProfile(db.Model):
     __tablename__ = 'user_profiles'
@@ -45,21 +45,7 @@ class UserProfile(db.Model):
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     def to_dict(self):
-        return {
-            'profile_id': self.profile_id,
-            'user_id': self.user_id,
-            'occupation': self.occupation,
-            'industry': self.industry,
-            'experience_level': self.experience_level,
-            'interview_goal': self.interview_goal,
-            'skills': self.skills,
-            'location': self.location,
-            'linkedin_url': self.linkedin_url,
-            'github_url': self.github_url,
-            'portfolio_url': self.portfolio_url,
-            'bio': self.bio,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serializers.USER_PROFILE.dump(self)
 
 class UserAuthLog(db.Model):
     __tablename__ = 'user_auth_logs'
@@ -69,14 +55,212 @@ class UserAuthLog(db.Model):
     action = db.Column(db.String(50), nullable=False)
     ip_address = db.Column(db.String(45), nullable=True)
     user_agent = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True) # Indexed for retention pruning
+
+    def to_dict(self):
+        return serializers.USER_AUTH_LOG.dump(self)
+
+class QuestionSetCacheEntry(db.Model):
+    __tablename__ = 'question_set_cache'
+
+    entry_id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), nullable=False, index=True)
+    questions = db.Column(db.Text, nullable=False) # JSON-encoded list of question objects
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def to_dict(self):
+        return serializers.QUESTION_SET_CACHE_ENTRY.dump(self)
+
+
+class InterviewSession(db.Model):
+    __tablename__ = 'interview_sessions'
+    __table_args__ = (
+        db.Index('ix_interview_sessions_user_created', 'user_id', 'created_at'),
+    )
+
+    session_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    job_title = db.Column(db.String(255), nullable=False)
+    company_industry = db.Column(db.String(100), nullable=True)
+    interview_type = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='in_progress') # 'in_progress' or 'completed'
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    questions = db.relationship('InterviewQuestion', backref='session', cascade="all, delete-orphan",
+                                order_by='InterviewQuestion.position')
+    answers = db.relationship('InterviewAnswer', backref='session', cascade="all, delete-orphan")
+
+    def to_dict(self):
+        return serializers.INTERVIEW_SESSION.dump(self)
+
+class InterviewQuestion(db.Model):
+    __tablename__ = 'interview_questions'
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'position', name='uq_interview_questions_session_position'),
+    )
+
+    question_id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('interview_sessions.session_id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False) # 0-based question_index used by the frontend
+    question_text = db.Column(db.Text, nullable=False)
+    payload = db.Column(db.Text, nullable=True) # JSON-encoded question object (tips, expectations, ...)
+
+    def to_dict(self):
+        return serializers.INTERVIEW_QUESTION.dump(self)
+
+class InterviewAnswer(db.Model):
+    __tablename__ = 'interview_answers'
+    __table_args__ = (
+        db.Index('ix_interview_answers_user_created', 'user_id', 'created_at'),
+        db.Index('ix_interview_answers_session', 'session_id', 'question_position'),
+    )
+
+    answer_id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('interview_sessions.session_id', ondelete='CASCADE'), nullable=False)
+    # Denormalized from the session so per-user aggregates don't need a join
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    question_position = db.Column(db.Integer, nullable=False)
+    answer_text = db.Column(db.Text, nullable=False)
+    score = db.Column(db.Integer, nullable=True)
+    summary = db.Column(db.Text, nullable=True)
+    duration_seconds = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    feedback_items = db.relationship('AnswerFeedbackItem', backref='answer', cascade="all, delete-orphan")
+
     def to_dict(self):
-        return {
-            'log_id': self.log_id,
-            'user_id': self.user_id,
-            'action': self.action,
-            'ip_address': self.ip_address,
-            'user_agent': self.user_agent,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        data = serializers.INTERVIEW_ANSWER.dump(self)
+        data['strengths'] = [item.text for item in self.feedback_items if item.kind == 'strength']
+        data['improvements'] = [item.text for item in self.feedback_items if item.kind == 'improvement']
+        return data
+
+class AnswerFeedbackItem(db.Model):
+    __tablename__ = 'answer_feedback_items'
+    __table_args__ = (
+        db.Index('ix_answer_feedback_items_user_kind_text', 'user_id', 'kind', 'text'),
+    )
+
+    item_id = db.Column(db.Integer, primary_key=True)
+    answer_id = db.Column(db.Integer, db.ForeignKey('interview_answers.answer_id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False) # 'strength' or 'improvement'
+    text = db.Column(db.String(500), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class UserDashboardStats(db.Model):
+    """
+    Per-user dashboard aggregates, maintained incrementally as answers are
+    analyzed so the dashboard never has to scan interview history.
+    """
+    __tablename__ = 'user_dashboard_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    interviews_completed = db.Column(db.Integer, nullable=False, default=0)
+    answers_count = db.Column(db.Integer, nullable=False, default=0)
+    scored_answers = db.Column(db.Integer, nullable=False, default=0)
+    score_total = db.Column(db.Integer, nullable=False, default=0)
+    total_practice_seconds = db.Column(db.Integer, nullable=False, default=0)
+    strength_counts = db.Column(db.JSON, nullable=False, default=dict) # {text: count}
+    improvement_counts = db.Column(db.JSON, nullable=False, default=dict) # {text: count}
+    chart_buckets = db.Column(db.JSON, nullable=False, default=list) # [{date, score_total, scored}] per day
+    recent_activities = db.Column(db.JSON, nullable=False, default=list) # Latest sessions, newest first
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    @property
+    def average_score(self):
+        return round(self.score_total / self.scored_answers) if self.scored_answers else 0
+
+
+class QuestionBankEntry(db.Model):
+    __tablename__ = 'question_bank'
+    __table_args__ = (
+        db.Index('ix_question_bank_lookup', 'title_key', 'interview_type', 'industry_key'),
+        db.UniqueConstraint('title_key', 'interview_type', 'industry_key', 'question_hash', name='uq_question_bank_question'),
+    )
+
+    entry_id = db.Column(db.Integer, primary_key=True)
+    title_key = db.Column(db.String(255), nullable=False) # Normalized, sorted title tokens
+    job_title = db.Column(db.String(255), nullable=False)
+    industry_key = db.Column(db.String(100), nullable=False, default='')
+    interview_type = db.Column(db.String(100), nullable=False)
+    complexity = db.Column(db.String(20), nullable=True)
+    question_hash = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False) # JSON-encoded question object
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+class QuestionBankTitleToken(db.Model):
+    """Token index over question bank titles, used to match similar job titles."""
+    __tablename__ = 'question_bank_title_tokens'
+
+    token = db.Column(db.String(100), primary_key=True)
+    title_key = db.Column(db.String(255), primary_key=True)
+
+
+class LLMJob(db.Model):
+    """
+    Queued LLM work (question generation, answer analysis) run by worker.py
+    outside the web process. Clients poll it by job_key, which, unlike the
+    sequential job_id, can't be guessed.
+    """
+    __tablename__ = 'llm_jobs'
+    __table_args__ = (
+        # Matches the worker's claim query: queued jobs by priority, oldest first
+        db.Index('ix_llm_jobs_claim', 'status', 'priority', 'run_after', 'job_id'),
+    )
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    job_key = db.Column(db.String(32), nullable=False, unique=True)
+    kind = db.Column(db.String(50), nullable=False) # 'generate_questions' or 'analyze_response'
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, succeeded or failed
+    priority = db.Column(db.Integer, nullable=False, default=0) # Higher runs first
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    payload = db.Column(db.JSON, nullable=False)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)) # Retry backoff
+    locked_by = db.Column(db.String(100), nullable=True) # Worker running the job
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime, nullable=True, index=True) # Indexed for retention pruning
+
+    def to_dict(self):
+        return serializers.LLM_JOB.dump(self)
+
+
+class Skill(db.Model):
+    """A normalized skill tag; user_skills links it to the profiles whose free-text skills mention it."""
+    __tablename__ = 'skills'
+
+    skill_id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(100), nullable=False, unique=True) # Lowercased, synonyms resolved (see Services/skills.py)
+    name = db.Column(db.String(100), nullable=False) # Spelling of the first profile that used it
+    user_count = db.Column(db.Integer, nullable=False, default=0, index=True) # Kept current on each profile update
+
+    def to_dict(self):
+        return serializers.SKILL.dump(self)
+
+class UserSkill(db.Model):
+    __tablename__ = 'user_skills'
+    __table_args__ = (
+        # "Users with skill X" walks this in user_id order; the primary key serves "does user U have skill Y"
+        db.Index('ix_user_skills_skill_user', 'skill_id', 'user_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.skill_id', ondelete='CASCADE'), primary_key=True)
+    industry_key = db.Column(db.String(100), nullable=False, default='') # The profile's normalized industry
+
+class IndustrySkillCount(db.Model):
+    """Profiles per (industry, skill), so top skills per industry is an index range scan rather than a GROUP BY."""
+    __tablename__ = 'industry_skill_counts'
+    __table_args__ = (
+        db.Index('ix_industry_skill_counts_top', 'industry_key', 'user_count'),
+    )
+
+    industry_key = db.Column(db.String(100), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.skill_id', ondelete='CASCADE'), primary_key=True)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,59 @@
+from sqlalchemy.orm import joinedload
+
+from extensions import db
+from models import User, UserProfile, UserDashboardStats
+
+
+def get_user_with_profile(user_id):
+    """Loads a user and their profile in a single joined query."""
+    return (User.query
+            .options(joinedload(User.profile))
+            .filter_by(user_id=user_id)
+            .first())
+
+
+def get_user_by_email_with_profile(email):
+    """Loads a user by email together with their profile in a single joined query."""
+    return (User.query
+            .options(joinedload(User.profile))
+            .filter_by(email=email)
+            .first())
+
+
+def get_user_for_dashboard(user_id):
+    """Loads a user with profile and dashboard stats in a single joined query."""
+    return (User.query
+            .options(joinedload(User.profile), joinedload(User.dashboard_stats))
+            .filter_by(user_id=user_id)
+            .first())
+
+
+def _newest(*timestamps):
+    timestamps = [value for value in timestamps if value is not None]
+    return max(timestamps) if timestamps else None
+
+
+def get_profile_modified_at(user_id):
+    """
+    When the user or their profile last changed, without loading either row
+    (None if the user doesn't exist). Used to validate cached profile responses.
+    """
+    row = (db.session.query(User.updated_at, User.created_at, UserProfile.updated_at)
+           .outerjoin(UserProfile, UserProfile.user_id == User.user_id)
+           .filter(User.user_id == user_id)
+           .first())
+    return _newest(*row) if row else None
+
+
+def get_dashboard_modified_at(user_id):
+    """Like get_profile_modified_at, also covering the user's dashboard stats."""
+    row = (db.session.query(User.updated_at, User.created_at, UserProfile.updated_at, UserDashboardStats.updated_at)
+           .outerjoin(UserProfile, UserProfile.user_id == User.user_id)
+           .outerjoin(UserDashboardStats, UserDashboardStats.user_id == User.user_id)
+           .filter(User.user_id == user_id)
+           .first())
+    return _newest(*row) if row else None
+
+
+def email_exists(email):
+    return db.session.query(User.query.filter_by(email=email).exists()).scalar()
@@ -1,13 +1,27 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timezone, timedelta
+import logging
+from datetime import datetime, timezone
 
-from models import User, UserProfile, UserAuthLog
-from extensions import db
+from models import User, UserProfile, UserDashboardStats
+from extensions import db, auth_log_writer, password_hasher
+from repositories import email_exists, get_user_by_email_with_profile
+from Services.metrics import HTTP_REQUESTS_REJECTED
+from Services.password_service import PasswordHasherBusy
+from utils import query_budget
 
+logger = logging.getLogger(__name__)
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/api')
 
+def _hasher_busy(e):
+    db.session.rollback()
+    HTTP_REQUESTS_REJECTED.inc(endpoint=request.endpoint or 'unknown', reason='password_hasher_busy')
+    response = jsonify({'error': 'The server is busy, please retry shortly.', 'retry_after': e.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
 @auth_bp.route('/signup', methods=['POST'])
+@query_budget(5)
 def signup():
     data = request.get_json()
     
@@ -23,7 +37,7 @@ def signup():
     if not data.get('agreeToTerms'): # Ensure this is handled by frontend or make non-optional
         return jsonify({'error': 'You must agree to the terms and conditions'}), 400
     
-    if User.query.filter_by(email=data['email']).first():
+    if email_exists(data['email']):
         return jsonify({'error': 'Email already registered'}), 400
     
     try:
@@ -31,31 +45,27 @@ def signup():
             first_name=data['firstName'],
             last_name=data['lastName'],
             email=data['email'],
-            password_hash=generate_password_hash(data['password'])
+            password_hash=password_hasher.hash(data['password'])
         )
         db.session.add(new_user)
         db.session.flush() # To get new_user.user_id
 
         new_profile = UserProfile(
-            user_id=new_user.user_id,
+            user=new_user,
             occupation=data['occupation'],
             industry=data['industry'],
             experience_level=data['experienceLevel'],
             interview_goal=data.get('interviewGoal', '')
         )
         db.session.add(new_profile)
+        db.session.add(UserDashboardStats(user_id=new_user.user_id))
         
-        log_entry = UserAuthLog(
-            user_id=new_user.user_id,
-            action='SIGNUP',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
-        db.session.add(log_entry)
+        db.session.flush()
+        # Serialize before commit so the response doesn't reload the expired rows
+        user_data_to_return = new_user.to_dict(include_profile=True)
         db.session.commit()
-        
-        user_data_to_return = new_user.to_dict()
-        user_data_to_return['profile'] = new_profile.to_dict()
+
+        auth_log_writer.log(user_data_to_return['user_id'], 'SIGNUP', request.remote_addr, request.headers.get('User-Agent'))
 
         return jsonify({
             'success': True,
@@ -63,51 +73,46 @@ def signup():
             'user': user_data_to_return # Return user data including profile
         }), 201
         
+    except PasswordHasherBusy as e:
+        return _hasher_busy(e)
     except Exception as e:
         db.session.rollback()
         # Log error e for server-side debugging
-        print(f"Signup Error: {str(e)}")
+        logger.exception("Signup Error")
         return jsonify({'error': f'Database error: {str(e)}'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@query_budget(2)
 def login():
     data = request.get_json()
     if not data or 'email' not in data or 'password' not in data:
         return jsonify({'error': 'Email and password are required'}), 400
     
     try:
-        user = User.query.filter_by(email=data['email']).first()
+        user = get_user_by_email_with_profile(data['email'])
         
-        if not user or not check_password_hash(user.password_hash, data['password']):
+        if not user or not password_hasher.verify(user.password_hash, data['password']):
             # Generic error message for security
             # Log failed attempt internally
             log_action = 'LOGIN_FAILED_USER_NOT_FOUND' if not user else 'LOGIN_FAILED_PASSWORD_MISMATCH'
             user_id_for_log = user.user_id if user else None
 
-            log_entry = UserAuthLog(
-                user_id=user_id_for_log,
-                action=log_action,
-                ip_address=request.remote_addr,
-                user_agent=request.headers.get('User-Agent')
-            )
-            db.session.add(log_entry)
-            db.session.commit()
+            auth_log_writer.log(user_id_for_log, log_action, request.remote_addr, request.headers.get('User-Agent'))
             return jsonify({'error': 'Invalid email or password'}), 401
         
         user.last_login_at = datetime.now(timezone.utc)
+        if password_hasher.needs_rehash(user.password_hash):
+            # Hashing parameters changed since this password was stored; upgrade it transparently
+            try:
+                user.password_hash = password_hasher.hash(data['password'])
+            except PasswordHasherBusy:
+                pass # Already verified; the upgrade happens on a later login
         
-        log_entry = UserAuthLog(
-            user_id=user.user_id,
-            action='LOGIN_SUCCESS',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
-        db.session.add(log_entry)
+        # Serialize before commit so the response doesn't reload the expired rows
+        user_data = user.to_dict(include_profile=True)
         db.session.commit()
-        
-        profile = UserProfile.query.filter_by(user_id=user.user_id).first()
-        user_data = user.to_dict()
-        user_data['profile'] = profile.to_dict() if profile else None
+
+        auth_log_writer.log(user_data['user_id'], 'LOGIN_SUCCESS', request.remote_addr, request.headers.get('User-Agent'))
         
         return jsonify({
             'success': True,
@@ -117,9 +122,11 @@ def login():
             # 'expires_at': token_expiration.isoformat() # REMOVED
         }), 200
         
+    except PasswordHasherBusy as e:
+        return _hasher_busy(e)
     except Exception as e:
         db.session.rollback()
-        print(f"Login Error: {str(e)}")
+        logger.exception("Login Error")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 # @auth_bp.route('/verify', methods=['GET']) # REMOVE this entire route
@@ -156,5 +163,5 @@ def login():
 #     except jwt.InvalidTokenError:
 #         return jsonify({'error': 'Invalid token', 'code': 'invalid_token'}), 401
 #     except Exception as e:
-#         print(f"Token Verification Error: {str(e)}")
+#         logger.exception("Token Verification Error")
 #         return jsonify({'error': f'Authentication error: {str(e)}', 'code': 'auth_error'}), 401
\ No newline at end of file
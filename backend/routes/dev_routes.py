@@ -0,0 +1,42 @@
+from flask import Blueprint, jsonify
+import logging
+
+from models import User
+from extensions import db
+from Services import interview_history
+
+# Unauthenticated routes that write sample data; only registered with SEED_ENDPOINT_ENABLED (tests, local development)
+logger = logging.getLogger(__name__)
+dev_bp = Blueprint('dev_bp', __name__, url_prefix='/api')
+
+@dev_bp.route('/seed/<int:user_id>', methods=['POST'])
+def seed_data(user_id): # user_id is already a parameter
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'User not found for seeding'}), 404
+
+    sample_sessions = [
+        ({'jobTitle': 'Software Engineer', 'companyIndustry': 'Technology', 'interviewType': 'technical'}, [72, 80, 65]),
+        ({'jobTitle': 'Software Engineer', 'companyIndustry': 'Technology', 'interviewType': 'behavioral'}, [85, 78, 90]),
+    ]
+    try:
+        for job_data, scores in sample_sessions:
+            questions = [{'id': i + 1, 'question': f'Sample {job_data["interviewType"]} question {i + 1}'} for i in range(len(scores))]
+            session = interview_history.create_session(user_id, job_data, questions)
+            for index, score in enumerate(scores):
+                feedback = {
+                    'strengths': ['Clear structure'],
+                    'improvements': ['Add measurable results'],
+                    'score': score,
+                    'summary': 'Sample feedback.'
+                }
+                interview_history.record_answer(session, index, 'Sample answer.', feedback, duration_seconds=180)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Seed Error")
+        return jsonify({'error': f'Database error: {str(e)}'}), 500
+
+    return jsonify({
+        'success': True,
+        'message': f'Seeded {len(sample_sessions)} sample interview sessions.',
+    }), 201
@@ -1,25 +1,188 @@
-from flask import Blueprint, request, jsonify # g removed
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app, url_for # g removed
+import logging
 import json
-import os
-from datetime import datetime, timezone
+import threading
 
-from extensions import db
+from extensions import db, rate_limiter, admission_controller
 from models import User 
-from Services.groq_service import GroqService
+from Services.question_cache import build_question_cache
+from Services.single_flight import SingleFlight
+from Services.token_budget import question_count
+from Services import interview_history, question_bank, job_queue
+from Services.metrics import registry
+from Services.rate_limit import llm_endpoint
+from Services.db_routing import read_only
+from utils import query_budget
 from config import Config
 # from ..utils import token_required, get_most_common_items # token_required removed
-from utils import get_most_common_items
 
 
+logger = logging.getLogger(__name__)
 interview_bp = Blueprint('interview_bp', __name__, url_prefix='/api/interview')
 
-groq_service = GroqService(api_key=Config.GROQ_API_KEY) if Config.GROQ_API_KEY else None
+def _build_groq_service():
+    if not Config.GROQ_API_KEY:
+        return None
+    # Imported here so the groq SDK (and numpy, for the semantic cache) only load when the service is first used
+    from Services.groq_service import GroqService
+    from Services.llm_pool import LLMClientPool
+    from Services.semantic_cache import build_semantic_cache
+
+    pool = LLMClientPool(
+        api_key=Config.GROQ_API_KEY,
+        max_connections=Config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        model_concurrency=Config.LLM_MODEL_CONCURRENCY,
+        timeout=Config.LLM_REQUEST_TIMEOUT_SECONDS,
+        base_url=Config.GROQ_BASE_URL
+    )
+    return GroqService(
+        api_key=Config.GROQ_API_KEY,
+        cache=build_question_cache(Config),
+        pool=pool,
+        hedge_delay=Config.LLM_HEDGE_DELAY_SECONDS if Config.LLM_HEDGING_ENABLED else None,
+        feedback_cache=build_semantic_cache(Config),
+        single_flight=SingleFlight(
+            lock_dir=Config.SINGLE_FLIGHT_LOCK_DIR or None,
+            wait_timeout=Config.SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS,
+            result_ttl=Config.SINGLE_FLIGHT_RESULT_TTL_SECONDS
+        ) if Config.SINGLE_FLIGHT_ENABLED else None
+    )
+
+_groq_service = None
+_groq_service_built = False
+_groq_service_lock = threading.Lock()
+
+def get_groq_service():
+    """
+    Returns the process-wide GroqService (None without an API key), building it
+    on first use so importing the app and booting a worker don't start the LLM
+    pool's event loop thread and HTTP client.
+    """
+    global _groq_service, _groq_service_built
+    if not _groq_service_built:
+        with _groq_service_lock:
+            if not _groq_service_built:
+                _groq_service = _build_groq_service()
+                if _groq_service:
+                    registry.register_collector('groq_service', _groq_service.collect_metrics)
+                _groq_service_built = True
+    return _groq_service
+
+def _start_session(data, questions):
+    # Persists the generated questions as a session when the request identifies a known user
+    try:
+        user_id = int(data.get('user_id'))
+    except (TypeError, ValueError):
+        return None
+    if not db.session.get(User, user_id):
+        return None
+    try:
+        return interview_history.create_session(user_id, data, questions).session_id
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error saving interview session")
+        return None
+
+def _save_answer(user_id, interview_id, question_index, answer_text, feedback, duration_seconds=None):
+    # Returns whether the session is complete; answers for unknown sessions are not stored
+    session = interview_history.get_user_session(interview_id, user_id)
+    if not session:
+        return False
+    try:
+        _, is_complete = interview_history.record_answer(
+            session, question_index, answer_text, feedback, duration_seconds=duration_seconds)
+        return is_complete
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error saving interview answer")
+        return False
+
+def _questions_from_bank(data):
+    if not Config.QUESTION_BANK_ENABLED:
+        return None
+    try:
+        return question_bank.get_question_set(data, count=question_count(data),
+                                               min_banked=Config.QUESTION_BANK_TARGET_PER_ROLE)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Question bank lookup failed")
+        return None
+
+def _add_to_bank(data, questions):
+    if not Config.QUESTION_BANK_ENABLED:
+        return
+    try:
+        question_bank.add_questions(data, questions)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error adding questions to the bank")
+
+def _parse_duration(value):
+    try:
+        return max(0, int(float(value)))
+    except (TypeError, ValueError):
+        return None
+
+def _wants_async(fields):
+    # Clients opt into the job queue with ?async=1 or an 'async' field in the body
+    value = request.args.get('async', fields.get('async') if fields else None)
+    return Config.JOB_QUEUE_ENABLED and str(value).lower() in ('1', 'true')
+
+def _enqueue_job(kind, payload, priority):
+    try:
+        user_id = int(payload.get('user_id'))
+    except (TypeError, ValueError):
+        user_id = None
+    job = job_queue.enqueue(kind, payload, user_id=user_id, priority=priority, max_attempts=Config.JOB_MAX_ATTEMPTS)
+    status_url = url_for('interview_bp.get_job_status', job_key=job.job_key)
+    response = jsonify({'job_id': job.job_key, 'status': job.status, 'status_url': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+def _generate_questions(groq_service, data):
+    # Serve a banked set when the role is known; only go to the LLM on a miss
+    questions = _questions_from_bank(data)
+    if questions is None:
+        questions = groq_service.generate_interview_questions(data)
+        _add_to_bank(data, questions)
+    response = {'questions': questions}
+    interview_id = _start_session(data, questions)
+    if interview_id:
+        response['interview_id'] = interview_id
+    return response
+
+def _analyze_response(groq_service, form, question_data, job_context):
+    feedback = groq_service.analyze_interview_response(
+        question=question_data,
+        answer=form.get('answer'),
+        job_context=job_context
+    )
+    is_complete = _save_answer(
+        form.get('user_id'), form.get('interview_id'), form.get('question_index'), form.get('answer'), feedback,
+        duration_seconds=_parse_duration(form.get('duration_seconds'))
+    )
+    return {'feedback': feedback, 'is_complete': is_complete}
+
+def _required_groq_service():
+    groq_service = get_groq_service()
+    if not groq_service:
+        raise RuntimeError('Groq service not configured. Missing API Key.')
+    return groq_service
+
+# Job handlers, run by worker.py with the same payload the inline path works on
+job_queue.register_handler('generate_questions', lambda data: _generate_questions(_required_groq_service(), data))
+job_queue.register_handler('analyze_response', lambda payload: _analyze_response(
+    _required_groq_service(), payload['form'], payload['question'], payload['job_context']))
 
 @interview_bp.route('/generate-questions', methods=['POST'])
+@llm_endpoint()
 # @token_required # REMOVED
 def generate_interview_questions():
     # user_id = g.user_id # REMOVED - if needed, frontend must send it in 'data'
     # Example: data = request.get_json(); user_id = data.get('user_id')
+    groq_service = get_groq_service()
     if not groq_service:
         return jsonify({'error': 'Groq service not configured. Missing API Key.'}), 503
 
@@ -27,12 +190,13 @@ def generate_interview_questions():
     if not data or not data.get('jobTitle') or not data.get('interviewType'):
         return jsonify({'error': 'Missing required fields: jobTitle and interviewType'}), 400
 
+    if _wants_async(data):
+        return _enqueue_job('generate_questions', data, Config.JOB_PRIORITY_GENERATE)
+
     try:
-        questions = groq_service.generate_interview_questions(data)
-        # Potentially save questions linked to user_id if provided
-        return jsonify({'questions': questions}), 200
+        return jsonify(_generate_questions(groq_service, data)), 200
     except Exception as e:
-        print(f"Error generating questions: {str(e)}")
+        logger.exception("Error generating questions")
         fallback_questions = [
             {"id": 1, "question": "Tell me about yourself.", "importance": "Basic introduction.", "tips": "Be concise and relevant.", "interviewer_expectations": "Clear and confident introduction."},
             {"id": 2, "question": "What are your strengths?", "importance": "Assess key skills.", "tips": "Focus on 2-3 strengths.", "interviewer_expectations": "Relevant strengths for the role."},
@@ -40,9 +204,11 @@ def generate_interview_questions():
         return jsonify({'questions': fallback_questions, 'message': 'Using fallback questions due to an error.'}), 200
 
 @interview_bp.route('/analyze-response', methods=['POST'])
+@llm_endpoint()
 # @token_required # REMOVED
 def analyze_interview_response():
     # user_id = g.user_id # REMOVED - if needed, frontend must send it
+    groq_service = get_groq_service()
     if not groq_service:
         return jsonify({'error': 'Groq service not configured. Missing API Key.'}), 503
         
@@ -52,61 +218,230 @@ def analyze_interview_response():
     
     if not interview_id_form or question_index is None or not answer_text: # interview_id from form
         return jsonify({'error': 'Interview ID, question index, and answer are required'}), 400
-    
-    session_completed_status = False 
 
     try:
         question_data_json = request.form.get('question', '{}')
         job_context_json = request.form.get('job_context', '{}')
         
         try:
-            question_data = json.loads(question_data_json)
-            job_context = json.loads(job_context_json)
+            question_data = current_app.json.loads(question_data_json)
+            job_context = current_app.json.loads(job_context_json)
         except json.JSONDecodeError:
             return jsonify({'error': 'Invalid JSON format for question or job_context'}), 400
 
         if not question_data.get('question'):
              return jsonify({'error': 'Question text missing in question_data'}), 400
 
-        feedback = groq_service.analyze_interview_response(
-            question=question_data, 
-            answer=answer_text,
-            job_context=job_context
-        )
-        
-        # Logic for saving to DB would need user_id from request if it's user-specific
-        
-        return jsonify({
-            'feedback': feedback,
-            'is_complete': session_completed_status 
-        }), 200
+        form = request.form.to_dict()
+        if _wants_async(form):
+            return _enqueue_job('analyze_response', {'form': form, 'question': question_data, 'job_context': job_context},
+                                Config.JOB_PRIORITY_ANALYZE)
+
+        return jsonify(_analyze_response(groq_service, form, question_data, job_context)), 200
     
     except Exception as e:
         # db.session.rollback() # Only if db operations were attempted
-        print(f"Error analyzing response: {str(e)}")
+        logger.exception("Error analyzing response")
         return jsonify({
             'error': 'Failed to analyze response',
             'details': str(e)
         }), 500
 
+@interview_bp.route('/jobs/<job_key>', methods=['GET'])
+def get_job_status(job_key):
+    # Poll target for ?async=1 requests; 'result' holds the synchronous endpoint's response body once succeeded
+    job = job_queue.get_job(job_key)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    response = jsonify(job.to_dict())
+    if job.status in ('queued', 'running'):
+        response.headers['Retry-After'] = str(Config.JOB_POLL_RETRY_AFTER_SECONDS)
+    return response
+
+def _batch_cost(req):
+    # One token per answer, so a batch isn't a way around the per-request limit
+    data = req.get_json(silent=True)
+    responses = data.get('responses') if isinstance(data, dict) else None
+    return len(responses) if isinstance(responses, list) and responses else 1
+
+@interview_bp.route('/analyze-batch', methods=['POST'])
+@llm_endpoint(cost=_batch_cost)
+def analyze_interview_batch():
+    # Scores every answer of an interview in one request
+    groq_service = get_groq_service()
+    if not groq_service:
+        return jsonify({'error': 'Groq service not configured. Missing API Key.'}), 503
+
+    data = request.get_json()
+    if not data or not data.get('interview_id') or not isinstance(data.get('responses'), list) or not data['responses']:
+        return jsonify({'error': 'Interview ID and a non-empty responses list are required'}), 400
+    if len(data['responses']) > Config.ANALYSIS_BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {Config.ANALYSIS_BATCH_MAX_ITEMS} responses can be analyzed per batch'}), 400
+
+    mode = data.get('mode', 'packed')
+    if mode not in ('packed', 'concurrent'):
+        return jsonify({'error': "mode must be 'packed' or 'concurrent'"}), 400
+
+    items = []
+    for i, response in enumerate(data['responses']):
+        question_data = response.get('question') if isinstance(response, dict) else None
+        if not isinstance(question_data, dict) or not question_data.get('question') or not response.get('answer'):
+            return jsonify({'error': f'Response {i} needs question data with question text and an answer'}), 400
+        items.append({'question': question_data, 'answer': response['answer']})
+
+    try:
+        batch = groq_service.analyze_interview_batch(
+            items,
+            job_context=data.get('job_context') or {},
+            mode=mode,
+            concurrency=Config.ANALYSIS_BATCH_CONCURRENCY
+        )
+        is_complete = False
+        for result in batch['results']:
+            response = data['responses'][result['index']]
+            result['question_index'] = response.get('question_index', result['index'])
+            is_complete = _save_answer(
+                data.get('user_id'), data['interview_id'], result['question_index'], response['answer'],
+                result['feedback'], duration_seconds=_parse_duration(response.get('duration_seconds'))
+            ) or is_complete
+        return jsonify({**batch, 'is_complete': is_complete}), 200
+    except Exception as e:
+        logger.exception("Error analyzing batch")
+        return jsonify({
+            'error': 'Failed to analyze responses',
+            'details': str(e)
+        }), 500
+
+def _sse(event, data):
+    # Formats a single Server-Sent Events message
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+def _sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@interview_bp.route('/generate-questions/stream', methods=['POST'])
+@llm_endpoint()
+def stream_interview_questions():
+    # Streams each question as an SSE 'question' event as soon as the model finishes it
+    groq_service = get_groq_service()
+    if not groq_service:
+        return jsonify({'error': 'Groq service not configured. Missing API Key.'}), 503
+
+    data = request.get_json()
+    if not data or not data.get('jobTitle') or not data.get('interviewType'):
+        return jsonify({'error': 'Missing required fields: jobTitle and interviewType'}), 400
+
+    def events():
+        questions = []
+        count = 0
+        try:
+            banked = _questions_from_bank(data)
+            for question in banked or groq_service.stream_interview_questions(data):
+                questions.append(question)
+                count += 1
+                yield _sse('question', question)
+            if banked is None:
+                _add_to_bank(data, questions)
+            yield _sse('done', {'count': count, 'interview_id': _start_session(data, questions)})
+        except Exception as e:
+            logger.exception("Error streaming questions")
+            yield _sse('error', {'error': 'Failed to generate questions', 'details': str(e), 'count': count})
+
+    return _sse_response(events())
+
+@interview_bp.route('/analyze-response/stream', methods=['POST'])
+@llm_endpoint()
+def stream_interview_response_analysis():
+    # Streams each feedback field (strengths, improvements, score, summary) as an SSE 'feedback' event
+    groq_service = get_groq_service()
+    if not groq_service:
+        return jsonify({'error': 'Groq service not configured. Missing API Key.'}), 503
+
+    if not request.form.get('interview_id') or request.form.get('question_index') is None or not request.form.get('answer'):
+        return jsonify({'error': 'Interview ID, question index, and answer are required'}), 400
+
+    try:
+        question_data = current_app.json.loads(request.form.get('question', '{}'))
+        job_context = current_app.json.loads(request.form.get('job_context', '{}'))
+    except json.JSONDecodeError:
+        return jsonify({'error': 'Invalid JSON format for question or job_context'}), 400
+
+    if not question_data.get('question'):
+        return jsonify({'error': 'Question text missing in question_data'}), 400
+
+    answer_text = request.form.get('answer')
+    form = request.form.to_dict()
+
+    def events():
+        feedback = {}
+        try:
+            for field, value in groq_service.stream_interview_analysis(question_data, answer_text, job_context):
+                feedback[field] = value
+                yield _sse('feedback', {'field': field, 'value': value})
+            is_complete = _save_answer(
+                form.get('user_id'), form.get('interview_id'), form.get('question_index'), answer_text, feedback,
+                duration_seconds=_parse_duration(form.get('duration_seconds'))
+            )
+            yield _sse('done', {'feedback': feedback, 'is_complete': is_complete})
+        except Exception as e:
+            logger.exception("Error streaming analysis")
+            yield _sse('error', {'error': 'Failed to analyze response', 'details': str(e)})
+
+    return _sse_response(events())
+
+@interview_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    groq_service = get_groq_service()
+    if not groq_service:
+        return jsonify({'enabled': False}), 200
+    extra = {
+        'llm_pool': groq_service.pool.stats(),
+        'feedback_cache': groq_service.feedback_cache.stats() if groq_service.feedback_cache else None,
+        'single_flight': groq_service.single_flight.stats() if groq_service.single_flight else None,
+        'rate_limiter': rate_limiter.stats(),
+        'admission': admission_controller.stats()
+    }
+    if not groq_service.cache:
+        return jsonify({'enabled': False, **extra}), 200
+    return jsonify({'enabled': True, **groq_service.cache.stats(), **extra}), 200
+
+@interview_bp.route('/usage-stats', methods=['GET'])
+def get_usage_stats():
+    # Token usage and latency per operation and model since this process started
+    groq_service = get_groq_service()
+    if not groq_service:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, 'usage': groq_service.usage.stats()}), 200
+
 @interview_bp.route('/performance-history', methods=['GET'])
+@read_only
+@query_budget(5) # Summary 2, one page of sessions 1, common feedback 2; independent of history length
 # @token_required # REMOVED
 def get_performance_history():
-    # This route now needs user_id, e.g., /api/interview/performance-history/<user_id>
-    # Or user_id as a query parameter: /api/interview/performance-history?user_id=...
-    # For now, returning a generic message as user_id is not passed.
-    # user_id = g.user_id # REMOVED
-    user_id_param = request.args.get('user_id') # Example: frontend sends as query param
-    if not user_id_param:
+    # user_id is sent as a query parameter: /api/interview/performance-history?user_id=...
+    # Older pages can be fetched with ?before=<session_id of the last row>
+    try:
+        user_id = int(request.args.get('user_id'))
+    except (TypeError, ValueError):
         return jsonify({'error': 'User ID is required for performance history'}), 400
-    
-    # Actual logic to fetch history for user_id_param would go here
-    return jsonify({
-        'message': f'Performance history feature for user {user_id_param} is currently unavailable or needs user_id.',
-        'total_interviews': 0,
-        'avg_score': 0,
-        'total_practice_time': 0,
-        'history': [],
-        'common_strengths': [],
-        'common_improvements': []
-    }), 200
\ No newline at end of file
+
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    before = request.args.get('before', type=int)
+
+    try:
+        summary = interview_history.get_performance_summary(user_id)
+        history = interview_history.get_session_history(user_id, limit=limit, before_session_id=before)
+        return jsonify({
+            **summary,
+            'history': history,
+            'next_before': history[-1]['session_id'] if len(history) == limit else None,
+            'common_strengths': interview_history.get_common_feedback(user_id, 'strength'),
+            'common_improvements': interview_history.get_common_feedback(user_id, 'improvement')
+        }), 200
+    except Exception as e:
+        logger.exception("Performance History Error")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -1,60 +1,60 @@
-from flask import Blueprint, jsonify, request
-from sqlalchemy import func
+from flask import Blueprint, jsonify, Response
+import logging
 from datetime import datetime, timezone
 
-from models import User, UserProfile
-from extensions import db
+from extensions import db_router, response_cache
+from Services import dashboard_stats, skills
+from repositories import get_user_for_dashboard, get_dashboard_modified_at
+from utils import query_budget
+from Services.metrics import registry
+from Services.db_routing import read_only
 
+logger = logging.getLogger(__name__)
 main_bp = Blueprint('main_bp', __name__, url_prefix='/api')
 
 @main_bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now(timezone.utc).isoformat()})
+    response = {'status': 'healthy', 'timestamp': datetime.now(timezone.utc).isoformat()}
+    if db_router.enabled:
+        response['database'] = db_router.stats()
+    return jsonify(response)
+
+@main_bp.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text format; each worker process reports its own values
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
 
 @main_bp.route('/dashboard/<int:user_id>', methods=['GET'])
+@read_only
+@query_budget(3) # 1 to validate; 304s and cache hits stop there
+@response_cache.conditional('dashboard', get_dashboard_modified_at, 'DASHBOARD_CACHE_CONTROL',
+                            refresh_seconds='DASHBOARD_REFRESH_SECONDS')
 def get_dashboard_data(user_id): # user_id is already a parameter
     try:
-        user = User.query.get(user_id)
+        # Single primary-key lookup: user, profile and precomputed stats in one joined query
+        user = get_user_for_dashboard(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        profile = UserProfile.query.filter_by(user_id=user_id).first()
+        user_data = user.to_dict(include_profile=True)
+        stats = user.dashboard_stats
+        if stats is None:
+            # History from before the stats table that migration 0005 hasn't reached; the row itself is
+            # written by the next recorded activity, not by this read-only view
+            stats = dashboard_stats.compute_stats(user_id)
         
         dashboard_data = {
             'user': {
-                'user_id': user.user_id,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'email': user.email,
-                'profile': profile.to_dict() if profile else None
+                'user_id': user_data['user_id'],
+                'first_name': user_data['first_name'],
+                'last_name': user_data['last_name'],
+                'email': user_data['email'],
+                'profile': user_data['profile']
             },
-            'stats': {
-                'message': 'Interview statistics are currently unavailable due to missing data models.',
-                'interviewsCompleted': 0,
-                'averageScore': 0,
-                'upcomingInterviews': 0,
-                'practiceTime': "0h 0m",
-                'activities': [{'id': None, 'type': 'account_creation', 'completed': True, 'date': user.created_at.isoformat() if user.created_at else None}],
-                'recommendedPractice': [
-                    {'id': 1, 'title': 'Behavioral Interview', 'description': 'Practice common behavioral questions.', 'type': 'behavioral'},
-                    {'id': 2, 'title': 'Technical Skills', 'description': 'Practice technical questions for your role.', 'type': 'technical'}
-                ],
-                'chartData': []
-            }
+            'stats': dashboard_stats.to_dashboard_stats(stats, user, practice_skills=skills.skill_gaps(user.profile))
         }
         return jsonify(dashboard_data), 200
         
     except Exception as e:
-        print(f"Dashboard Error: {str(e)}")
+        logger.exception("Dashboard Error")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
-
-@main_bp.route('/seed/<int:user_id>', methods=['POST'])
-def seed_data(user_id): # user_id is already a parameter
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found for seeding'}), 404
-        
-    return jsonify({
-        'success': False,
-        'message': 'Seeding feature is currently unavailable due to missing data models (InterviewSession, etc.).',
-    }), 501
\ No newline at end of file
@@ -0,0 +1,37 @@
+from flask import Blueprint, request, jsonify
+import logging
+
+from Services import skills
+from utils import query_budget
+from Services.db_routing import read_only
+
+logger = logging.getLogger(__name__)
+skill_bp = Blueprint('skill_bp', __name__, url_prefix='/api/skills')
+
+@skill_bp.route('/users', methods=['GET'])
+@read_only
+@query_budget(2)
+def find_users_by_skills():
+    # /api/skills/users?skills=Python,SQL returns users listing all of them; page with ?after=<last user_id>
+    names = [name for name in request.args.get('skills', '').split(',') if name.strip()]
+    if not names:
+        return jsonify({'error': 'skills is required, e.g. ?skills=Python,SQL'}), 400
+    if len(names) > skills.MAX_SEARCH_SKILLS:
+        return jsonify({'error': f'At most {skills.MAX_SEARCH_SKILLS} skills can be searched at once'}), 400
+
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    matched, users = skills.find_users_with_skills(names, limit=limit, after_user_id=request.args.get('after', type=int))
+    return jsonify({
+        'skills': [skill.to_dict() for skill in matched],
+        'users': users,
+        'next_after': users[-1]['user_id'] if len(users) == limit else None
+    }), 200
+
+@skill_bp.route('/top', methods=['GET'])
+@read_only
+@query_budget(1)
+def get_top_skills():
+    # /api/skills/top?industry=Technology; without industry, across all profiles
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    industry = request.args.get('industry') or None
+    return jsonify({'industry': industry, 'skills': skills.top_skills(industry, limit=limit)}), 200
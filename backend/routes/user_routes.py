@@ -1,27 +1,32 @@
 from flask import Blueprint, request, jsonify
+import logging
 from datetime import datetime, timezone
 
-from models import User, UserProfile
-from extensions import db
+from models import UserProfile
+from extensions import db, response_cache
+from repositories import get_user_with_profile, get_profile_modified_at
+from utils import query_budget
+from Services import skills
+from Services.db_routing import read_only
 
+logger = logging.getLogger(__name__)
 user_bp = Blueprint('user_bp', __name__, url_prefix='/api/user')
 
 @user_bp.route('/<int:user_id>/profile', methods=['GET'])
+@read_only
+@query_budget(2) # 1 to validate; 304s and cache hits stop there
+@response_cache.conditional('profile', get_profile_modified_at, 'PROFILE_CACHE_CONTROL')
 def get_user_profile(user_id):
-    user = User.query.get(user_id)
+    user = get_user_with_profile(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
-            
-    profile = UserProfile.query.filter_by(user_id=user_id).first()
-    
-    user_data = user.to_dict()
-    user_data['profile'] = profile.to_dict() if profile else None
         
-    return jsonify(user_data), 200
+    return jsonify(user.to_dict(include_profile=True)), 200
 
 @user_bp.route('/<int:user_id>/profile', methods=['PUT'])
+@query_budget(12) # 4, plus up to 8 to re-index skills when skills or industry change
 def update_user_profile(user_id):
-    user = User.query.get(user_id)
+    user = get_user_with_profile(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
@@ -32,9 +37,9 @@ def update_user_profile(user_id):
     if 'first_name' in data: user.first_name = data['first_name']
     if 'last_name' in data: user.last_name = data['last_name']
     
-    profile = UserProfile.query.filter_by(user_id=user_id).first()
+    profile = user.profile
     if not profile:
-        profile = UserProfile(user_id=user_id)
+        profile = UserProfile(user=user)
         db.session.add(profile)
     
     profile_fields = ['occupation', 'industry', 'experience_level', 'interview_goal', 
@@ -47,11 +52,15 @@ def update_user_profile(user_id):
     user.updated_at = datetime.now(timezone.utc)
     
     try:
+        db.session.flush()
+        if 'skills' in data or 'industry' in data:
+            skills.sync_skills(db.session.connection(), [(user.user_id, profile.skills, profile.industry)])
+        # Serialize before commit so the response doesn't reload the expired rows
+        updated_user_data = user.to_dict(include_profile=True)
         db.session.commit()
-        updated_user_data = user.to_dict()
-        updated_user_data['profile'] = profile.to_dict()
+        response_cache.invalidate(user_id)
         return jsonify(updated_user_data), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Profile Update Error: {str(e)}")
+        logger.exception("Profile Update Error")
         return jsonify({'error': f'Profile update error: {str(e)}'}), 500
\ No newline at end of file
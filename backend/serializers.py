@@ -0,0 +1,49 @@
+from operator import attrgetter
+
+
+class Serializer:
+    """
+    Turns model instances into plain dicts for the JSON provider.
+
+    The field list is compiled once into a single attrgetter, so dumping an
+    object is one C-level call plus a zip instead of a Python-level attribute
+    lookup and conditional per field. Values are passed through untouched;
+    datetimes are formatted by the app's JSON provider (responses.py).
+
+    Fields are attribute names, or (key, attribute) pairs to rename them.
+    """
+    def __init__(self, *fields):
+        self.keys = tuple(field if isinstance(field, str) else field[0] for field in fields)
+        attrs = [field if isinstance(field, str) else field[1] for field in fields]
+        getter = attrgetter(*attrs)
+        # attrgetter with a single attribute returns the bare value rather than a tuple
+        self._getter = getter if len(attrs) > 1 else (lambda obj: (getter(obj),))
+
+    def dump(self, obj):
+        return dict(zip(self.keys, self._getter(obj)))
+
+    def dump_many(self, objs):
+        keys, getter = self.keys, self._getter
+        return [dict(zip(keys, getter(obj))) for obj in objs]
+
+
+USER = Serializer('user_id', 'first_name', 'last_name', 'email', 'created_at', 'last_login_at')
+
+USER_PROFILE = Serializer('profile_id', 'user_id', 'occupation', 'industry', 'experience_level', 'interview_goal',
+                          'skills', 'location', 'linkedin_url', 'github_url', 'portfolio_url', 'bio', 'updated_at')
+
+USER_AUTH_LOG = Serializer('log_id', 'user_id', 'action', 'ip_address', 'user_agent', 'created_at')
+
+QUESTION_SET_CACHE_ENTRY = Serializer('entry_id', 'cache_key', 'created_at')
+
+INTERVIEW_SESSION = Serializer('session_id', 'user_id', 'job_title', 'company_industry', 'interview_type', 'status',
+                               'created_at', 'completed_at')
+
+INTERVIEW_QUESTION = Serializer('question_id', 'session_id', 'position', 'question_text')
+
+INTERVIEW_ANSWER = Serializer('answer_id', 'session_id', 'question_position', 'answer_text', 'score', 'summary',
+                              'duration_seconds', 'created_at')
+
+LLM_JOB = Serializer(('job_id', 'job_key'), 'kind', 'status', 'attempts', 'result', 'error', 'created_at', 'finished_at')
+
+SKILL = Serializer('skill_id', 'slug', 'name', 'user_count')
@@ -0,0 +1,84 @@
+"""
+repair_json / parse_llm_json on the kinds of malformed output models
+produce: trailing and missing commas, Python literals, unescaped quotes,
+surrounding prose and responses cut off mid-document.
+"""
+import json
+
+import pytest
+
+from Services.json_repair import parse_llm_json, repair_json
+
+
+def repaired(text):
+    fixed, open_depth = repair_json(text)
+    return json.loads(fixed), open_depth
+
+
+def test_valid_json_is_not_repaired():
+    parsed = parse_llm_json('{"score": 80, "strengths": ["Clear"]}')
+    assert parsed == ({'score': 80, 'strengths': ['Clear']}, False, 0)
+
+
+def test_trailing_commas():
+    assert repaired('{"a": [1, 2,], "b": {"c": 3,},}') == ({'a': [1, 2], 'b': {'c': 3}}, 0)
+
+
+def test_duplicate_commas():
+    assert repaired('[1,, 2]') == ([1, 2], 0)
+
+
+def test_missing_comma_between_fields_on_separate_lines():
+    assert repaired('{"a": "x"\n  "b": 2}') == ({'a': 'x', 'b': 2}, 0)
+
+
+def test_missing_comma_between_fields_on_same_line():
+    assert repaired('{"a": "x" "b": 2}') == ({'a': 'x', 'b': 2}, 0)
+
+
+def test_missing_comma_between_values():
+    assert repaired('{"a": [1 2 {"b": 3} {"b": 4}]}') == ({'a': [1, 2, {'b': 3}, {'b': 4}]}, 0)
+
+
+def test_python_literals():
+    assert repaired('{"a": True, "b": False, "c": None}') == ({'a': True, 'b': False, 'c': None}, 0)
+
+
+def test_unescaped_quotes_inside_string():
+    assert repaired('{"summary": "He said "no" to it", "score": 5}') == (
+        {'summary': 'He said "no" to it', 'score': 5}, 0)
+
+
+def test_raw_control_characters_inside_string():
+    assert repaired('{"summary": "line one\nline two\tend"}') == ({'summary': 'line one\nline two\tend'}, 0)
+
+
+def test_surrounding_prose_and_code_fence():
+    text = 'Here is the feedback:\n```json\n{"score": 70}\n```\nLet me know!'
+    assert parse_llm_json(text) == ({'score': 70}, True, 0)
+
+
+def test_truncated_mid_string_rolls_back_to_last_complete_value():
+    value, open_depth = repaired('{"questions": [{"id": 1, "q": "a"}, {"id": 2, "q": "cut')
+    assert value == {'questions': [{'id': 1, 'q': 'a'}, {'id': 2}]}
+    assert open_depth == 3
+
+
+def test_truncated_mid_number_is_dropped():
+    assert repaired('{"a": 1, "score": 8') == ({'a': 1}, 1)
+
+
+def test_truncated_after_key():
+    assert repaired('{"a": 1, "b"') == ({'a': 1}, 1)
+
+
+def test_parse_reports_truncation():
+    parsed = parse_llm_json('{"questions": [{"id": 1}, {"id": 2')
+    assert parsed.repaired
+    assert parsed.open_depth == 3
+    assert parsed.value == {'questions': [{'id': 1}, {}]}
+
+
+def test_no_document_raises():
+    with pytest.raises(json.JSONDecodeError):
+        parse_llm_json('Sorry, I cannot help with that.')
@@ -0,0 +1,127 @@
+"""
+SQL statement budgets for the read endpoints the frontend polls.
+
+Runs the real views against a throwaway SQLite database with
+ENFORCE_QUERY_BUDGETS on, so a view issuing more statements than its
+@query_budget (an N+1 loop, a lazy load) fails here instead of only
+logging a warning in production.
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import pytest
+
+from app import create_app
+from config import Config, engine_options
+from extensions import db, auth_log_writer
+from utils import count_queries, query_budget
+
+
+@pytest.fixture
+def app(tmp_path):
+    database_uri = f"sqlite:///{tmp_path / 'budgets.db'}"
+
+    class TestConfig(Config):
+        TESTING = True
+        ENFORCE_QUERY_BUDGETS = True
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options(database_uri, 0, 0, 0, 0, False)
+        SQLALCHEMY_BINDS = {}
+        RATE_LIMIT_ENABLED = False
+        SEED_ENDPOINT_ENABLED = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    auth_log_writer.flush() # Its background thread writes to this database
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user_id(client):
+    response = client.post('/api/signup', json={
+        'firstName': 'Ada', 'lastName': 'Lovelace', 'email': 'ada@example.com',
+        'password': 'correct horse', 'confirmPassword': 'correct horse',
+        'occupation': 'Engineer', 'industry': 'Technology', 'experienceLevel': 'mid',
+        'agreeToTerms': True
+    })
+    assert response.status_code == 201
+    return response.get_json()['user']['user_id']
+
+
+def statements(app, client, url, **kwargs):
+    """Runs one GET and returns (response, SQL statements it issued)."""
+    with app.app_context():
+        with count_queries() as queries:
+            response = client.get(url, **kwargs)
+        return response, queries()
+
+
+def seed_history(client, user_id, rounds):
+    for _ in range(rounds):
+        assert client.post(f'/api/seed/{user_id}').status_code == 201
+
+
+def test_profile_within_budget(client, user_id):
+    response = client.get(f'/api/user/{user_id}/profile')
+    assert response.status_code == 200
+    assert response.get_json()['profile']['industry'] == 'Technology'
+
+
+def test_profile_revalidation_is_one_statement(app, client, user_id):
+    etag = client.get(f'/api/user/{user_id}/profile').headers['ETag']
+    response, used = statements(app, client, f'/api/user/{user_id}/profile', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert used == 1
+
+
+def test_dashboard_within_budget(client, user_id):
+    seed_history(client, user_id, 2)
+    response = client.get(f'/api/dashboard/{user_id}')
+    assert response.status_code == 200
+    assert response.get_json()['stats']['interviewsCompleted'] == 4
+
+
+def test_dashboard_statements_do_not_grow_with_history(app, client, user_id):
+    seed_history(client, user_id, 1)
+    _, few = statements(app, client, f'/api/dashboard/{user_id}')
+    seed_history(client, user_id, 5)
+    _, many = statements(app, client, f'/api/dashboard/{user_id}')
+    assert many == few
+
+
+def test_performance_history_within_budget(client, user_id):
+    seed_history(client, user_id, 3)
+    response = client.get(f'/api/interview/performance-history?user_id={user_id}')
+    assert response.status_code == 200
+    assert len(response.get_json()['history']) == 6
+
+
+def test_performance_history_statements_do_not_grow_with_history(app, client, user_id):
+    seed_history(client, user_id, 1)
+    _, few = statements(app, client, f'/api/interview/performance-history?user_id={user_id}')
+    seed_history(client, user_id, 5)
+    _, many = statements(app, client, f'/api/interview/performance-history?user_id={user_id}')
+    assert many == few
+
+
+def test_budget_violation_fails(app, client):
+    # Guards the harness itself: an over-budget view must raise, not just log
+    @app.route('/test/over-budget')
+    @query_budget(1)
+    def over_budget():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.execute(db.text('SELECT 1'))
+        return 'ok'
+
+    with pytest.raises(AssertionError, match='budget 1'):
+        client.get('/test/over-budget')
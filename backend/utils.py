@@ -1,9 +1,144 @@
 from functools import wraps
-from flask import request, jsonify, g
-from collections import Counter
+from flask import request, jsonify, g, current_app, has_app_context
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from sqlalchemy import event
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 def get_most_common_items(items_list, count):
     if not items_list:
         return []
     counter = Counter(items_list)
-    return [item for item, _ in counter.most_common(count)]
\ No newline at end of file
+    return [item for item, _ in counter.most_common(count)]
+
+def install_query_counter(app, db):
+    """
+    Counts SQL statements per app context (i.e. per request) in g.query_count
+    and records each statement's execution time in the DB metrics.
+    """
+    from Services.metrics import DB_QUERY_DURATION
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+        if has_app_context():
+            g.query_count = g.get('query_count', 0) + 1
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('query_start_time')
+        if started:
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+            DB_QUERY_DURATION.observe(time.perf_counter() - started.pop(), statement=verb)
+
+    def handle_error(exception_context):
+        # Failed statements never reach after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_start_time'):
+            connection.info['query_start_time'].pop()
+
+    with app.app_context():
+        for engine in db.engines.values(): # The primary and any read replicas
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+            event.listen(engine, 'handle_error', handle_error)
+
+@contextmanager
+def count_queries():
+    """
+    Counts SQL statements issued inside the block (requires an app context):
+
+        with count_queries() as queries:
+            ...
+        assert queries() == 1
+    """
+    start = g.get('query_count', 0)
+    yield lambda: g.get('query_count', 0) - start
+
+def query_budget(max_queries):
+    """
+    Declares how many SQL statements a view may issue. Exceeding the budget
+    raises when ENFORCE_QUERY_BUDGETS is set (tests/CI) and logs otherwise.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            with count_queries() as queries:
+                response = f(*args, **kwargs)
+            used = queries()
+            if used > max_queries:
+                message = f"{request.endpoint} issued {used} SQL statements (budget {max_queries})"
+                if current_app.config.get('ENFORCE_QUERY_BUDGETS'):
+                    raise AssertionError(message)
+                logger.warning("Query budget exceeded: %s", message)
+            return response
+        return decorated
+    return decorator
+
+def format_practice_time(total_seconds):
+    hours, remainder = divmod(int(total_seconds or 0), 3600)
+    return f"{hours}h {remainder // 60}m"
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with optional per-entry TTL.
+
+    Entries are evicted when the cache grows beyond max_entries (least recently
+    used first) or when they are older than ttl seconds at lookup time.
+    """
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
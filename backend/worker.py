@@ -0,0 +1,96 @@
+"""
+Runs queued LLM jobs (see Services/job_queue.py): python worker.py
+
+The queue is only used with JOB_QUEUE_ENABLED=true, which must be set for
+both the web tier and this process; deploy it as a separate long-running
+service next to gunicorn.
+
+Starts JOB_WORKER_PROCESSES processes with JOB_WORKER_THREADS job threads
+each, so LLM concurrency is sized separately from the web tier's
+WEB_WORKERS x WEB_THREADS. Each process builds its own app (and with it
+its own database pool and LLM connection pool). Processes that exit are
+restarted; SIGTERM or SIGINT lets running jobs finish before exiting, and
+jobs of a process that was killed outright are requeued once their
+heartbeat is JOB_STALE_AFTER_SECONDS old. With QUESTION_BANK_WARM_INTERVAL_SECONDS set,
+the first process also warms the question bank periodically.
+
+Usage:
+    python worker.py
+    python worker.py --processes 1 --threads 8
+"""
+import argparse
+import multiprocessing
+import signal
+import time
+
+from config import Config
+
+
+def start_question_bank_warmer(app):
+    # Periodic warming runs in one job worker process only, never in the web workers
+    if not (Config.QUESTION_BANK_ENABLED and Config.QUESTION_BANK_WARM_INTERVAL_SECONDS):
+        return
+    from routes.interview_routes import get_groq_service
+    from Services.question_bank import start_background_warmer
+    groq_service = get_groq_service()
+    if groq_service:
+        start_background_warmer(app, groq_service, Config.QUESTION_BANK_WARM_INTERVAL_SECONDS,
+                                limit=Config.QUESTION_BANK_WARM_ROLES,
+                                target_per_role=Config.QUESTION_BANK_TARGET_PER_ROLE)
+
+
+def run_process(threads, warm_question_bank=False):
+    from app import create_app
+    from Services.job_queue import JobWorker
+
+    app = create_app()
+    if warm_question_bank:
+        start_question_bank_warmer(app)
+    worker = JobWorker(app, concurrency=threads, poll_interval=Config.JOB_POLL_INTERVAL_SECONDS,
+                       stale_after=Config.JOB_STALE_AFTER_SECONDS,
+                       heartbeat_interval=Config.JOB_HEARTBEAT_INTERVAL_SECONDS,
+                       retention_seconds=Config.JOB_RETENTION_HOURS * 3600,
+                       retry_backoff=Config.JOB_RETRY_BACKOFF_SECONDS)
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+    worker.start()
+    while not stopping:
+        time.sleep(0.5)
+    worker.stop(timeout=Config.LLM_REQUEST_TIMEOUT_SECONDS * 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=Config.JOB_WORKER_PROCESSES)
+    parser.add_argument('--threads', type=int, default=Config.JOB_WORKER_THREADS)
+    args = parser.parse_args()
+
+    # spawn rather than fork: every process starts clean and builds its own pools and threads
+    context = multiprocessing.get_context('spawn')
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+
+    def start(index):
+        process = context.Process(target=run_process, args=(args.threads, index == 0), daemon=False)
+        process.start()
+        return process
+
+    processes = [start(i) for i in range(args.processes)]
+    print(f"Started {args.processes} job worker processes with {args.threads} threads each.")
+    while not stopping:
+        time.sleep(1)
+        for i, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                print(f"Job worker {process.pid} exited with {process.exitcode}, restarting.")
+                processes[i] = start(i)
+
+    for process in processes:
+        process.terminate() # SIGTERM: finish running jobs, then exit
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+Apply schema migrations once per deploy with `flask --app app migrate`
+(`flask --app app init-db` for a new database); workers don't create or
+alter tables on boot.
+"""
+from app import create_app
+
+app = create_app()